@@ -0,0 +1,25 @@
+# athena/__main__.py
+#
+# Headless entry point: python -m athena batch prompts.jsonl -o results.jsonl
+# Nothing here imports PyQt6; the desktop app is still started with main.py.
+
+import argparse
+import logging
+import sys
+from athena.batch import add_batch_parser
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m athena", description="Athena command line tools")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log debug output to stderr")
+    subparsers = parser.add_subparsers(dest="command")
+    add_batch_parser(subparsers)
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 2
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
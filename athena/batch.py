@@ -0,0 +1,257 @@
+# athena/batch.py
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from athena.services.llm_service import LLMService
+from athena.services.document_service import DocumentService
+from athena.utils.settings_manager import SettingsManager
+
+DEFAULT_SETTINGS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'settings.json')
+
+def read_requests(input_path):
+    """Yield (id, request) pairs; requests without an "id" are numbered by line."""
+    with open(input_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            request = json.loads(line)
+            if isinstance(request, str):
+                request = {"prompt": request}
+            yield str(request.get("id", line_number)), request
+
+def completed_ids(output_path):
+    # Successful results from an earlier run; failed ones are retried on resume
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by an interruption
+            if result.get("error") is None and "id" in result:
+                done.add(str(result["id"]))
+    return done
+
+def end_last_line(output_path):
+    """Make sure results appended on resume start on a line of their own.
+
+    A line cut short by an interruption is dropped (completed_ids already
+    ignores it); a complete result that only lost its newline keeps it.
+    """
+    if not os.path.exists(output_path):
+        return
+    with open(output_path, 'rb+') as f:
+        position = f.seek(0, os.SEEK_END)
+        tail = b""
+        while position > 0:
+            step = min(4096, position)
+            position -= step
+            f.seek(position)
+            tail = f.read(step) + tail
+            newline = tail.rfind(b"\n")
+            if newline != -1:
+                position += newline + 1
+                tail = tail[newline + 1:]
+                break
+        if not tail:
+            return
+        try:
+            json.loads(tail)
+        except ValueError:
+            f.truncate(position)
+        else:
+            f.seek(0, os.SEEK_END)
+            f.write(b"\n")
+
+class BatchRunner:
+    """Runs prompt requests against Ollama concurrently, without any Qt dependency.
+
+    Each request is a dict with "prompt" and optionally "id", "model",
+    "system" and "documents" (paths to PDF/DOCX files whose most relevant
+    passages are added to the prompt).
+    """
+
+    def __init__(self, llm_service, document_service, model=None, top_k=5, token_budget=2000):
+        self.llm_service = llm_service
+        self.document_service = document_service
+        self.model = model
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.document_lock = threading.Lock()
+        self.document_ids = {}
+        # Metrics are reported on the requesting thread, so each worker keeps its own
+        self.local = threading.local()
+        self.llm_service.add_metrics_listener(self.capture_metrics)
+        self.logger = logging.getLogger(__name__)
+
+    def capture_metrics(self, metrics):
+        self.local.metrics = metrics
+
+    def prepare_document(self, file_path):
+        # Documents are usually shared by many prompts, so each is extracted and indexed once
+        with self.document_lock:
+            document_id = self.document_ids.get(file_path)
+            if document_id is None:
+                document = self.document_service.load_document(file_path)
+                document_id = document["id"]
+                if document_id not in self.document_service.indexes:
+                    self.document_service.index_document(document_id, document["text"])
+                self.document_ids[file_path] = document_id
+            return document_id
+
+    def build_messages(self, request):
+        prompt = request["prompt"]
+        contexts = []
+        for file_path in request.get("documents", []):
+            document_id = self.prepare_document(file_path)
+            context = self.document_service.get_relevant_context(
+                document_id, prompt, top_k=self.top_k, token_budget=self.token_budget)
+            if context:
+                contexts.append(f"Document content ({os.path.basename(file_path)}): {context}")
+        messages = []
+        if request.get("system"):
+            messages.append({"role": "system", "content": request["system"]})
+        content = "\n\n".join(contexts + [prompt])
+        messages.append({"role": "user", "content": content})
+        return messages
+
+    def run_one(self, request_id, request):
+        model = request.get("model") or self.model
+        result = {"id": request_id, "model": model, "response": None, "error": None}
+        started = time.perf_counter()
+        timings = {}
+        self.local.metrics = None
+        try:
+            if not model:
+                raise ValueError("No model given for the request and no --model default")
+            messages = self.build_messages(request)
+            timings["prepare_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            chunks = []
+            for chunk in self.llm_service.chat_stream(messages, model):
+                if not chunks:
+                    timings["first_token_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                chunks.append(chunk)
+            result["response"] = "".join(chunks)
+        except Exception as e:
+            self.logger.error(f"Request {request_id} failed: {e}")
+            result["error"] = str(e)
+        timings["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        result["timings"] = timings
+        result["metrics"] = self.local.metrics
+        return result
+
+    def run(self, requests, output, workers=4, on_result=None):
+        """Run (id, request) pairs with up to `workers` in flight, writing each result as it completes."""
+        counts = {"ok": 0, "failed": 0}
+        pending = set()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            def drain(return_when):
+                done, still_pending = wait(pending, return_when=return_when)
+                for future in done:
+                    result = future.result()
+                    output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    output.flush()
+                    counts["failed" if result["error"] else "ok"] += 1
+                    if on_result:
+                        on_result(result)
+                return still_pending
+
+            try:
+                # Keep the input streaming; only a small window of requests is held in memory
+                for request_id, request in requests:
+                    pending.add(executor.submit(self.run_one, request_id, request))
+                    if len(pending) >= workers * 2:
+                        pending = drain(FIRST_COMPLETED)
+                while pending:
+                    pending = drain(FIRST_COMPLETED)
+            except KeyboardInterrupt:
+                for future in pending:
+                    future.cancel()
+                raise
+        return counts
+
+def run_batch(args):
+    settings_manager = SettingsManager(args.settings)
+    if os.path.exists(args.settings):
+        settings = settings_manager.load_settings()
+    else:
+        settings = settings_manager.get_default_settings()
+    urls = args.url or settings_manager.get_backend_urls(settings)
+    if args.workspace:
+        settings["working_directory"] = args.workspace
+
+    llm_service = LLMService(urls[0], settings_manager.get_http_settings(settings), urls[1:])
+    llm_service.set_keep_alive(settings.get("keep_alive", "30m"))
+    llm_service.set_generation_options(
+        temperature=args.temperature if args.temperature is not None else settings.get("temperature", 0.7),
+        num_predict=settings.get("max_tokens", 2000),
+        seed=args.seed if args.seed is not None else settings.get("seed"),
+        num_ctx=settings.get("context_window", 4096))
+    if len(urls) > 1:
+        llm_service.get_available_models()
+    document_service = DocumentService(settings["working_directory"],
+                                       chunk_size=settings.get("chunk_size", 200),
+                                       chunk_overlap=settings.get("chunk_overlap", 40),
+                                       pdf_workers=settings.get("pdf_workers", 0) or None)
+    runner = BatchRunner(llm_service, document_service, model=args.model,
+                         top_k=settings.get("retrieval_top_k", 5),
+                         token_budget=settings.get("retrieval_token_budget", 2000))
+
+    skip = set()
+    if args.resume:
+        skip = completed_ids(args.output)
+        end_last_line(args.output)
+    requests = ((request_id, request) for request_id, request in read_requests(args.input)
+                if request_id not in skip)
+    if skip:
+        print(f"Resuming: skipping {len(skip)} completed requests", file=sys.stderr)
+
+    started = time.perf_counter()
+    progress = {"count": 0}
+
+    def report(result):
+        progress["count"] += 1
+        if not args.quiet:
+            status = "error" if result["error"] else f"{result['timings']['total_ms']:.0f} ms"
+            print(f"[{progress['count']}] {result['id']}: {status}", file=sys.stderr)
+
+    with open(args.output, 'a' if args.resume else 'w', encoding='utf-8') as output:
+        try:
+            counts = runner.run(requests, output, workers=args.workers, on_result=report)
+        except KeyboardInterrupt:
+            print("Interrupted; rerun with --resume to continue", file=sys.stderr)
+            return 130
+        finally:
+            llm_service.close()
+    elapsed = time.perf_counter() - started
+    total = counts["ok"] + counts["failed"]
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(f"{counts['ok']} succeeded, {counts['failed']} failed in {elapsed:.1f} s ({rate:.2f} requests/s)",
+          file=sys.stderr)
+    return 1 if counts["failed"] else 0
+
+def add_batch_parser(subparsers):
+    parser = subparsers.add_parser("batch", help="run prompts from a JSONL file without the GUI")
+    parser.add_argument("input", help='JSONL file; each line has "prompt" and optionally "id", "model", '
+                                      '"system" and "documents"')
+    parser.add_argument("-o", "--output", required=True, help="JSONL file results are appended to")
+    parser.add_argument("-m", "--model", help="model for requests that do not name one")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="concurrent requests (default 4)")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip requests that already succeeded in the output file")
+    parser.add_argument("--url", action="append", help="Ollama URL; repeat for several backends")
+    parser.add_argument("--temperature", type=float)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--workspace", help="workspace used for the document cache")
+    parser.add_argument("--settings", default=DEFAULT_SETTINGS_FILE, help="settings file to read")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print the summary")
+    parser.set_defaults(handler=run_batch)
+    return parser
@@ -1,116 +1,823 @@
 # athena/controllers/main_controller.py
 
+import json
 import logging
 import os
+import time
 from PyQt6.QtWidgets import QMessageBox
-from qt_material import apply_stylesheet
+from PyQt6.QtCore import QTimer, QDir
 from athena.views.main_window import MainWindow
+from athena.views.compare_dialog import CompareDialog
 from athena.services.llm_service import LLMService
 from athena.services.document_service import DocumentService
+from athena.services.response_cache import ResponseCache
+from athena.services.document_summarizer import DocumentSummarizer
+from athena.services.chat_exporter import ChatExporter
+from athena.services.image_store import ImageStore
+from athena.services.generation_scheduler import GenerationScheduler, GenerationJob
+from athena.services.context_budget import ContextBudget, messages_tokens, build_summary_request
+from athena.models.chat import Chat
+from athena.controllers.session import ChatSession
+from athena.controllers.workers import (GenerationWorker, TaskWorker, DocumentWorker, SchedulerSignals,
+                                        MetricsSignals, ScheduledTaskWorker, SummaryWorker, CompareWorker,
+                                        ExportWorker)
 from athena.utils.settings_manager import SettingsManager
-from athena.config import OLLAMA_BASE_URL, DEFAULT_WORKSPACE
+from athena.utils.chat_manager import ChatManager
+from athena.utils.search_index import SearchIndex
+from athena.utils.metrics_log import MetricsLog
+from athena.utils.logging_config import update_logging
+
+# Scheduler queue shared by all models of a comparison, so chats keep their turn
+COMPARE_SESSION_ID = "compare"
 
 class MainController:
-    def __init__(self):
+    def __init__(self, settings_file=None):
         self.logger = logging.getLogger(__name__)
         self.logger.info("Initializing MainController")
         
-        settings_file = os.path.join(os.path.dirname(__file__), '..', 'settings.json')
+        settings_file = settings_file or os.path.join(os.path.dirname(__file__), '..', 'settings.json')
         self.settings_manager = SettingsManager(settings_file)
         self.settings = self.settings_manager.load_settings()
         
         self.main_window = None
-        self.llm_service = LLMService(self.settings["ollama_url"])
+        # Last known model list, shown until the first backend poll answers
+        self.models = self.settings.get("last_models") or None
+        self.applied_theme = None
+        self.backend_refresh_worker = None
+        self.sessions = {}  # chat window -> ChatSession
+        self.compare_dialog = None
+        self.compare_jobs = {}  # GenerationJob -> (CompareWorker, ComparePane)
+        self.background_workers = set()
+        self.scheduler_signals = SchedulerSignals()
+        self.scheduler = GenerationScheduler(self.settings.get("max_concurrent_generations", 2),
+                                             on_change=self.scheduler_signals.changed.emit)
+        self.llm_service = LLMService(self.settings["ollama_url"],
+                                      self.settings_manager.get_http_settings(self.settings),
+                                      self.settings.get("ollama_urls", []))
         self.document_service = DocumentService(self.settings["working_directory"])
+        self.image_store = ImageStore(os.path.join(self.settings["working_directory"], "images"))
+        self.metrics_log = None
+        self.summary_cache = None
+        self.metrics_signals = MetricsSignals()
+        self.llm_service.add_metrics_listener(self.record_metrics)
+        self.search_index = SearchIndex(os.path.join(self.settings["working_directory"], "search.sqlite3"))
+        self.document_service.set_search_index(self.search_index)
+        self.chat_manager = ChatManager(self.settings["working_directory"], self.search_index)
         
         self.init_main_window()
         self.connect_signals()
+        self.open_session()
 
     def init_main_window(self):
         self.logger.debug("Initializing main window")
         self.main_window = MainWindow()
         self.main_window.set_controller(self)
+        # Periodically re-poll the backends so the model list and routing stay current
+        self.backend_poll_timer = QTimer(self.main_window)
+        self.backend_poll_timer.timeout.connect(self.refresh_backends)
         self.apply_settings(self.settings)
 
     def connect_signals(self):
         self.logger.debug("Connecting signals")
-        chat_window = self.main_window.chat_window
-        chat_window.message_sent.connect(self.handle_message_sent)
-        chat_window.new_chat_requested.connect(self.handle_new_chat)
-        chat_window.document_uploaded.connect(self.handle_document_upload)
+        self.main_window.search_panel.result_activated.connect(self.handle_search_result)
+        self.scheduler_signals.changed.connect(self.main_window.set_queue_state)
+        self.metrics_signals.metrics_recorded.connect(self.main_window.set_generation_metrics)
+        self.main_window.first_frame_shown.connect(self.apply_theme)
+
+    def connect_session_signals(self, session):
+        chat_window = session.chat_window
+        chat_window.message_sent.connect(lambda message, model: self.handle_message_sent(session, message, model))
+        chat_window.new_chat_requested.connect(lambda: self.handle_new_chat(session))
+        chat_window.document_uploaded.connect(lambda file_path: self.handle_document_upload(session, file_path))
         chat_window.model_changed.connect(self.handle_model_change)
-        chat_window.export_requested.connect(self.handle_export_request)
+        chat_window.export_requested.connect(lambda file_path: self.handle_export_request(session, file_path))
+        chat_window.summarize_requested.connect(lambda: self.handle_summarize_document(session))
+        chat_window.cancel_task_requested.connect(lambda: self.cancel_task(session))
+        chat_window.stop_requested.connect(lambda: self.cancel_generation(session))
+        chat_window.message_added.connect(lambda message: self.handle_message_added(session, message))
+        chat_window.image_attached.connect(lambda source: self.handle_image_attached(session, source))
+
+    def open_session(self, title="New Chat"):
+        chat_window = self.main_window.add_chat_tab(title)
+        session = ChatSession(chat_window)
+        self.sessions[chat_window] = session
+        self.connect_session_signals(session)
+        chat_window.set_virtualization_threshold(self.settings.get("virtualized_chat_threshold", 500))
+        if self.models is not None:
+            chat_window.set_model_list(self.models)
+        return session
+
+    def close_session(self, chat_window):
+        session = self.sessions.pop(chat_window, None)
+        if session is None:
+            return
+        self.stop_generation(session)
+        self.cancel_document_processing(session, notify=False)
+        self.cancel_document_summary(session, notify=False)
+        self.cancel_export(session, notify=False)
+        self.main_window.remove_chat_tab(chat_window)
+        if not self.sessions:
+            self.open_session()
+
+    def current_session(self):
+        return self.sessions.get(self.main_window.chat_window)
 
     def apply_settings(self, new_settings):
         self.settings.update(new_settings)
         self.settings_manager.save_settings(self.settings)
-        self.llm_service.set_base_url(self.settings["ollama_url"])
+        self.llm_service.set_backends(self.settings_manager.get_backend_urls(self.settings))
+        self.llm_service.configure_http(**self.settings_manager.get_http_settings(self.settings))
+        self.llm_service.set_keep_alive(self.settings.get("keep_alive", "30m"))
+        self.llm_service.set_generation_options(temperature=self.settings.get("temperature", 0.7),
+                                                num_predict=self.settings.get("max_tokens", 2000),
+                                                seed=self.settings.get("seed"),
+                                                num_ctx=self.settings.get("context_window", 4096))
+        self.configure_response_cache()
+        self.configure_summary_cache()
+        self.configure_search_index()
+        self.configure_image_store()
+        self.configure_metrics_log()
+        self.configure_logging()
         self.document_service.set_working_directory(self.settings["working_directory"])
+        if self.chat_manager.set_working_directory(self.settings["working_directory"]):
+            self.import_saved_chats()
+        self.document_service.set_cache_limit(self.settings.get("document_cache_max_mb", 1024) * 1024 * 1024)
+        self.document_service.set_pdf_extraction(self.settings.get("pdf_workers", 0),
+                                                 self.settings.get("pdf_pages_per_task", 8))
+        self.document_service.set_chunking(self.settings.get("chunk_size", 200),
+                                           self.settings.get("chunk_overlap", 40))
         if self.main_window:
-            apply_stylesheet(self.main_window, theme=self.settings["theme"])
+            self.apply_theme(use_cache=not self.main_window.isVisible())
             font = self.main_window.font()
             font.setPointSize(self.settings.get("font_size", 12))
             self.main_window.setFont(font)
+            for chat_window in self.main_window.chat_windows():
+                chat_window.set_virtualization_threshold(self.settings.get("virtualized_chat_threshold", 500))
+        self.scheduler.set_max_per_backend(self.settings.get("max_concurrent_generations", 2))
+        if self.main_window:
+            self.backend_poll_timer.setInterval(max(5, self.settings.get("backend_poll_interval", 30)) * 1000)
         # Apply other settings as needed
 
+    def configure_search_index(self):
+        db_path = os.path.join(self.settings["working_directory"], "search.sqlite3")
+        if self.search_index.db_path == db_path:
+            return
+        old_index, self.search_index = self.search_index, SearchIndex(db_path)
+        self.document_service.set_search_index(self.search_index)
+        self.chat_manager.search_index = self.search_index
+        old_index.close()
+
+    def configure_image_store(self):
+        root = os.path.join(self.settings["working_directory"], "images")
+        if self.image_store.root != root:
+            self.image_store = ImageStore(root)
+        self.image_store.configure(self.settings.get("image_max_dimension", 1024),
+                                   self.settings.get("image_thumbnail_size", 200),
+                                   self.settings.get("image_quality", 85))
+
+    def configure_metrics_log(self):
+        if not self.settings.get("metrics_enabled", True):
+            self.metrics_log = None
+            return
+        directory = os.path.join(self.settings["working_directory"], "metrics")
+        max_bytes = self.settings.get("metrics_max_mb", 5) * 1024 * 1024
+        if self.metrics_log is None or self.metrics_log.directory != directory:
+            self.metrics_log = MetricsLog(directory, max_bytes)
+        self.metrics_log.max_bytes = max_bytes
+
+    def record_metrics(self, metrics):
+        # Runs on the request's thread, so the file write stays off the GUI thread
+        metrics_log = self.metrics_log
+        if metrics_log is not None:
+            metrics_log.record(metrics)
+        self.metrics_signals.metrics_recorded.emit(metrics)
+
+    def search(self, query):
+        started = time.perf_counter()
+        results = self.search_index.search(query, limit=self.settings.get("search_result_limit", 50))
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.main_window.search_panel.set_results(query, results, elapsed_ms)
+        return results
+
+    def handle_search_result(self, result):
+        session = self.current_session()
+        if result["kind"] == "chat":
+            try:
+                self.load_chat_by_id(int(result["ref"]))
+            except Exception:
+                self.main_window.show_status_message(f"Could not open chat: {result['title']}")
+        else:
+            content = self.document_service.get_document_content(result["ref"])
+            if content is None:
+                self.main_window.show_status_message(f"Document no longer cached: {result['title']}")
+                return
+            session.current_document_id = result["ref"]
+            if result["ref"] not in self.document_service.indexes:
+                self.document_service.index_document(result["ref"], content)
+            session.chat_window.set_document_content(result["title"], content)
+
+    def configure_response_cache(self):
+        if not self.settings.get("response_cache_enabled", False):
+            self.llm_service.set_response_cache(None)
+            return
+        directory = os.path.join(self.settings["working_directory"], "cache", "responses")
+        memory_entries = self.settings.get("response_cache_memory_entries", 128)
+        max_disk_bytes = self.settings.get("response_cache_max_mb", 256) * 1024 * 1024
+        cache = self.llm_service.response_cache
+        if (cache is None or cache.directory != directory or cache.memory_entries != memory_entries
+                or cache.max_disk_bytes != max_disk_bytes):
+            self.llm_service.set_response_cache(ResponseCache(directory, memory_entries, max_disk_bytes))
+
+    def configure_logging(self):
+        update_logging(level=self.settings.get("log_level", "INFO"),
+                       json_lines=self.settings.get("log_json", False),
+                       max_bytes=self.settings.get("log_max_mb", 10) * 1024 * 1024,
+                       backup_count=self.settings.get("log_backup_count", 5),
+                       rotate_when=self.settings.get("log_rotate_when", ""))
+
+    def configure_summary_cache(self):
+        # Section and merge summaries are always cached, keyed by their input text
+        directory = os.path.join(self.settings["working_directory"], "cache", "summaries")
+        if self.summary_cache is None or self.summary_cache.directory != directory:
+            self.summary_cache = ResponseCache(directory, memory_entries=256, max_disk_bytes=64 * 1024 * 1024)
+
+    def apply_theme(self, use_cache=False):
+        theme = self.settings["theme"]
+        if theme == self.applied_theme:
+            return
+        cache_path = os.path.join(self.settings["working_directory"], "cache", "theme", f"{theme}.json")
+        if use_cache and os.path.exists(cache_path):
+            # Before the first frame, reuse the stylesheet rendered on an earlier run; qt_material
+            # (and jinja2 behind it) is imported and the theme fully applied after the first frame
+            try:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    cached = json.load(f)
+                for prefix, paths in cached["search_paths"].items():
+                    QDir.setSearchPaths(prefix, paths)
+                self.main_window.setStyleSheet(cached["stylesheet"])
+                return
+            except (OSError, ValueError, KeyError) as e:
+                self.logger.warning(f"Ignoring cached theme {cache_path}: {e}")
+        from qt_material import apply_stylesheet
+        apply_stylesheet(self.main_window, theme=theme)
+        self.applied_theme = theme
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                # The stylesheet refers to qt_material's generated icons through the icon: search path
+                json.dump({"stylesheet": self.main_window.styleSheet(),
+                           "search_paths": {"icon": QDir.searchPaths("icon")}}, f)
+        except OSError as e:
+            self.logger.warning(f"Could not cache theme {theme}: {e}")
+
     def show_main_window(self):
         self.logger.info("Showing main window")
         self.main_window.show()
-        self.load_models()
+        # Models load in the background; the cached list is already in the selector
+        self.refresh_backends()
+        self.backend_poll_timer.start()
+        self.import_saved_chats()
 
-    def load_models(self):
-        self.logger.info("Loading available models")
-        try:
-            models = self.llm_service.get_available_models()
-            self.main_window.chat_window.set_model_list(models)
-        except Exception as e:
-            self.logger.error(f"Failed to load models: {e}")
-            QMessageBox.warning(self.main_window, "Model Loading Error",
-                                "Failed to load available models. Please check your connection to Ollama.")
+    def import_saved_chats(self):
+        # Legacy JSON chats and the search index catch-up are handled in a worker after startup
+        worker = TaskWorker(self.chat_manager.import_saved_chats)
+        worker.task_finished.connect(self.handle_chats_imported)
+        worker.task_failed.connect(lambda error: self.logger.error(f"Could not import saved chats: {error}"))
+        self.track_worker(worker)
+        worker.start()
+
+    def handle_chats_imported(self, migrated):
+        if migrated:
+            self.logger.info(f"Imported {migrated} saved chats")
+            self.main_window.show_status_message(f"Imported {migrated} saved chats")
 
-    def handle_message_sent(self, message, model):
+    def refresh_backends(self):
+        if self.backend_refresh_worker is not None:
+            return
+        worker = TaskWorker(self.llm_service.get_available_models)
+        worker.task_finished.connect(self.handle_backends_refreshed)
+        worker.task_failed.connect(self.handle_backends_failed)
+        self.track_worker(worker)
+        self.backend_refresh_worker = worker
+        worker.start()
+
+    def handle_backends_refreshed(self, models):
+        self.backend_refresh_worker = None
+        if models != self.models:
+            self.logger.info(f"Available models changed: {models}")
+            self.models = models
+            for chat_window in self.main_window.chat_windows():
+                chat_window.set_model_list(models)
+            if self.compare_dialog is not None:
+                self.compare_dialog.set_model_list(models)
+            if models != self.settings.get("last_models"):
+                self.settings["last_models"] = models
+                self.settings_manager.save_settings(self.settings)
+
+    def handle_backends_failed(self, error_message):
+        self.backend_refresh_worker = None
+        self.main_window.show_status_message(f"No Ollama backend reachable: {error_message}")
+
+    def handle_message_sent(self, session, message, model):
         self.logger.info(f"Handling message sent with model: {model}")
         try:
-            document_content = self.main_window.chat_window.get_current_document()
-            context = f"Document content: {document_content}\n\n" if document_content else ""
-            full_prompt = context + message
-            response = self.llm_service.generate_response(full_prompt, model)
-            self.main_window.chat_window.display_message("Athena", response)
+            document_id = self.ensure_document_index(session)
+            images = [self.image_store.encode_payload(image) for image in session.pending_images]
+            session.pending_images = []
+            session.model = model
+            # The conversation is only changed on the GUI thread; the job gets its own copy of the messages
+            session.conversation.add_user(message, images=images)
+            history = session.conversation.to_messages()
+
+            def stream(cancel_token):
+                messages = list(history)
+                budget = self.get_context_budget(model)
+                # Retrieved passages get at most half of the prompt, whatever the retrieval setting
+                document_content = self.get_document_context(message, document_id, budget.prompt_tokens // 2)
+                if document_content:
+                    # Passages go into this request only, so later turns don't keep resending them
+                    messages[-1] = {**messages[-1], "content": f"Document content: {document_content}\n\n{message}"}
+                messages, dropped = budget.fit(messages)
+                if dropped:
+                    self.logger.warning(f"Prompt over the {budget.context_window}-token window of {model}; "
+                                        f"left out the {dropped} oldest messages")
+                return self.llm_service.chat_stream(messages, model, cancel_token)
+
+            self.start_generation(session, stream, self.llm_service.route(model))
         except Exception as e:
             self.logger.error(f"Error generating response: {e}")
-            self.main_window.chat_window.display_message("Athena", "Sorry, I encountered an error while processing your request.")
+            session.chat_window.display_message("Athena", "Sorry, I encountered an error while processing your request.")
 
-    def handle_new_chat(self):
-        self.logger.info("Starting a new chat")
-        self.main_window.chat_window.clear_chat()
+    def handle_image_attached(self, session, source):
+        # Hashing, downscaling and thumbnailing run in a worker; the image is sent with the next message
+        worker = TaskWorker(self.image_store.import_image, source)
+        worker.task_finished.connect(lambda image: self.handle_image_stored(session, image))
+        worker.task_failed.connect(lambda error: self.handle_image_failed(session, error))
+        self.track_worker(worker)
+        worker.start()
 
-    def handle_document_upload(self, file_path):
-        self.logger.info(f"Handling document upload: {file_path}")
+    def handle_image_stored(self, session, image):
+        if session.chat_window not in self.sessions:
+            return
+        session.pending_images.append(image)
+        session.chat_window.display_message("You", image["path"], content_type='image')
+
+    def handle_image_failed(self, session, error_message):
+        self.logger.error(f"Error attaching image: {error_message}")
+        if session.chat_window in self.sessions:
+            session.chat_window.display_message("System", f"Could not attach image: {error_message}")
+
+    def ensure_document_index(self, session):
+        if session.current_document_id is None:
+            return None
+        if session.current_document_id not in self.document_service.indexes:
+            document_text = session.chat_window.get_current_document()
+            if not document_text:
+                return None
+            self.document_service.index_document(session.current_document_id, document_text)
+        return session.current_document_id
+
+    def get_document_context(self, query, document_id, max_tokens=None):
+        # Runs on the generation worker thread
+        if document_id is None:
+            return ""
+        top_k = self.settings.get("retrieval_top_k", 5)
+        token_budget = self.settings.get("retrieval_token_budget", 2000)
+        if max_tokens is not None:
+            token_budget = min(token_budget, max_tokens)
+        embedding_model = self.settings.get("embedding_model")
+        if embedding_model and self.document_service.is_embedded(document_id, embedding_model):
+            try:
+                query_vector = self.llm_service.embed([query], embedding_model)[0]
+                return self.document_service.get_semantic_context(
+                    document_id, query_vector, embedding_model, top_k=top_k, token_budget=token_budget)
+            except Exception as e:
+                self.logger.warning(f"Semantic retrieval failed, falling back to lexical search: {e}")
+        return self.document_service.get_relevant_context(
+            document_id, query, top_k=top_k, token_budget=token_budget)
+
+    def embed_document(self, document_id):
+        embedding_model = self.settings.get("embedding_model")
+        if not embedding_model:
+            return
+        worker = TaskWorker(
+            self.document_service.embed_document,
+            document_id,
+            lambda texts: self.llm_service.embed(texts, embedding_model),
+            embedding_model,
+            self.settings.get("embedding_batch_size", 32))
+        worker.task_finished.connect(
+            lambda count: self.main_window.show_status_message(f"Document embeddings ready ({count} new chunks)"))
+        worker.task_failed.connect(
+            lambda error: self.main_window.show_status_message(f"Embedding failed: {error}"))
+        self.track_worker(worker)
+        self.main_window.show_status_message("Embedding document...", 0)
+        worker.start()
+
+    def start_generation(self, session, stream_factory, backend=None):
+        chat_window = session.chat_window
+        worker = GenerationWorker(stream_factory)
+        worker.chunk_received.connect(chat_window.append_stream_chunk)
+        worker.generation_finished.connect(lambda response: self.handle_generation_finished(session, response))
+        worker.generation_failed.connect(lambda error: self.handle_generation_failed(session, error))
+        worker.generation_cancelled.connect(lambda partial: self.handle_generation_cancelled(session, partial))
+        session.generation_worker = worker
+        session.generation_job = GenerationJob(session.id, backend or self.llm_service.base_url, worker.run)
+        chat_window.begin_stream_message("Athena")
+        self.scheduler.submit(session.generation_job)
+
+    def handle_generation_finished(self, session, response):
+        session.generation_worker = session.generation_job = None
+        session.conversation.add_assistant(response)
+        session.chat_window.end_stream_message(response)
+        self.summarize_history(session)
+
+    def handle_generation_failed(self, session, error_message):
+        session.generation_worker = session.generation_job = None
+        session.conversation.discard_last_user()
+        chat_window = session.chat_window
+        chat_window.end_stream_message()
+        chat_window.display_message("Athena", "Sorry, I encountered an error while processing your request.")
+
+    def handle_generation_cancelled(self, session, partial_response):
+        # Keep whatever was generated before the user stopped it
+        session.generation_worker = session.generation_job = None
+        if partial_response:
+            session.conversation.add_assistant(partial_response)
+            session.chat_window.end_stream_message(partial_response)
+            self.summarize_history(session)
+        else:
+            session.conversation.discard_last_user()
+            session.chat_window.discard_stream_message()
+
+    def cancel_generation(self, session):
+        job = session.generation_job
+        if job is None:
+            return
+        if not self.scheduler.cancel(job) and job.state == "cancelled":
+            # Never started, so no signal will arrive; take back the turn it was sent with.
+            # A job that finished meanwhile has its result already queued and is handled there.
+            session.generation_worker = session.generation_job = None
+            session.conversation.discard_last_user()
+            session.chat_window.discard_stream_message()
+
+    def get_context_budget(self, model):
+        # Runs on the generation thread; /api/show is only asked once per model
         try:
-            document_text = self.document_service.process_document(file_path)
-            if document_text:
-                self.main_window.chat_window.set_document_content(file_path, document_text)
-                self.main_window.chat_window.display_message("System", "Document uploaded and processed successfully.")
-            else:
-                self.main_window.chat_window.display_message("System", "Failed to process the document.")
+            context_length, model_num_ctx = self.llm_service.get_model_context(model)
         except Exception as e:
-            self.logger.error(f"Error processing document: {e}")
-            self.main_window.chat_window.display_message("System", "An error occurred while processing the document.")
-            
+            self.logger.warning(f"Could not read the context length of {model}: {e}")
+            context_length = model_num_ctx = None
+        return ContextBudget(self.settings.get("context_window", 4096), context_length, model_num_ctx,
+                             reply_tokens=self.settings.get("max_tokens", 2000),
+                             summarize_at=self.settings.get("summarize_at", 0.75))
+
+    def summary_cutoff(self, summary, history, model):
+        summary_tokens = messages_tokens([{"content": summary or ""}])
+        return self.get_context_budget(model).summary_cutoff(history, summary_tokens)
+
+    def summarize_history(self, session):
+        # Once the history nears the budget, the oldest turns are folded into a running summary
+        # in the background so the next prompts stay under the context window
+        if (not self.settings.get("summarize_history", True) or session.summary_job is not None
+                or session.model is None):
+            return
+        conversation, model = session.conversation, session.model
+        summary_model = self.settings.get("summary_model") or model
+        # The job works on a copy; the conversation itself is only changed on the GUI thread
+        summary, summarized, history = conversation.summary, conversation.summarized, conversation.history()
+        # Skip the job when the model's window is known and nothing is due yet
+        if model in self.llm_service.model_contexts and not self.summary_cutoff(summary, history, model):
+            return
+
+        def summarize(cancel_token):
+            cutoff = self.summary_cutoff(summary, history, model)
+            if not cutoff:
+                return None
+            self.logger.info(f"Summarizing {cutoff} older messages of session {session.id} with {summary_model}")
+            request = build_summary_request(summary, history[:cutoff])
+            # The summary has to fit in the room reserved for a reply
+            reply_tokens = self.get_context_budget(model).reply_tokens
+            options = {"num_predict": min(self.settings.get("summary_max_tokens", 512), reply_tokens),
+                       "temperature": 0.2}
+            new_summary = "".join(self.llm_service.chat_stream(request, summary_model, cancel_token, options)).strip()
+            return new_summary, summarized + cutoff
+
+        worker = ScheduledTaskWorker(summarize)
+        worker.task_finished.connect(lambda result: self.handle_summary_finished(session, conversation, result))
+        worker.task_failed.connect(lambda error: self.handle_summary_failed(session, error))
+        worker.task_cancelled.connect(lambda: self.handle_summary_failed(session, None))
+        session.summary_worker = worker
+        session.summary_job = GenerationJob(session.id, self.llm_service.route(summary_model), worker.run)
+        self.scheduler.submit(session.summary_job)
+
+    def handle_summary_finished(self, session, conversation, result):
+        session.summary_worker = session.summary_job = None
+        # Ignore a summary of a conversation that has since been cleared or replaced
+        if result is None or session.conversation is not conversation:
+            return
+        summary, summarized = result
+        if not summary:
+            return
+        conversation.apply_summary(summary, summarized)
+        self.logger.info(f"Session {session.id}: {summarized} messages now covered by the summary")
+        # A long paste can leave the history over the threshold even after one pass
+        self.summarize_history(session)
+
+    def handle_summary_failed(self, session, error_message):
+        session.summary_worker = session.summary_job = None
+        if error_message:
+            self.logger.warning(f"Could not summarize older messages: {error_message}")
+
+    def cancel_summary(self, session):
+        worker, job = session.summary_worker, session.summary_job
+        if job is None:
+            return
+        session.summary_worker = session.summary_job = None
+        worker.task_finished.disconnect()
+        worker.task_failed.disconnect()
+        worker.task_cancelled.disconnect()
+        self.scheduler.cancel(job)
+
+    def stop_generation(self, session):
+        # Cancel and drop the response entirely, e.g. when the chat is cleared or closed
+        self.cancel_summary(session)
+        worker, job = session.generation_worker, session.generation_job
+        if job is None:
+            return
+        session.generation_worker = session.generation_job = None
+        worker.chunk_received.disconnect()
+        worker.generation_finished.disconnect()
+        worker.generation_failed.disconnect()
+        worker.generation_cancelled.disconnect()
+        self.scheduler.cancel(job)
+
+    def track_worker(self, worker):
+        # Keep a reference until the thread finishes so Qt doesn't destroy it while running
+        self.background_workers.add(worker)
+        worker.finished.connect(lambda: self.background_workers.discard(worker))
+        worker.finished.connect(worker.deleteLater)
+
+    def handle_new_chat(self, session):
+        self.logger.info("Starting a new chat")
+        self.stop_generation(session)
+        self.cancel_document_summary(session, notify=False)
+        session.reset()
+        session.chat_window.clear_chat()
+        self.main_window.set_chat_tab_title(session.chat_window, "New Chat")
+
+    def handle_document_upload(self, session, file_path):
+        self.logger.info(f"Handling document upload: {file_path}")
+        self.cancel_document_processing(session, notify=False)
+        chat_window = session.chat_window
+        file_name = os.path.basename(file_path)
+        worker = DocumentWorker(self.document_service, file_path)
+        worker.progress.connect(
+            lambda done, total: chat_window.show_progress(f"Extracting {file_name}", done, total))
+        worker.document_loaded.connect(lambda document: self.handle_document_loaded(session, file_path, document))
+        worker.document_failed.connect(lambda error: self.handle_document_failed(session, error))
+        worker.document_cancelled.connect(lambda: self.handle_document_cancelled(session))
+        self.track_worker(worker)
+        session.document_worker = worker
+        chat_window.show_progress(f"Processing {file_name}", 0, 0)
+        worker.start()
+
+    def handle_document_loaded(self, session, file_path, document):
+        session.document_worker = None
+        chat_window = session.chat_window
+        chat_window.hide_progress()
+        document_text = document["text"]
+        if document_text:
+            document_id = document["id"]
+            session.current_document_id = document_id
+            chat_window.set_document_content(file_path, document_text)
+            self.embed_document(document_id)
+            chat_window.display_message("System", "Document uploaded and processed successfully.")
+        else:
+            chat_window.display_message("System", "Failed to process the document.")
+
+    def handle_document_failed(self, session, error_message):
+        session.document_worker = None
+        session.chat_window.hide_progress()
+        session.chat_window.display_message("System", "An error occurred while processing the document.")
+
+    def handle_document_cancelled(self, session):
+        session.document_worker = None
+        session.chat_window.hide_progress()
+        session.chat_window.display_message("System", "Document processing cancelled.")
+
+    def cancel_document_processing(self, session, notify=True):
+        worker = session.document_worker
+        if worker is None:
+            return
+        session.document_worker = None
+        worker.document_loaded.disconnect()
+        worker.document_failed.disconnect()
+        worker.document_cancelled.disconnect()
+        worker.progress.disconnect()
+        worker.cancel()
+        if notify:
+            session.chat_window.hide_progress()
+            session.chat_window.display_message("System", "Document processing cancelled.")
+
+    def cancel_task(self, session):
+        # The progress bar's Cancel button stops whichever background task is running
+        self.cancel_document_processing(session)
+        self.cancel_document_summary(session)
+        self.cancel_export(session)
+
+    def handle_summarize_document(self, session):
+        chat_window = session.chat_window
+        document_text = chat_window.get_current_document()
+        model = chat_window.get_selected_model()
+        if not document_text or not model or session.document_summary_worker is not None:
+            return
+        file_name = chat_window.get_current_document_name() or "document"
+        self.logger.info(f"Summarizing {file_name} with {model}")
+        # Its own scheduler queue, so the chat's messages don't wait behind every section
+        summarizer = DocumentSummarizer(self.llm_service, model, self.scheduler, f"{session.id}-document-summary",
+                                        self.summary_cache,
+                                        section_tokens=self.settings.get("document_summary_section_tokens", 3000),
+                                        summary_tokens=self.settings.get("document_summary_tokens", 400),
+                                        context_window=self.settings.get("context_window", 4096))
+        worker = SummaryWorker(summarizer, document_text)
+        worker.progress.connect(
+            lambda done, total: chat_window.show_progress(f"Summarizing {file_name}", done, total))
+        worker.summary_finished.connect(lambda summary: self.handle_document_summary(session, file_name, summary))
+        worker.summary_failed.connect(lambda error: self.handle_document_summary_failed(session, error))
+        worker.summary_cancelled.connect(lambda: self.cancel_document_summary(session))
+        self.track_worker(worker)
+        session.document_summary_worker = worker
+        chat_window.summarize_button.setEnabled(False)
+        chat_window.show_progress(f"Summarizing {file_name}", 0, 0)
+        worker.start()
+
+    def handle_document_summary(self, session, file_name, summary):
+        session.document_summary_worker = None
+        chat_window = session.chat_window
+        chat_window.hide_progress()
+        chat_window.summarize_button.setEnabled(True)
+        if not summary:
+            chat_window.display_message("System", "The document has no text to summarize.")
+            return
+        # Keep the summary in the conversation so follow-up questions can refer to it
+        request = f"Summarize the document {file_name}."
+        session.conversation.add_user(request)
+        session.conversation.add_assistant(summary)
+        chat_window.display_message("You", request)
+        chat_window.display_message("Athena", summary)
+        self.summarize_history(session)
+
+    def handle_document_summary_failed(self, session, error_message):
+        session.document_summary_worker = None
+        session.chat_window.hide_progress()
+        session.chat_window.summarize_button.setEnabled(True)
+        session.chat_window.display_message("System", f"Could not summarize the document: {error_message}")
+
+    def cancel_document_summary(self, session, notify=True):
+        worker = session.document_summary_worker
+        if worker is None:
+            return
+        session.document_summary_worker = None
+        worker.summary_finished.disconnect()
+        worker.summary_failed.disconnect()
+        worker.summary_cancelled.disconnect()
+        worker.progress.disconnect()
+        worker.cancel()
+        if notify:
+            session.chat_window.hide_progress()
+            session.chat_window.summarize_button.setEnabled(True)
+            session.chat_window.display_message("System", "Document summary cancelled.")
+
+    def show_compare_dialog(self):
+        if self.compare_dialog is None:
+            self.compare_dialog = CompareDialog(self.main_window)
+            self.compare_dialog.compare_requested.connect(self.start_comparison)
+            self.compare_dialog.stop_requested.connect(self.stop_comparison)
+            self.compare_dialog.finished.connect(lambda _: self.stop_comparison())
+            self.compare_dialog.set_model_list(self.models or [])
+        self.compare_dialog.show()
+        self.compare_dialog.raise_()
+        self.compare_dialog.activateWindow()
+
+    def start_comparison(self, prompt, models):
+        # Each model is its own scheduler job, so the per-backend cap on parallel
+        # generations also bounds how many models run (and are loaded) at once
+        if self.compare_jobs:
+            return
+        self.logger.info(f"Comparing {len(models)} models: {models}")
+        dialog = self.compare_dialog
+        dialog.start_comparison(models, self.scheduler.max_per_backend)
+        messages = [{"role": "user", "content": prompt}]
+        jobs = []
+        for model in models:
+            pane = dialog.pane(model)
+            worker = CompareWorker(
+                lambda cancel_token, model=model: self.llm_service.chat_stream(messages, model, cancel_token),
+                self.llm_service)
+            job = GenerationJob(COMPARE_SESSION_ID, self.llm_service.route(model), worker.run)
+            worker.chunk_received.connect(pane.append_chunk)
+            worker.metrics_recorded.connect(pane.set_metrics)
+            worker.generation_finished.connect(
+                lambda _, job=job, pane=pane: self.handle_compare_done(job, pane.set_finished))
+            worker.generation_failed.connect(
+                lambda error, job=job, pane=pane: self.handle_compare_done(job, lambda: pane.set_failed(error)))
+            worker.generation_cancelled.connect(
+                lambda _, job=job, pane=pane: self.handle_compare_done(job, pane.set_stopped))
+            self.compare_jobs[job] = (worker, pane)
+            jobs.append(job)
+        for job in jobs:
+            self.scheduler.submit(job)
+
+    def handle_compare_done(self, job, update_pane):
+        if self.compare_jobs.pop(job, None) is None:
+            return
+        update_pane()
+        if not self.compare_jobs and self.compare_dialog is not None:
+            self.compare_dialog.set_running(False)
+
+    def stop_comparison(self):
+        for job, (_, pane) in list(self.compare_jobs.items()):
+            if not self.scheduler.cancel(job) and job.state == "cancelled":
+                # Never started, so no signal will arrive
+                self.handle_compare_done(job, pane.set_stopped)
+
     def handle_model_change(self, model):
         self.logger.info(f"Model changed to: {model}")
+        if model and self.settings.get("warm_up_models", True):
+            self.warm_up_model(model)
 
-    def handle_export_request(self, file_path):
-        try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                for chat in self.main_window.chat_window.chat_history:
-                    f.write(f"--- {chat.sender} ({chat.timestamp}) ---\n")
-                    f.write(f"{chat.content}\n\n")
-            self.logger.info(f"Chat exported to {file_path}")
-            QMessageBox.information(self.main_window, "Export Successful", "Chat history has been exported successfully.")
-        except Exception as e:
-            self.logger.error(f"Error exporting chat: {e}")
-            QMessageBox.warning(self.main_window, "Export Error", f"Failed to export chat: {str(e)}")
+    def warm_up_model(self, model):
+        self.main_window.set_model_state(model, "loading...")
+        worker = TaskWorker(self.llm_service.load_model, model)
+        worker.task_finished.connect(lambda _: self.handle_model_loaded(model, "ready"))
+        worker.task_failed.connect(lambda error: self.handle_model_loaded(model, "load failed"))
+        self.track_worker(worker)
+        worker.start()
+
+    def handle_model_loaded(self, model, state):
+        # A slower warm-up for a previously selected model must not overwrite the current state
+        if model == self.main_window.chat_window.get_selected_model():
+            self.main_window.set_model_state(model, state)
+
+    def handle_export_request(self, session, file_path):
+        chat_window = session.chat_window
+        history = chat_window.chat_history
+        end = len(history)
+        if chat_window.streaming_message is not None:
+            end = chat_window.streaming_row
+        # Saved messages are streamed from the store by the worker; only the unsaved tail is copied here
+        saved = min(history.persisted_count, end) if history.id is not None else 0
+        chat = {"id": history.id, "name": history.name or "Chat", "message_count": saved,
+                "messages": [message.to_dict() for message in history[saved:end]]}
+        self.start_export(session, [chat], file_path, chat["name"])
+
+    def export_all_chats(self, file_path):
+        # Only chat metadata is listed here; messages are read a page at a time while writing
+        chats = [{"id": chat["id"], "name": chat["name"], "message_count": chat["message_count"]}
+                 for chat in self.chat_manager.list_chats()]
+        self.start_export(self.current_session(), chats, file_path, "Athena chat export")
+
+    def start_export(self, session, chats, file_path, title):
+        self.cancel_export(session, notify=False)
+        chat_window = session.chat_window
+        file_name = os.path.basename(file_path)
+        exporter = ChatExporter(self.chat_manager, embed_images=self.settings.get("export_embed_images", True))
+        worker = ExportWorker(exporter, chats, file_path, title)
+        worker.progress.connect(
+            lambda done, total: chat_window.show_progress(f"Exporting to {file_name}", done, total))
+        worker.export_finished.connect(lambda count: self.handle_export_finished(session, file_path, count))
+        worker.export_failed.connect(lambda error: self.handle_export_failed(session, error))
+        worker.export_cancelled.connect(lambda: self.cancel_export(session))
+        self.track_worker(worker)
+        session.export_worker = worker
+        chat_window.show_progress(f"Exporting to {file_name}", 0, 0)
+        worker.start()
+
+    def handle_export_finished(self, session, file_path, count):
+        session.export_worker = None
+        session.chat_window.hide_progress()
+        self.logger.info(f"Chat exported to {file_path}")
+        self.main_window.show_status_message(f"Exported {count} messages to {file_path}")
+
+    def handle_export_failed(self, session, error_message):
+        session.export_worker = None
+        session.chat_window.hide_progress()
+        QMessageBox.warning(self.main_window, "Export Error", f"Failed to export chat: {error_message}")
+
+    def cancel_export(self, session, notify=True):
+        worker = session.export_worker
+        if worker is None:
+            return
+        session.export_worker = None
+        worker.export_finished.disconnect()
+        worker.export_failed.disconnect()
+        worker.export_cancelled.disconnect()
+        worker.progress.disconnect()
+        worker.cancel()
+        if notify:
+            session.chat_window.hide_progress()
+            self.main_window.show_status_message("Export cancelled")
 
     def get_working_directory(self):
         return self.settings["working_directory"]
@@ -153,38 +860,99 @@ class MainController:
         self.settings["temperature"] = temp
         self.apply_settings(self.settings)
 
+    def handle_message_added(self, session, message):
+        if self.settings.get("auto_save", True):
+            self.persist_chat_history(session=session)
+
+    def persist_chat_history(self, chat_name=None, session=None):
+        session = session or self.current_session()
+        chat_window = session.chat_window
+        history = chat_window.chat_history
+        end = len(history)
+        if chat_window.streaming_message is not None:
+            end = chat_window.streaming_row
+        if history.id is None:
+            if end == 0:
+                return
+            name = chat_name or history[0].created_at.strftime("Chat %Y-%m-%d %H:%M:%S")
+            history.attach(self.chat_manager.create_chat(name, chat_window.get_selected_model()), name,
+                           self.chat_manager)
+            self.main_window.set_chat_tab_title(chat_window, name)
+        elif chat_name:
+            self.chat_manager.rename_chat(history.id, chat_name)
+            history.name = chat_name
+            self.main_window.set_chat_tab_title(chat_window, chat_name)
+        for message in history[history.persisted_count:end]:
+            self.chat_manager.append_message(history.id, message)
+        history.mark_persisted(end)
+
     def save_chat(self, chat_name):
-        chat_data = self.main_window.chat_window.chat_history
-        file_path = os.path.join(self.get_working_directory(), "chats", f"{chat_name}.json")
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump([msg.__dict__ for msg in chat_data], f, indent=2, default=str)
+            self.persist_chat_history(chat_name)
             self.logger.info(f"Chat saved: {chat_name}")
         except Exception as e:
             self.logger.error(f"Error saving chat: {e}")
             raise
 
     def load_chat(self, chat_name):
-        file_path = os.path.join(self.get_working_directory(), "chats", f"{chat_name}.json")
+        chat = self.chat_manager.find_chat(chat_name)
+        if chat is None:
+            self.logger.error(f"Error loading chat: no saved chat named {chat_name}")
+            raise KeyError(f"No saved chat named {chat_name}")
+        self.load_chat_by_id(chat["id"])
+
+    def load_chat_by_id(self, chat_id):
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                chat_data = json.load(f)
-            self.main_window.chat_window.load_chat_data(chat_data)
+            chat = self.chat_manager.get_chat(chat_id)
+            if chat is None:
+                raise KeyError(f"No saved chat with id {chat_id}")
+            chat_name = chat["name"]
+            session = self.session_for_chat(chat_id)
+            if session is not None:
+                # Already open in a tab
+                self.main_window.chat_tabs.setCurrentWidget(session.chat_window)
+                return
+            session = self.current_session()
+            if session.is_generating() or session.chat_window.chat_history:
+                session = self.open_session(chat_name)
+            else:
+                self.handle_new_chat(session)
+            for message in self.chat_manager.iter_chat(chat["id"]):
+                if message["content_type"] != 'text':
+                    continue
+                if message["sender"] == "You":
+                    session.conversation.add_user(message["content"])
+                elif message["sender"] == "Athena":
+                    session.conversation.add_assistant(message["content"])
+            self.main_window.set_chat_tab_title(session.chat_window, chat_name)
+            session.chat_window.set_chat(
+                Chat.load(chat["id"], chat_name, self.chat_manager, chat["message_count"],
+                          max_resident=self.settings.get("max_resident_messages", 2000)))
             self.logger.info(f"Chat loaded: {chat_name}")
         except Exception as e:
             self.logger.error(f"Error loading chat: {e}")
             raise
 
+    def session_for_chat(self, chat_id):
+        for session in self.sessions.values():
+            if session.chat_window.chat_history.id == chat_id:
+                return session
+        return None
+
     def list_saved_chats(self):
-        chat_dir = os.path.join(self.get_working_directory(), "chats")
-        os.makedirs(chat_dir, exist_ok=True)
-        return [f[:-5] for f in os.listdir(chat_dir) if f.endswith('.json')]
+        return [chat["name"] for chat in self.chat_manager.list_chats()]
 
     def delete_chat(self, chat_name):
-        file_path = os.path.join(self.get_working_directory(), "chats", f"{chat_name}.json")
         try:
-            os.remove(file_path)
+            chat = self.chat_manager.find_chat(chat_name)
+            if chat is None:
+                raise KeyError(f"No saved chat named {chat_name}")
+            self.chat_manager.delete_chat(chat["id"])
+            session = self.session_for_chat(chat["id"])
+            if session is not None:
+                history = session.chat_window.chat_history
+                history.attach(None, "", None)
+                history.persisted_count = 0
             self.logger.info(f"Chat deleted: {chat_name}")
         except Exception as e:
             self.logger.error(f"Error deleting chat: {e}")
@@ -194,9 +962,9 @@ class MainController:
         self.apply_settings(new_settings)
         self.main_window.show_status_message("Settings updated successfully")
 
-    def get_document_content(self, file_path):
+    def get_document_content(self, document_id):
         try:
-            return self.document_service.get_document_content(file_path)
+            return self.document_service.get_document_content(document_id)
         except Exception as e:
             self.logger.error(f"Error retrieving document content: {e}")
             return None
@@ -207,6 +975,20 @@ class MainController:
 
     def shutdown(self):
         self.logger.info("Shutting down the application")
+        self.backend_poll_timer.stop()
+        self.llm_service.remove_metrics_listener(self.record_metrics)
+        self.scheduler.on_change = None
+        self.stop_comparison()
+        for session in list(self.sessions.values()):
+            self.stop_generation(session)
+            self.cancel_document_processing(session, notify=False)
+            self.cancel_document_summary(session, notify=False)
+            self.cancel_export(session, notify=False)
+        self.scheduler.shutdown()
+        for worker in list(self.background_workers):
+            worker.wait(2000)
         # Perform any cleanup or saving operations here
         self.settings_manager.save_settings(self.settings)
-        # Close any open resources, connections, etc.        
+        self.llm_service.close()
+        self.chat_manager.close()
+        self.search_index.close()        
@@ -0,0 +1,33 @@
+# athena/controllers/session.py
+
+import itertools
+from athena.models.conversation import Conversation
+
+class ChatSession:
+    """State for one chat tab: its view, conversation and any work in flight."""
+
+    ids = itertools.count(1)
+
+    def __init__(self, chat_window):
+        self.id = next(ChatSession.ids)
+        self.chat_window = chat_window
+        self.conversation = Conversation()
+        self.current_document_id = None
+        self.pending_images = []
+        self.generation_worker = None
+        self.generation_job = None
+        self.document_worker = None
+        self.document_summary_worker = None
+        self.export_worker = None
+        self.model = None
+        # Background job folding older turns into the conversation summary
+        self.summary_worker = None
+        self.summary_job = None
+
+    def is_generating(self):
+        return self.generation_job is not None
+
+    def reset(self):
+        self.conversation = Conversation()
+        self.current_document_id = None
+        self.pending_images = []
@@ -0,0 +1,188 @@
+# athena/controllers/workers.py
+
+import logging
+import threading
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+from athena.services.llm_service import GenerationCancelled
+from athena.services.pdf_extractor import ExtractionCancelled
+from athena.services.chat_exporter import ExportCancelled
+
+class GenerationWorker(QObject):
+    chunk_received = pyqtSignal(str)
+    generation_finished = pyqtSignal(str)
+    generation_failed = pyqtSignal(str)
+    generation_cancelled = pyqtSignal(str)  # emits the partial response
+
+    def __init__(self, stream_factory, parent=None):
+        super().__init__(parent)
+        # run() is called on a GenerationScheduler thread, so prompt assembly
+        # (retrieval, embeddings) also stays off the GUI thread; stream_factory
+        # takes the job's cancel token and must return an iterator of text chunks
+        self.stream_factory = stream_factory
+        self.logger = logging.getLogger(__name__)
+
+    def run(self, cancel_token):
+        chunks = []
+        try:
+            for chunk in self.stream_factory(cancel_token):
+                chunks.append(chunk)
+                self.chunk_received.emit(chunk)
+            self.generation_finished.emit("".join(chunks))
+        except GenerationCancelled:
+            self.logger.info("Generation cancelled")
+            self.generation_cancelled.emit("".join(chunks))
+        except Exception as e:
+            self.logger.error(f"Error generating response: {e}")
+            self.generation_failed.emit(str(e))
+
+class CompareWorker(GenerationWorker):
+    # One model's answer in a comparison; also reports the metrics of its own request
+    metrics_recorded = pyqtSignal(object)
+
+    def __init__(self, stream_factory, llm_service, parent=None):
+        super().__init__(stream_factory, parent)
+        self.llm_service = llm_service
+        self.thread_id = None
+
+    def capture_metrics(self, metrics):
+        # Listeners are called on the requesting thread, so this skips other workers' requests
+        if threading.get_ident() == self.thread_id:
+            self.metrics_recorded.emit(metrics)
+
+    def run(self, cancel_token):
+        self.thread_id = threading.get_ident()
+        self.llm_service.add_metrics_listener(self.capture_metrics)
+        try:
+            super().run(cancel_token)
+        finally:
+            self.llm_service.remove_metrics_listener(self.capture_metrics)
+
+class ScheduledTaskWorker(QObject):
+    # Like TaskWorker, but run() is a GenerationJob callback executed on a scheduler thread
+    task_finished = pyqtSignal(object)
+    task_failed = pyqtSignal(str)
+    task_cancelled = pyqtSignal()
+
+    def __init__(self, task, parent=None):
+        super().__init__(parent)
+        self.task = task  # task(cancel_token) -> result
+        self.logger = logging.getLogger(__name__)
+
+    def run(self, cancel_token):
+        try:
+            self.task_finished.emit(self.task(cancel_token))
+        except GenerationCancelled:
+            self.task_cancelled.emit()
+        except Exception as e:
+            self.logger.error(f"Scheduled task failed: {e}")
+            self.task_failed.emit(str(e))
+
+class SchedulerSignals(QObject):
+    # Bridges GenerationScheduler.on_change, called from any thread, to the GUI thread
+    changed = pyqtSignal(int, int)  # running, queued
+
+class MetricsSignals(QObject):
+    # Bridges LLMService metrics listeners, called on request threads, to the GUI thread
+    metrics_recorded = pyqtSignal(object)
+
+class TaskWorker(QThread):
+    task_finished = pyqtSignal(object)
+    task_failed = pyqtSignal(str)
+
+    def __init__(self, task, *args, parent=None):
+        super().__init__(parent)
+        self.task = task
+        self.args = args
+        self.logger = logging.getLogger(__name__)
+
+    def run(self):
+        try:
+            self.task_finished.emit(self.task(*self.args))
+        except Exception as e:
+            self.logger.error(f"Background task failed: {e}")
+            self.task_failed.emit(str(e))
+
+class DocumentWorker(QThread):
+    progress = pyqtSignal(int, int)
+    document_loaded = pyqtSignal(object)
+    document_failed = pyqtSignal(str)
+    document_cancelled = pyqtSignal()
+
+    def __init__(self, document_service, file_path, parent=None):
+        super().__init__(parent)
+        self.document_service = document_service
+        self.file_path = file_path
+        self.cancel_event = threading.Event()
+        self.logger = logging.getLogger(__name__)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            document = self.document_service.load_document(
+                self.file_path, progress_callback=self.progress.emit, cancel_event=self.cancel_event)
+            if document["text"] and document["id"] not in self.document_service.indexes:
+                self.document_service.index_document(document["id"], document["text"])
+            self.document_loaded.emit(document)
+        except ExtractionCancelled:
+            self.logger.info(f"Extraction cancelled: {self.file_path}")
+            self.document_cancelled.emit()
+        except Exception as e:
+            self.logger.error(f"Error processing document: {e}")
+            self.document_failed.emit(str(e))
+
+class SummaryWorker(QThread):
+    progress = pyqtSignal(int, int)
+    summary_finished = pyqtSignal(str)
+    summary_failed = pyqtSignal(str)
+    summary_cancelled = pyqtSignal()
+
+    def __init__(self, summarizer, text, parent=None):
+        super().__init__(parent)
+        self.summarizer = summarizer
+        self.text = text
+        self.logger = logging.getLogger(__name__)
+
+    def cancel(self):
+        self.summarizer.cancel()
+
+    def run(self):
+        try:
+            self.summary_finished.emit(self.summarizer.summarize(self.text, progress_callback=self.progress.emit))
+        except GenerationCancelled:
+            self.logger.info("Document summary cancelled")
+            self.summary_cancelled.emit()
+        except Exception as e:
+            self.logger.error(f"Error summarizing document: {e}")
+            self.summary_failed.emit(str(e))
+
+class ExportWorker(QThread):
+    progress = pyqtSignal(int, int)
+    export_finished = pyqtSignal(int)  # number of messages written
+    export_failed = pyqtSignal(str)
+    export_cancelled = pyqtSignal()
+
+    def __init__(self, exporter, chats, output_path, title, parent=None):
+        super().__init__(parent)
+        self.exporter = exporter
+        self.chats = chats
+        self.output_path = output_path
+        self.title = title
+        self.cancel_event = threading.Event()
+        self.logger = logging.getLogger(__name__)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            count = self.exporter.export(self.chats, self.output_path, self.title,
+                                         progress_callback=self.progress.emit, cancel_event=self.cancel_event)
+            self.export_finished.emit(count)
+        except ExportCancelled:
+            self.logger.info(f"Export cancelled: {self.output_path}")
+            self.export_cancelled.emit()
+        except Exception as e:
+            self.logger.error(f"Error exporting chats: {e}")
+            self.export_failed.emit(str(e))
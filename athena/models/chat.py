@@ -1,15 +1,154 @@
-from typing import List, Dict
+import sys
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional
 
 class ChatMessage:
-    def __init__(self, content: str, sender: str):
+    """A single chat message.
+
+    Uses __slots__ and an epoch-float timestamp to keep long histories small;
+    sender and content_type come from a handful of values and are interned
+    so every message shares the same string objects.
+    """
+
+    __slots__ = ('content', 'sender', 'timestamp', 'content_type')
+
+    def __init__(self, content: str, sender: str, timestamp: Optional[float] = None, content_type: str = 'text'):
         self.content = content
-        self.sender = sender
+        self.sender = sys.intern(sender)
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.timestamp()
+        self.timestamp = time.time() if timestamp is None else float(timestamp)
+        self.content_type = sys.intern(content_type)  # 'text', 'image', or 'document'
+
+    @property
+    def created_at(self) -> datetime:
+        return datetime.fromtimestamp(self.timestamp)
+
+    def to_dict(self):
+        return {"content": self.content, "sender": self.sender,
+                "timestamp": self.timestamp, "content_type": self.content_type}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["content"], data["sender"], data.get("timestamp"), data.get("content_type", 'text'))
 
 class Chat:
-    def __init__(self, id: int, name: str):
+    """Ordered message history that keeps only the most recent messages in memory.
+
+    Once a store is attached, messages that have been persisted can be paged
+    out; indexing into the paged-out range reads them back from the store a
+    page at a time. The store must provide load_messages(chat_id, offset, limit).
+    """
+
+    def __init__(self, id: Optional[int] = None, name: str = "", store=None,
+                 max_resident: int = 2000, page_size: int = 200, cached_pages: int = 8):
         self.id = id
         self.name = name
+        self.store = store
+        self.max_resident = max_resident
+        self.page_size = page_size
+        self.cached_pages = cached_pages
         self.messages: List[ChatMessage] = []
+        self.paged_out = 0
+        self.persisted_count = 0
+        self.page_cache = OrderedDict()
+
+    @classmethod
+    def load(cls, id, name, store, message_count, **kwargs):
+        chat = cls(id, name, store, **kwargs)
+        resident = min(message_count, max(1, chat.max_resident // 2))
+        chat.paged_out = message_count - resident
+        chat.messages = [ChatMessage.from_dict(row) for row in store.load_messages(id, chat.paged_out, resident)]
+        chat.persisted_count = message_count
+        return chat
+
+    def attach(self, id, name, store):
+        self.id = id
+        self.name = name
+        self.store = store
 
     def add_message(self, message: ChatMessage):
-        self.messages.append(message)
\ No newline at end of file
+        self.append(message)
+
+    def append(self, message: ChatMessage):
+        self.messages.append(message)
+        if len(self.messages) > self.max_resident:
+            self.page_out()
+
+    def pop(self) -> ChatMessage:
+        # Only unsaved messages at the end can be removed
+        if len(self) <= self.persisted_count or not self.messages:
+            raise IndexError("cannot pop a persisted chat message")
+        return self.messages.pop()
+
+    def remove(self, message: ChatMessage):
+        # Removes an unsaved message by identity, wherever it is in the resident window
+        for index in range(len(self.messages) - 1, -1, -1):
+            if self.messages[index] is message:
+                if self.paged_out + index < self.persisted_count:
+                    raise ValueError("cannot remove a persisted chat message")
+                del self.messages[index]
+                return
+        raise ValueError("message is not in the chat")
+
+    def mark_persisted(self, count: int):
+        self.persisted_count = max(self.persisted_count, count)
+        if len(self.messages) > self.max_resident:
+            self.page_out()
+
+    def page_out(self):
+        # Drop the oldest half of the resident window, but only what the store already has
+        if self.store is None or self.id is None:
+            return 0
+        droppable = min(len(self.messages) - self.max_resident // 2,
+                        self.persisted_count - self.paged_out)
+        if droppable <= 0:
+            return 0
+        del self.messages[:droppable]
+        self.paged_out += droppable
+        return droppable
+
+    def load_page(self, page):
+        messages = self.page_cache.get(page)
+        if messages is None:
+            rows = self.store.load_messages(self.id, page * self.page_size, self.page_size)
+            messages = [ChatMessage.from_dict(row) for row in rows]
+            self.page_cache[page] = messages
+            if len(self.page_cache) > self.cached_pages:
+                self.page_cache.popitem(last=False)
+        else:
+            self.page_cache.move_to_end(page)
+        return messages
+
+    def __len__(self):
+        return self.paged_out + len(self.messages)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("chat message index out of range")
+        if index >= self.paged_out:
+            return self.messages[index - self.paged_out]
+        page, offset = divmod(index, self.page_size)
+        return self.load_page(page)[offset]
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def clear(self):
+        self.id = None
+        self.name = ""
+        self.store = None
+        self.messages.clear()
+        self.paged_out = 0
+        self.persisted_count = 0
+        self.page_cache.clear()
@@ -0,0 +1,60 @@
+# athena/models/conversation.py
+
+from typing import List, Dict, Optional
+
+class Conversation:
+    """Message history sent to /api/chat.
+
+    Earlier turns are never rewritten, so every request shares a byte-identical
+    prefix with the previous one and Ollama can reuse its prompt cache. The
+    exception is compaction: once the history grows too long, the oldest
+    `summarized` messages are replaced by a running summary, which changes the
+    prefix once per compaction rather than on every turn.
+    """
+
+    def __init__(self, system_prompt: Optional[str] = None):
+        self.system_prompt = system_prompt
+        self.messages: List[Dict] = []
+        self.summary: Optional[str] = None
+        self.summarized = 0
+
+    def add_user(self, content: str, images: Optional[List[str]] = None) -> Dict:
+        message = {"role": "user", "content": content}
+        if images:
+            message["images"] = list(images)
+        self.messages.append(message)
+        return message
+
+    def add_assistant(self, content: str) -> Dict:
+        message = {"role": "assistant", "content": content}
+        self.messages.append(message)
+        return message
+
+    def discard_last_user(self):
+        if self.messages and self.messages[-1]["role"] == "user":
+            self.messages.pop()
+
+    def history(self) -> List[Dict]:
+        """Messages not yet folded into the summary."""
+        return self.messages[self.summarized:]
+
+    def apply_summary(self, summary: str, summarized: int):
+        self.summary = summary
+        self.summarized = summarized
+
+    def to_messages(self) -> List[Dict]:
+        messages = []
+        if self.system_prompt:
+            messages.append({"role": "system", "content": self.system_prompt})
+        if self.summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"})
+        messages.extend(self.history())
+        return messages
+
+    def reset(self):
+        self.messages.clear()
+        self.summary = None
+        self.summarized = 0
+
+    def __len__(self):
+        return len(self.messages)
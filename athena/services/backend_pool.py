@@ -0,0 +1,166 @@
+# athena/services/backend_pool.py
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+class Backend:
+    def __init__(self, url):
+        self.url = url
+        self.healthy = True
+        self.models = {}  # name -> digest
+        self.loaded = set()
+        self.latency = None  # smoothed seconds
+        self.last_error = None
+        self.last_checked = None
+
+    def record_latency(self, seconds, weight=0.3):
+        self.latency = seconds if self.latency is None else (1 - weight) * self.latency + weight * seconds
+
+class BackendPool:
+    """Tracks several Ollama servers and picks one for each request.
+
+    refresh() polls /api/tags and /api/ps on every backend. A backend is
+    chosen among healthy ones that have the model, preferring one where the
+    model is already loaded and then the lowest recent latency. Backends
+    marked unhealthy after a failure are tried last and come back on the
+    next successful poll.
+    """
+
+    def __init__(self, urls, timeout=(5.0, 10.0)):
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.timeout = timeout
+        self.backends = {}
+        self.session = requests.Session()
+        self.owns_session = True
+        self.set_urls(urls)
+
+    def set_session(self, session):
+        # The LLM service shares its session so polls get the configured pool size and GET retries
+        old_session, self.session = self.session, session
+        if self.owns_session:
+            old_session.close()
+        self.owns_session = False
+
+    def set_urls(self, urls):
+        urls = [url.rstrip("/") for url in urls if url]
+        with self.lock:
+            self.backends = {url: self.backends.get(url) or Backend(url) for url in dict.fromkeys(urls)}
+
+    def urls(self):
+        with self.lock:
+            return list(self.backends)
+
+    def close(self):
+        if self.owns_session:
+            self.session.close()
+
+    def poll(self, backend):
+        started = time.perf_counter()
+        try:
+            response = self.session.get(f"{backend.url}/api/tags", timeout=self.timeout)
+            response.raise_for_status()
+            latency = time.perf_counter() - started
+            models = {model['name']: model.get('digest') for model in response.json().get('models', [])}
+            response = self.session.get(f"{backend.url}/api/ps", timeout=self.timeout)
+            response.raise_for_status()
+            loaded = {model['name'] for model in response.json().get('models', [])}
+        except (requests.RequestException, ValueError, KeyError) as e:
+            with self.lock:
+                if backend.healthy:
+                    self.logger.warning(f"Backend {backend.url} unavailable: {e}")
+                backend.healthy = False
+                backend.last_error = str(e)
+                backend.last_checked = time.time()
+            return
+        with self.lock:
+            if not backend.healthy:
+                self.logger.info(f"Backend {backend.url} is available again")
+            backend.healthy = True
+            backend.last_error = None
+            backend.models = models
+            backend.loaded = loaded
+            backend.record_latency(latency)
+            backend.last_checked = time.time()
+
+    def refresh(self):
+        backends = list(self.backends.values())
+        if len(backends) == 1:
+            self.poll(backends[0])
+        elif backends:
+            with ThreadPoolExecutor(max_workers=len(backends)) as executor:
+                list(executor.map(self.poll, backends))
+        return self.available_models()
+
+    def is_healthy(self):
+        with self.lock:
+            return any(backend.healthy for backend in self.backends.values())
+
+    def available_models(self):
+        with self.lock:
+            return sorted({name for backend in self.backends.values() if backend.healthy
+                           for name in backend.models})
+
+    def loaded_models(self):
+        with self.lock:
+            return sorted({name for backend in self.backends.values() if backend.healthy
+                           for name in backend.loaded})
+
+    def model_digests(self):
+        with self.lock:
+            digests = {}
+            for backend in self.backends.values():
+                for name, digest in backend.models.items():
+                    digests.setdefault(name, digest)
+            return digests
+
+    def candidates(self, model=None):
+        """Backend URLs to try for model, best first; every backend appears once."""
+        with self.lock:
+            def rank(backend):
+                has_model = model is None or model in backend.models or not backend.models
+                return (not backend.healthy,
+                        not has_model,
+                        model not in backend.loaded,
+                        backend.latency if backend.latency is not None else float("inf"))
+            return [backend.url for backend in sorted(self.backends.values(), key=rank)]
+
+    def show(self, model):
+        """Return /api/show for model from the first backend that answers.
+
+        Like the polls this is metadata only, so it leaves health, latency and
+        loaded models alone.
+        """
+        last_error = None
+        for url in self.candidates(model):
+            try:
+                response = self.session.post(f"{url}/api/show", json={"model": model}, timeout=self.timeout)
+                response.raise_for_status()
+                return response.json()
+            except (requests.RequestException, ValueError) as e:
+                last_error = e
+        raise last_error or requests.ConnectionError("No Ollama backend configured")
+
+    def select(self, model=None):
+        candidates = self.candidates(model)
+        return candidates[0] if candidates else None
+
+    def record_loaded(self, url, model):
+        # Health and latency only come from polls; a completed generation proves the model is loaded
+        with self.lock:
+            backend = self.backends.get(url)
+            if backend is not None and model is not None:
+                backend.loaded.add(model)
+
+    def record_failure(self, url, error):
+        with self.lock:
+            backend = self.backends.get(url)
+            if backend is None:
+                return
+            if backend.healthy:
+                self.logger.warning(f"Backend {url} failed, failing over: {error}")
+            backend.healthy = False
+            backend.last_error = str(error)
@@ -0,0 +1,212 @@
+# athena/services/chat_exporter.py
+
+import base64
+import html
+import json
+import logging
+import mimetypes
+import os
+from datetime import datetime
+
+EXPORT_FORMATS = {
+    ".md": "markdown",
+    ".markdown": "markdown",
+    ".jsonl": "jsonl",
+    ".html": "html",
+    ".htm": "html",
+    ".txt": "text",
+}
+
+HTML_STYLE = """
+body { font-family: sans-serif; max-width: 900px; margin: 2em auto; padding: 0 1em; color: #222; }
+h1 { font-size: 1.6em; } h2 { font-size: 1.3em; border-bottom: 1px solid #ddd; padding-bottom: .2em; margin-top: 2em; }
+.message { margin: .8em 0; }
+.meta { font-size: .85em; color: #666; }
+.sender { font-weight: bold; color: green; }
+.sender-You { color: blue; } .sender-System { color: red; }
+.content { white-space: pre-wrap; }
+img { max-width: 100%; }
+"""
+
+class ExportCancelled(Exception):
+    pass
+
+def export_format(file_path):
+    """Return the export format for a file name, or None if the extension isn't supported."""
+    return EXPORT_FORMATS.get(os.path.splitext(file_path)[1].lower())
+
+def format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+def image_data_uri(path):
+    mime_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    with open(path, 'rb') as f:
+        return f"data:{mime_type};base64,{base64.b64encode(f.read()).decode('ascii')}"
+
+class ExportWriter:
+    def __init__(self, f):
+        self.f = f
+
+    def begin(self, title):
+        pass
+
+    def begin_chat(self, chat, bulk):
+        pass
+
+    def write_message(self, message, image_uri):
+        raise NotImplementedError
+
+    def end_chat(self):
+        pass
+
+    def end(self):
+        pass
+
+class MarkdownWriter(ExportWriter):
+    def begin(self, title):
+        self.f.write(f"# {title}\n\n")
+
+    def begin_chat(self, chat, bulk):
+        if bulk:
+            self.f.write(f"## {chat['name']}\n\n")
+
+    def write_message(self, message, image_uri):
+        self.f.write(f"**{message['sender']}** · {format_time(message['timestamp'])}\n\n")
+        if message["content_type"] == 'image':
+            name = os.path.basename(message["content"])
+            self.f.write(f"![{name}]({image_uri})\n\n" if image_uri else f"[Image missing: {name}]\n\n")
+        elif message["content_type"] == 'document':
+            self.f.write(f"[Document: {message['content']}]\n\n")
+        else:
+            self.f.write(f"{message['content']}\n\n")
+
+    def end_chat(self):
+        self.f.write("---\n\n")
+
+class TextWriter(ExportWriter):
+    # The plain format the chat window has always exported
+    def begin_chat(self, chat, bulk):
+        if bulk:
+            self.f.write(f"=== {chat['name']} ===\n\n")
+
+    def write_message(self, message, image_uri):
+        self.f.write(f"--- {message['sender']} ({format_time(message['timestamp'])}) ---\n")
+        self.f.write(f"{message['content']}\n\n")
+
+class JsonlWriter(ExportWriter):
+    # One object per message, tagged with its chat so a bulk export can be split again
+    def begin_chat(self, chat, bulk):
+        self.chat = chat
+
+    def write_message(self, message, image_uri):
+        record = {"chat_id": self.chat.get("id"), "chat": self.chat["name"], "seq": message.get("seq"),
+                  "sender": message["sender"], "content_type": message["content_type"],
+                  "content": message["content"], "timestamp": message["timestamp"]}
+        if image_uri and image_uri.startswith("data:"):
+            record["image"] = image_uri
+        self.f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+class HtmlWriter(ExportWriter):
+    def begin(self, title):
+        self.f.write(f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title>"
+                     f"<style>{HTML_STYLE}</style></head><body>\n<h1>{html.escape(title)}</h1>\n")
+
+    def begin_chat(self, chat, bulk):
+        if bulk:
+            self.f.write(f"<h2>{html.escape(chat['name'])}</h2>\n")
+
+    def write_message(self, message, image_uri):
+        sender = html.escape(message["sender"])
+        self.f.write(f'<div class="message"><div class="meta"><span class="sender sender-{sender}">{sender}</span> '
+                     f'{format_time(message["timestamp"])}</div>')
+        if message["content_type"] == 'image':
+            name = html.escape(os.path.basename(message["content"]))
+            if image_uri:
+                self.f.write(f'<img src="{html.escape(image_uri)}" alt="{name}">')
+            else:
+                self.f.write(f'<div class="content">[Image missing: {name}]</div>')
+        elif message["content_type"] == 'document':
+            self.f.write(f'<div class="content">[Document: {html.escape(message["content"])}]</div>')
+        else:
+            self.f.write(f'<div class="content">{html.escape(message["content"])}</div>')
+        self.f.write("</div>\n")
+
+    def end(self):
+        self.f.write("</body></html>\n")
+
+WRITERS = {"markdown": MarkdownWriter, "text": TextWriter, "jsonl": JsonlWriter, "html": HtmlWriter}
+
+class ChatExporter:
+    """Streams chats from the chat store into one Markdown, JSONL, HTML or text file.
+
+    Messages are read a page at a time and written as they are read, so a
+    bulk export of the whole workspace never holds more than one page in
+    memory. Each chat is a dict with "name" and optionally "id" and
+    "message_count" (how many stored messages to read, fixed when the export
+    is requested so messages saved meanwhile are not written twice) and
+    "messages" (unsaved message dicts written after them). The file is written under a
+    temporary name and only replaces output_path once complete.
+    """
+
+    def __init__(self, chat_manager, embed_images=True, page_size=500, progress_interval=200):
+        self.chat_manager = chat_manager
+        self.embed_images = embed_images
+        self.page_size = page_size
+        self.progress_interval = progress_interval
+        self.logger = logging.getLogger(__name__)
+
+    def iter_messages(self, chat):
+        if chat.get("id") is not None:
+            yield from self.chat_manager.iter_chat(chat["id"], self.page_size, chat.get("message_count"))
+        yield from chat.get("messages", ())
+
+    def image_uri(self, path):
+        if not os.path.exists(path):
+            return None
+        if not self.embed_images:
+            return "file:///" + path.lstrip("/")
+        try:
+            return image_data_uri(path)
+        except OSError as e:
+            self.logger.warning(f"Could not embed image {path}: {e}")
+            return None
+
+    def export(self, chats, output_path, title="Athena chat export", progress_callback=None, cancel_event=None):
+        """Write chats to output_path in the format its extension names; returns the number of messages."""
+        format_name = export_format(output_path)
+        if format_name is None:
+            raise ValueError(f"Unsupported export format: {os.path.splitext(output_path)[1] or output_path}")
+        total = sum(chat.get("message_count", 0) + len(chat.get("messages", ())) for chat in chats)
+        bulk = len(chats) > 1
+        temp_path = output_path + ".tmp"
+        count = 0
+        try:
+            with open(temp_path, 'w', encoding='utf-8', newline='\n') as f:
+                writer = WRITERS[format_name](f)
+                writer.begin(title)
+                for chat in chats:
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise ExportCancelled()
+                    writer.begin_chat(chat, bulk)
+                    for message in self.iter_messages(chat):
+                        image_uri = self.image_uri(message["content"]) if message["content_type"] == 'image' else None
+                        writer.write_message(message, image_uri)
+                        count += 1
+                        if count % self.progress_interval == 0:
+                            if cancel_event is not None and cancel_event.is_set():
+                                raise ExportCancelled()
+                            if progress_callback:
+                                progress_callback(count, max(total, count))
+                    writer.end_chat()
+                writer.end()
+            os.replace(temp_path, output_path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        if progress_callback:
+            progress_callback(count, count)
+        self.logger.info(f"Exported {count} messages from {len(chats)} chats to {output_path}")
+        return count
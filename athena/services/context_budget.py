@@ -0,0 +1,118 @@
+# athena/services/context_budget.py
+
+from athena.utils.tokens import estimate_tokens
+
+# Ollama's num_ctx when neither the request nor the Modelfile sets one
+DEFAULT_SERVER_CONTEXT = 2048
+# Role markers and separators the chat template adds around each message
+MESSAGE_OVERHEAD_TOKENS = 4
+# Rough prompt cost of one image for LLaVA-style vision models
+IMAGE_TOKENS = 576
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You maintain a running summary of a conversation between a user and an AI assistant. "
+    "Update the summary with the new messages. Keep names, numbers, decisions, open questions "
+    "and anything the user asked to remember; drop pleasantries and repetition. "
+    "Write plain prose in the third person and reply with the summary only.")
+
+def parse_model_context(show_response):
+    """Return (trained context length, Modelfile num_ctx) from an /api/show response; either may be None."""
+    context_length = None
+    for key, value in (show_response.get("model_info") or {}).items():
+        if key.endswith(".context_length"):
+            context_length = int(value)
+            break
+    num_ctx = None
+    for line in (show_response.get("parameters") or "").splitlines():
+        parts = line.split()
+        if len(parts) == 2 and parts[0] == "num_ctx":
+            num_ctx = int(parts[1])
+    return context_length, num_ctx
+
+def message_tokens(message):
+    return (MESSAGE_OVERHEAD_TOKENS + estimate_tokens(message.get("content", ""))
+            + IMAGE_TOKENS * len(message.get("images", ())))
+
+def messages_tokens(messages):
+    return sum(message_tokens(message) for message in messages)
+
+class ContextBudget:
+    """Token budget for one model: its context window minus room for the reply.
+
+    The window is the num_ctx sent with requests (requested_window), capped
+    at what the model was trained with; when no num_ctx is sent, it is the
+    Modelfile's num_ctx or Ollama's default.
+    """
+
+    def __init__(self, requested_window, context_length=None, model_num_ctx=None, reply_tokens=2000,
+                 summarize_at=0.75, keep_after_summary=0.5):
+        if requested_window:
+            window = min(requested_window, context_length) if context_length else requested_window
+        else:
+            window = model_num_ctx or min(context_length or DEFAULT_SERVER_CONTEXT, DEFAULT_SERVER_CONTEXT)
+        self.context_window = window
+        # Never let the reply reservation eat more than a quarter of a small window
+        self.reply_tokens = min(reply_tokens, window // 4)
+        self.prompt_tokens = window - self.reply_tokens
+        self.summarize_at = summarize_at
+        self.keep_after_summary = keep_after_summary
+
+    def fit(self, messages):
+        """Return (messages, dropped): the oldest turns are left out until the prompt fits.
+
+        Leading system messages (the system prompt and the running summary) and
+        the newest message are always kept. Only used while a summary is still
+        being written; normally the summary keeps the history under budget.
+        """
+        head = 0
+        while head < len(messages) - 1 and messages[head]["role"] == "system":
+            head += 1
+        system, history = messages[:head], messages[head:]
+        used = messages_tokens(messages)
+        dropped = 0
+        while used > self.prompt_tokens and dropped < len(history) - 1:
+            used -= message_tokens(history[dropped])
+            dropped += 1
+            # Don't start the remaining history with an orphaned reply
+            while dropped < len(history) - 1 and history[dropped]["role"] != "user":
+                used -= message_tokens(history[dropped])
+                dropped += 1
+        return system + history[dropped:], dropped
+
+    def summary_cutoff(self, history, summary_tokens=0):
+        """How many of the oldest history messages to fold into the summary, or 0 if none yet.
+
+        Compaction starts once the history passes summarize_at of the prompt
+        budget and folds whole turns until what is left is under
+        keep_after_summary of it. The newest turn is never folded, and the
+        folded messages plus the old summary must fit in one summary request.
+        """
+        total = messages_tokens(history)
+        if total + summary_tokens <= self.prompt_tokens * self.summarize_at:
+            return 0
+        target = total - self.prompt_tokens * self.keep_after_summary
+        room = self.prompt_tokens - summary_tokens - estimate_tokens(SUMMARY_SYSTEM_PROMPT)
+        folded = folded_tokens = cutoff = 0
+        for index, message in enumerate(history[:-2]):
+            tokens = message_tokens(message)
+            if folded_tokens + tokens > room:
+                break
+            folded_tokens += tokens
+            folded = index + 1
+            # Only cut in front of a user message so kept turns stay whole
+            if history[index + 1]["role"] == "user":
+                cutoff = folded
+                if folded_tokens >= target:
+                    break
+        return cutoff
+
+def build_summary_request(previous_summary, messages):
+    lines = []
+    if previous_summary:
+        lines.append(f"Summary so far:\n{previous_summary}\n")
+    lines.append("New messages:")
+    for message in messages:
+        speaker = "User" if message["role"] == "user" else "Assistant"
+        lines.append(f"{speaker}: {message['content']}")
+    return [{"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": "\n".join(lines)}]
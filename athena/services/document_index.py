@@ -0,0 +1,64 @@
+# athena/services/document_index.py
+
+import math
+import re
+from collections import Counter, defaultdict
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have in is it its of on or that the this
+to was were will with what which who how why when where do does did can i you we
+""".split())
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+def chunk_text(text, chunk_size=200, overlap=40):
+    """Split text into chunks of roughly chunk_size words, each overlapping the previous one."""
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    overlap = max(0, min(overlap, chunk_size - 1))
+    words = text.split()
+    if not words:
+        return []
+    step = chunk_size - overlap
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start:start + chunk_size]))
+        if start + chunk_size >= len(words):
+            break
+    return chunks
+
+class BM25Index:
+    def __init__(self, chunks, k1=1.5, b=0.75):
+        self.chunks = list(chunks)
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)
+        self.chunk_lengths = []
+        for chunk_id, chunk in enumerate(self.chunks):
+            terms = Counter(tokenize(chunk))
+            self.chunk_lengths.append(sum(terms.values()))
+            for term, frequency in terms.items():
+                self.postings[term].append((chunk_id, frequency))
+        total = sum(self.chunk_lengths)
+        self.average_length = total / len(self.chunk_lengths) if self.chunk_lengths else 0.0
+
+    def idf(self, term):
+        document_frequency = len(self.postings.get(term, ()))
+        count = len(self.chunks)
+        return math.log(1 + (count - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def search(self, query, top_k=5):
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for chunk_id, frequency in postings:
+                length_norm = 1 - self.b + self.b * self.chunk_lengths[chunk_id] / (self.average_length or 1)
+                scores[chunk_id] += idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:top_k]
@@ -1,45 +1,206 @@
 # athena/services/document_service.py
 
+import logging
 import os
-import shutil
-from PyPDF2 import PdfReader
-from docx import Document
+import re
+import threading
+from athena.services.document_index import BM25Index, chunk_text
+from athena.services.document_store import DocumentStore, file_digest, content_hash
+from athena.services.pdf_extractor import iter_pdf_pages, ExtractionCancelled
+from athena.utils.tokens import estimate_tokens
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx')
 
 class DocumentService:
-    def __init__(self, working_directory):
+    def __init__(self, working_directory, chunk_size=200, chunk_overlap=40, cache_max_bytes=1024 * 1024 * 1024,
+                 pdf_workers=None, pdf_pages_per_task=8, search_index=None):
         self.working_directory = working_directory
+        self.search_index = search_index
+        self.pdf_workers = pdf_workers
+        self.pdf_pages_per_task = pdf_pages_per_task
+        self.cache_max_bytes = cache_max_bytes
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.indexes = {}
+        self.vector_stores = {}
+        self.vector_stores_lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
         self.documents_folder = os.path.join(self.working_directory, "documents")
         os.makedirs(self.documents_folder, exist_ok=True)
+        self.store = DocumentStore(os.path.join(self.documents_folder, "store"), cache_max_bytes)
 
     def process_document(self, file_path):
-        try:
-            # Copy the file to the documents folder
-            new_file_path = os.path.join(self.documents_folder, os.path.basename(file_path))
-            shutil.copy2(file_path, new_file_path)
+        return self.load_document(file_path)["text"]
 
+    def load_document(self, file_path, progress_callback=None, cancel_event=None):
+        """Return the stored entry for file_path, extracting and caching it on first upload."""
+        try:
             file_extension = os.path.splitext(file_path)[1].lower()
-            if file_extension == '.pdf':
-                return self.process_pdf(new_file_path)
-            elif file_extension == '.docx':
-                return self.process_docx(new_file_path)
-            else:
+            if file_extension not in SUPPORTED_EXTENSIONS:
                 raise ValueError(f"Unsupported file type: {file_extension}")
+
+            digest = file_digest(file_path)
+            cached = self.store.get(digest)
+            if cached is not None:
+                self.logger.info(f"Using cached extraction for {os.path.basename(file_path)} ({digest[:12]})")
+                if self.search_index is not None and not self.search_index.has_document(digest):
+                    self.index_for_search(digest, cached["file_name"], cached["text"])
+                return dict(cached, id=digest, cached=True)
+
+            text = self.extract_text(file_path, progress_callback, cancel_event)
+            meta = self.store.put(digest, file_path, text)
+            self.index_for_search(digest, meta["file_name"], text)
+            return dict(meta, text=text, id=digest, cached=False)
+        except ExtractionCancelled:
+            raise
         except Exception as e:
             raise Exception(f"Error processing document: {str(e)}")
 
-    def process_pdf(self, file_path):
-        with open(file_path, 'rb') as file:
-            reader = PdfReader(file)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-            return text
+    def set_search_index(self, search_index):
+        self.search_index = search_index
+
+    def index_for_search(self, document_id, file_name, text):
+        if self.search_index is None:
+            return
+        # Index passages rather than the whole text so hits come with a useful snippet
+        self.search_index.add_document(document_id, file_name, chunk_text(text, 120, 0))
+
+    def extract_text(self, file_path, progress_callback=None, cancel_event=None):
+        file_extension = os.path.splitext(file_path)[1].lower()
+        if file_extension == '.pdf':
+            return self.process_pdf(file_path, progress_callback, cancel_event)
+        elif file_extension == '.docx':
+            return self.process_docx(file_path)
+        raise ValueError(f"Unsupported file type: {file_extension}")
+
+    def get_document_content(self, document_id):
+        entry = self.store.get(document_id)
+        return entry["text"] if entry else None
+
+    def set_cache_limit(self, max_bytes):
+        if max_bytes != self.cache_max_bytes:
+            self.cache_max_bytes = max_bytes
+            self.store.set_max_bytes(max_bytes)
+
+    def iter_pdf_pages(self, file_path, cancel_event=None):
+        return iter_pdf_pages(file_path, self.pdf_workers, self.pdf_pages_per_task, cancel_event)
+
+    def process_pdf(self, file_path, progress_callback=None, cancel_event=None):
+        pages = []
+        for page_index, text, page_count in self.iter_pdf_pages(file_path, cancel_event):
+            pages.append(text + "\n")
+            if progress_callback:
+                progress_callback(page_index + 1, page_count)
+        return "".join(pages)
+
+    def set_pdf_extraction(self, workers, pages_per_task):
+        self.pdf_workers = workers or None
+        self.pdf_pages_per_task = pages_per_task
 
     def process_docx(self, file_path):
+        from docx import Document
         doc = Document(file_path)
         return "\n".join([paragraph.text for paragraph in doc.paragraphs])
 
+    def set_chunking(self, chunk_size, chunk_overlap):
+        if (chunk_size, chunk_overlap) != (self.chunk_size, self.chunk_overlap):
+            self.chunk_size = chunk_size
+            self.chunk_overlap = chunk_overlap
+            self.indexes.clear()
+
+    def index_document(self, document_id, text):
+        index = BM25Index(chunk_text(text, self.chunk_size, self.chunk_overlap))
+        self.indexes[document_id] = index
+        return index
+
+    def get_relevant_context(self, document_id, query, top_k=5, token_budget=2000):
+        index = self.indexes.get(document_id)
+        if index is None or not index.chunks:
+            return ""
+        selected = []
+        used_tokens = 0
+        for chunk_id, _ in index.search(query, top_k):
+            tokens = estimate_tokens(index.chunks[chunk_id])
+            if used_tokens + tokens > token_budget:
+                continue
+            selected.append(chunk_id)
+            used_tokens += tokens
+        if not selected:
+            # Nothing matched the query; fall back to the opening of the document
+            for chunk_id, chunk in enumerate(index.chunks):
+                tokens = estimate_tokens(chunk)
+                if used_tokens + tokens > token_budget:
+                    break
+                selected.append(chunk_id)
+                used_tokens += tokens
+        return "\n...\n".join(index.chunks[chunk_id] for chunk_id in sorted(selected))
+
+    def get_vector_store(self, embedding_model):
+        # Embedding and retrieval workers may ask for the same store at once; only one may open it
+        with self.vector_stores_lock:
+            store = self.vector_stores.get(embedding_model)
+            if store is None:
+                # numpy is only loaded once semantic retrieval is actually used
+                from athena.services.vector_store import VectorStore
+                folder_name = re.sub(r"[^A-Za-z0-9_.-]", "_", embedding_model)
+                store = VectorStore(os.path.join(self.documents_folder, "vectors", folder_name))
+                self.vector_stores[embedding_model] = store
+            return store
+
+    def embed_document(self, document_id, embed_fn, embedding_model, batch_size=32):
+        """Embed any chunks of the document not already in the store; returns the number embedded."""
+        index = self.indexes.get(document_id)
+        if index is None:
+            return 0
+        store = self.get_vector_store(embedding_model)
+        pending = {}
+        for chunk in index.chunks:
+            key = content_hash(chunk)
+            if key not in store and key not in pending:
+                pending[key] = chunk
+        keys = list(pending)
+        for start in range(0, len(keys), batch_size):
+            batch = keys[start:start + batch_size]
+            store.add(batch, embed_fn([pending[key] for key in batch]))
+        self.logger.info(f"Embedded {len(keys)} new chunks for {document_id} "
+                         f"({len(index.chunks) - len(keys)} reused)")
+        return len(keys)
+
+    def is_embedded(self, document_id, embedding_model):
+        index = self.indexes.get(document_id)
+        if index is None:
+            return False
+        store = self.get_vector_store(embedding_model)
+        return all(content_hash(chunk) in store for chunk in index.chunks)
+
+    def get_semantic_context(self, document_id, query_vector, embedding_model, top_k=5, token_budget=2000):
+        index = self.indexes.get(document_id)
+        if index is None or not index.chunks:
+            return ""
+        chunk_ids = {}
+        for chunk_id, chunk in enumerate(index.chunks):
+            chunk_ids.setdefault(content_hash(chunk), chunk_id)
+        store = self.get_vector_store(embedding_model)
+        selected = []
+        used_tokens = 0
+        for key, _ in store.search(query_vector, keys=list(chunk_ids), top_k=top_k):
+            chunk_id = chunk_ids[key]
+            tokens = estimate_tokens(index.chunks[chunk_id])
+            if used_tokens + tokens > token_budget:
+                continue
+            selected.append(chunk_id)
+            used_tokens += tokens
+        return "\n...\n".join(index.chunks[chunk_id] for chunk_id in sorted(selected))
+
     def set_working_directory(self, new_directory):
+        if new_directory == self.working_directory:
+            return
         self.working_directory = new_directory
         self.documents_folder = os.path.join(self.working_directory, "documents")
-        os.makedirs(self.documents_folder, exist_ok=True)
\ No newline at end of file
+        os.makedirs(self.documents_folder, exist_ok=True)
+        self.store = DocumentStore(os.path.join(self.documents_folder, "store"), self.cache_max_bytes)
+        self.indexes.clear()
+        with self.vector_stores_lock:
+            for store in self.vector_stores.values():
+                store.close()
+            self.vector_stores.clear()
\ No newline at end of file
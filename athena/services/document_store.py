@@ -0,0 +1,145 @@
+# athena/services/document_store.py
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+def content_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def file_digest(file_path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class DocumentStore:
+    """Content-addressed store of uploaded originals and their extracted text.
+
+    Each entry lives in <root>/<sha256>/ as original<ext>, text.txt and meta.json.
+    Entries are evicted least-recently-used first once the store exceeds max_bytes.
+    """
+
+    def __init__(self, root, max_bytes=1024 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def entry_path(self, digest):
+        return os.path.join(self.root, digest)
+
+    def read_meta(self, digest):
+        try:
+            with open(os.path.join(self.entry_path(digest), "meta.json"), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def write_meta(self, directory, meta):
+        temp_path = os.path.join(directory, "meta.json.tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(temp_path, os.path.join(directory, "meta.json"))
+
+    def get(self, digest):
+        with self.lock:
+            meta = self.read_meta(digest)
+            if meta is None:
+                return None
+            try:
+                with open(os.path.join(self.entry_path(digest), "text.txt"), 'r', encoding='utf-8') as f:
+                    text = f.read()
+            except OSError:
+                return None
+            meta["last_access"] = time.time()
+            self.write_meta(self.entry_path(digest), meta)
+            return dict(meta, text=text)
+
+    def get_original_path(self, digest):
+        meta = self.read_meta(digest)
+        if meta is None:
+            return None
+        return os.path.join(self.entry_path(digest), "original" + meta["extension"])
+
+    def put(self, digest, source_path, text, metadata=None):
+        extension = os.path.splitext(source_path)[1].lower()
+        now = time.time()
+        meta = {
+            "digest": digest,
+            "file_name": os.path.basename(source_path),
+            "extension": extension,
+            "size": os.path.getsize(source_path),
+            "text_length": len(text),
+            "created_at": now,
+            "last_access": now,
+        }
+        meta.update(metadata or {})
+        with self.lock:
+            staging = tempfile.mkdtemp(prefix=".staging-", dir=self.root)
+            try:
+                shutil.copy2(source_path, os.path.join(staging, "original" + extension))
+                with open(os.path.join(staging, "text.txt"), 'w', encoding='utf-8') as f:
+                    f.write(text)
+                self.write_meta(staging, meta)
+                target = self.entry_path(digest)
+                if os.path.exists(target):
+                    shutil.rmtree(target)
+                os.replace(staging, target)
+            except Exception:
+                shutil.rmtree(staging, ignore_errors=True)
+                raise
+            self.evict(keep=digest)
+        return meta
+
+    def entry_size(self, digest):
+        total = 0
+        for entry in os.scandir(self.entry_path(digest)):
+            if entry.is_file():
+                total += entry.stat().st_size
+        return total
+
+    def list_entries(self):
+        entries = []
+        for entry in os.scandir(self.root):
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            meta = self.read_meta(entry.name)
+            if meta is not None:
+                entries.append(meta)
+        return entries
+
+    def total_size(self):
+        return sum(self.entry_size(meta["digest"]) for meta in self.list_entries())
+
+    def evict(self, keep=None):
+        if not self.max_bytes:
+            return []
+        entries = sorted(self.list_entries(), key=lambda meta: meta.get("last_access", 0))
+        sizes = {meta["digest"]: self.entry_size(meta["digest"]) for meta in entries}
+        total = sum(sizes.values())
+        evicted = []
+        for meta in entries:
+            if total <= self.max_bytes:
+                break
+            digest = meta["digest"]
+            if digest == keep:
+                continue
+            shutil.rmtree(self.entry_path(digest), ignore_errors=True)
+            total -= sizes[digest]
+            evicted.append(digest)
+        if evicted:
+            self.logger.info(f"Evicted {len(evicted)} cached documents to stay under {self.max_bytes} bytes")
+        return evicted
+
+    def set_max_bytes(self, max_bytes):
+        self.max_bytes = max_bytes
+        with self.lock:
+            self.evict()
@@ -0,0 +1,233 @@
+# athena/services/document_summarizer.py
+
+import logging
+import re
+import threading
+from concurrent.futures import CancelledError, Future, as_completed
+from athena.services.context_budget import ContextBudget, MESSAGE_OVERHEAD_TOKENS
+from athena.services.generation_scheduler import GenerationJob
+from athena.services.llm_service import GenerationCancelled
+from athena.utils.tokens import CHARS_PER_TOKEN, estimate_tokens
+
+# Bump when the prompts change so cached summaries written with the old ones are not reused
+PROMPT_VERSION = 1
+
+SECTION_PROMPT = (
+    "You summarize one section of a longer document. Keep the key facts, figures, names, "
+    "definitions and conclusions, in the order they appear. Do not mention that this is a section "
+    "and reply with the summary only.")
+
+MERGE_PROMPT = (
+    "You are given summaries of consecutive sections of one document, in order. Combine them into "
+    "a single coherent summary that keeps the key facts, figures, names and conclusions, removes "
+    "repetition and follows the structure of the document. Reply with the summary only.")
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+def split_long_text(text, max_tokens):
+    # Fall back to sentences, then to whitespace, for paragraphs that don't fit on their own
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    pieces = []
+    for sentence in SENTENCE_END.split(text):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if sentence:
+            pieces.append(sentence)
+    return pieces
+
+def pack(pieces, max_tokens, separator):
+    """Greedily join consecutive pieces into groups of at most max_tokens."""
+    groups = []
+    current = []
+    used = 0
+    for piece in pieces:
+        tokens = estimate_tokens(piece)
+        if current and used + tokens > max_tokens:
+            groups.append(separator.join(current))
+            current, used = [], 0
+        current.append(piece)
+        used += tokens
+    if current:
+        groups.append(separator.join(current))
+    return groups
+
+def split_sections(text, max_tokens):
+    """Split text into sections of about max_tokens, breaking between paragraphs where possible."""
+    pieces = []
+    for paragraph in PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) > max_tokens:
+            pieces.extend(split_long_text(paragraph, max_tokens))
+        else:
+            pieces.append(paragraph)
+    return pack(pieces, max_tokens, "\n\n")
+
+class DocumentSummarizer:
+    """Map-reduce summary of a document too large for one prompt.
+
+    The text is split into sections that are summarized concurrently (map),
+    then consecutive summaries are merged in groups that fit one prompt until
+    a single summary is left (reduce). Each request is a GenerationScheduler
+    job under session_id, so it shares the per-backend cap and the queue with
+    the chats. Every summary is cached under a hash of its input text, so a
+    re-run only redoes the sections that changed and the merges above them.
+    One instance summarizes one document; cancel() may be called from any
+    thread.
+    """
+
+    def __init__(self, llm_service, model, scheduler, session_id, cache=None, section_tokens=3000,
+                 summary_tokens=400, context_window=4096):
+        self.llm_service = llm_service
+        self.model = model
+        self.scheduler = scheduler
+        self.session_id = session_id
+        self.cache = cache
+        self.section_tokens = section_tokens
+        self.summary_tokens = summary_tokens
+        self.context_window = context_window
+        self.options = {"temperature": 0, "num_predict": summary_tokens}
+        self.cancel_event = threading.Event()
+        self.jobs = {}  # job -> future of its summary
+        self.lock = threading.Lock()
+        self.cache_hits = 0
+        self.logger = logging.getLogger(__name__)
+
+    def fit_to_model(self):
+        # Sections and merges must fit the model's window next to the prompt and the summary
+        try:
+            context_length, model_num_ctx = self.llm_service.get_model_context(self.model)
+        except Exception as e:
+            self.logger.warning(f"Could not read the context length of {self.model}: {e}")
+            context_length = model_num_ctx = None
+        budget = ContextBudget(self.context_window, context_length, model_num_ctx, reply_tokens=self.summary_tokens)
+        room = budget.prompt_tokens - estimate_tokens(MERGE_PROMPT) - 2 * MESSAGE_OVERHEAD_TOKENS
+        self.summary_tokens = min(self.summary_tokens, budget.reply_tokens, room // 3)
+        # A merge must combine at least two summaries or the reduce would never finish
+        self.section_tokens = max(min(self.section_tokens, room), 2 * self.summary_tokens)
+        self.options = {"temperature": 0, "num_predict": self.summary_tokens}
+
+    def cancel(self):
+        self.cancel_event.set()
+        with self.lock:
+            jobs = list(self.jobs.items())
+        for job, future in jobs:
+            self.cancel_job(job, future)
+
+    def cancel_job(self, job, future):
+        if not self.scheduler.cancel(job) and job.state == "cancelled":
+            # Never started, so nothing else will complete its future
+            future.cancel()
+
+    def cache_key(self, prompt, text):
+        digest = self.llm_service.get_model_digest(self.model)
+        request = {"summarize": prompt, "version": PROMPT_VERSION, "text": text}
+        return self.cache.make_key(self.model, digest, request, self.options)
+
+    def summarize_text(self, prompt, text, key, cancel_token):
+        messages = [{"role": "system", "content": prompt}, {"role": "user", "content": text}]
+        summary = "".join(self.llm_service.chat_stream(messages, self.model, cancel_token, self.options)).strip()
+        if key is not None:
+            self.cache.put(key, summary)
+        return summary
+
+    def submit(self, prompt, text, key):
+        future = Future()
+
+        def run(cancel_token):
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(self.summarize_text(prompt, text, key, cancel_token))
+            except BaseException as e:
+                future.set_exception(e)
+
+        job = GenerationJob(self.session_id, self.llm_service.route(self.model), run)
+        with self.lock:
+            self.jobs[job] = future
+        self.scheduler.submit(job)
+        if self.cancel_event.is_set():
+            # cancel() may have run before the job was added
+            self.cancel_job(job, future)
+        return future
+
+    def run_stage(self, prompt, texts, report):
+        results = [None] * len(texts)
+        futures = {}
+        try:
+            for index, text in enumerate(texts):
+                if self.cancel_event.is_set():
+                    raise GenerationCancelled()
+                # Cache hits are answered here instead of taking a slot in the scheduler
+                key = None
+                if self.cache is not None:
+                    key = self.cache_key(prompt, text)
+                    cached = self.cache.get(key)
+                    if cached is not None:
+                        self.cache_hits += 1
+                        results[index] = cached
+                        report()
+                        continue
+                futures[self.submit(prompt, text, key)] = index
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except CancelledError:
+                    raise GenerationCancelled() from None
+                report()
+        except BaseException:
+            # Don't leave this stage's requests queued or running once one has failed
+            with self.lock:
+                jobs = [(job, future) for job, future in self.jobs.items() if future in futures]
+            for job, future in jobs:
+                self.cancel_job(job, future)
+            raise
+        finally:
+            with self.lock:
+                self.jobs = {job: future for job, future in self.jobs.items() if future not in futures}
+        return results
+
+    def estimate_merges(self, count):
+        fan_in = max(2, self.section_tokens // (self.summary_tokens + 1))
+        merges = 0
+        while count > 1:
+            count = -(-count // fan_in)
+            merges += count
+        return merges
+
+    def summarize(self, text, progress_callback=None):
+        """Return the summary of text; progress_callback(done, total) is called as summaries finish.
+
+        Raises GenerationCancelled if cancel() is called before it completes.
+        """
+        self.fit_to_model()
+        sections = split_sections(text, self.section_tokens)
+        if not sections:
+            return ""
+        progress = {"done": 0, "total": len(sections) + self.estimate_merges(len(sections))}
+
+        def report():
+            progress["done"] += 1
+            if progress_callback:
+                progress_callback(progress["done"], max(progress["total"], progress["done"]))
+
+        self.logger.info(f"Summarizing {len(sections)} sections with {self.model}")
+        summaries = self.run_stage(SECTION_PROMPT, sections, report)
+        level = 0
+        while len(summaries) > 1:
+            level += 1
+            groups = pack(summaries, self.section_tokens, "\n\n---\n\n")
+            if len(groups) == len(summaries):
+                # Summaries came back longer than asked for; force pairs so the reduce converges
+                groups = ["\n\n---\n\n".join(summaries[i:i + 2]) for i in range(0, len(summaries), 2)]
+            progress["total"] = progress["done"] + len(groups) + self.estimate_merges(len(groups))
+            summaries = self.run_stage(MERGE_PROMPT, groups, report)
+        self.logger.info(f"Summarized {len(sections)} sections in {level} merge levels "
+                         f"({self.cache_hits} cached)")
+        return summaries[0]
@@ -0,0 +1,137 @@
+# athena/services/generation_scheduler.py
+
+import logging
+import threading
+from collections import OrderedDict, deque
+from athena.services.llm_service import CancelToken
+
+class GenerationJob:
+    def __init__(self, session_id, backend, run):
+        # run(cancel_token) executes on a scheduler thread and must handle its own errors
+        self.session_id = session_id
+        self.backend = backend
+        self.run = run
+        self.cancel_token = CancelToken()
+        self.state = "queued"
+
+class GenerationScheduler:
+    """Runs generation jobs on background threads with a per-backend concurrency cap.
+
+    Jobs that cannot start yet wait in one queue per session, and free slots
+    are handed out round-robin across sessions so a chat with many queued
+    requests cannot starve the others.
+    """
+
+    def __init__(self, max_per_backend=1, on_change=None):
+        self.max_per_backend = max(1, max_per_backend)
+        self.on_change = on_change
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.queues = {}  # backend -> OrderedDict(session_id -> deque of jobs)
+        self.running = {}  # backend -> set of jobs
+        self.threads = set()
+
+    def set_max_per_backend(self, max_per_backend):
+        with self.lock:
+            self.max_per_backend = max(1, max_per_backend)
+            self.dispatch_locked()
+        self.notify()
+
+    def submit(self, job):
+        job.cancel_token.on_backend = lambda backend: self.move(job, backend)
+        with self.lock:
+            sessions = self.queues.setdefault(job.backend, OrderedDict())
+            sessions.setdefault(job.session_id, deque()).append(job)
+            self.dispatch_locked()
+        self.notify()
+        return job
+
+    def cancel(self, job):
+        """Cancel a job; returns True if it was running and will still finish on its thread."""
+        with self.lock:
+            if job.state == "queued":
+                self.remove_queued_locked(job)
+                job.state = "cancelled"
+                running = False
+            else:
+                running = job.state == "running"
+        job.cancel_token.cancel()
+        self.notify()
+        return running
+
+    def move(self, job, backend):
+        # A request that failed over counts against the backend that is actually serving it
+        with self.lock:
+            if job.state != "running" or job.backend == backend:
+                return
+            self.running.get(job.backend, set()).discard(job)
+            job.backend = backend
+            self.running.setdefault(backend, set()).add(job)
+            self.dispatch_locked()
+        self.notify()
+
+    def remove_queued_locked(self, job):
+        sessions = self.queues.get(job.backend, {})
+        queue = sessions.get(job.session_id)
+        if queue is None:
+            return
+        try:
+            queue.remove(job)
+        except ValueError:
+            return
+        if not queue:
+            del sessions[job.session_id]
+
+    def dispatch_locked(self):
+        for backend, sessions in self.queues.items():
+            running = self.running.setdefault(backend, set())
+            while sessions and len(running) < self.max_per_backend:
+                # Take from the session at the front, then move it to the back
+                session_id, queue = next(iter(sessions.items()))
+                job = queue.popleft()
+                if queue:
+                    sessions.move_to_end(session_id)
+                else:
+                    del sessions[session_id]
+                job.state = "running"
+                running.add(job)
+                thread = threading.Thread(target=self.run_job, args=(job,),
+                                          name=f"generation-{job.session_id}", daemon=True)
+                self.threads.add(thread)
+                thread.start()
+
+    def run_job(self, job):
+        try:
+            job.run(job.cancel_token)
+        except Exception as e:
+            self.logger.error(f"Generation job for session {job.session_id} failed: {e}")
+        finally:
+            with self.lock:
+                self.running.get(job.backend, set()).discard(job)
+                job.state = "done"
+                self.threads.discard(threading.current_thread())
+                self.dispatch_locked()
+            self.notify()
+
+    def stats(self):
+        with self.lock:
+            queued = sum(len(queue) for sessions in self.queues.values() for queue in sessions.values())
+            running = sum(len(jobs) for jobs in self.running.values())
+        return running, queued
+
+    def notify(self):
+        if self.on_change is not None:
+            self.on_change(*self.stats())
+
+    def shutdown(self, timeout=2.0):
+        with self.lock:
+            queued = [job for sessions in self.queues.values() for queue in sessions.values() for job in queue]
+            running = [job for jobs in self.running.values() for job in jobs]
+            self.queues.clear()
+            threads = list(self.threads)
+        for job in queued:
+            job.state = "cancelled"
+        for job in running:
+            job.cancel_token.cancel()
+        for thread in threads:
+            thread.join(timeout)
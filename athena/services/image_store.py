@@ -0,0 +1,123 @@
+# athena/services/image_store.py
+
+import base64
+import hashlib
+import logging
+import os
+import tempfile
+from PyQt6.QtCore import Qt, QBuffer, QByteArray, QIODevice
+from PyQt6.QtGui import QImage
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp')
+
+def thumbnail_path(image_path):
+    # Thumbnails sit next to the stored original as <digest>.thumb.png
+    return os.path.splitext(image_path)[0] + ".thumb.png"
+
+def encode_image(image, image_format, quality=-1):
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buffer, image_format, quality)
+    buffer.close()
+    return bytes(data)
+
+class ImageStore:
+    """Content-addressed store of pasted and dropped images.
+
+    Each image lives in <root>/<sha256[:2]>/ as <sha256><ext> (the original),
+    <sha256>.thumb.png (for the chat display) and <sha256>.payload.<jpg|png>,
+    the downscaled, recompressed copy that is sent to the model. Everything
+    here only uses QImage, so it is safe to call from worker threads.
+    """
+
+    def __init__(self, root, max_dimension=1024, thumbnail_size=200, quality=85):
+        self.root = root
+        self.max_dimension = max_dimension
+        self.thumbnail_size = thumbnail_size
+        self.quality = quality
+        self.logger = logging.getLogger(__name__)
+        os.makedirs(self.root, exist_ok=True)
+
+    def configure(self, max_dimension, thumbnail_size, quality):
+        self.max_dimension = max_dimension
+        self.thumbnail_size = thumbnail_size
+        self.quality = quality
+
+    def entry_directory(self, digest):
+        return os.path.join(self.root, digest[:2])
+
+    def payload_path(self, digest, has_alpha):
+        extension = "png" if has_alpha else "jpg"
+        suffix = f".payload-{self.max_dimension}-{self.quality}.{extension}"
+        return os.path.join(self.entry_directory(digest), digest + suffix)
+
+    def write_atomic(self, path, data):
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def import_image(self, source):
+        """Store a QImage or an image file and return its record.
+
+        The record holds the digest, the stored original path, the thumbnail
+        path and the payload path; already stored images are not re-encoded.
+        """
+        if isinstance(source, QImage):
+            data = encode_image(source, "PNG")
+            extension = ".png"
+        else:
+            with open(source, 'rb') as f:
+                data = f.read()
+            extension = os.path.splitext(source)[1].lower() or ".png"
+        digest = hashlib.sha256(data).hexdigest()
+        directory = self.entry_directory(digest)
+        os.makedirs(directory, exist_ok=True)
+        original_path = os.path.join(directory, digest + extension)
+        if not os.path.exists(original_path):
+            self.write_atomic(original_path, data)
+
+        image = source if isinstance(source, QImage) else None
+        thumb_path = thumbnail_path(original_path)
+        if not os.path.exists(thumb_path):
+            image = image if image is not None else self.load_image(original_path)
+            self.write_atomic(thumb_path, encode_image(self.scaled(image, self.thumbnail_size), "PNG"))
+
+        payload_path = self.find_payload(digest)
+        if payload_path is None:
+            image = image if image is not None else self.load_image(original_path)
+            payload_path = self.payload_path(digest, image.hasAlphaChannel())
+            payload_format = "PNG" if image.hasAlphaChannel() else "JPG"
+            self.write_atomic(payload_path, encode_image(self.scaled(image, self.max_dimension),
+                                                         payload_format, self.quality))
+            self.logger.info(f"Stored image {digest[:12]} ({image.width()}x{image.height()})")
+        return {"digest": digest, "path": original_path, "thumbnail": thumb_path, "payload": payload_path}
+
+    def find_payload(self, digest):
+        for has_alpha in (False, True):
+            path = self.payload_path(digest, has_alpha)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def load_image(self, path):
+        image = QImage(path)
+        if image.isNull():
+            raise ValueError(f"Unsupported or corrupt image: {path}")
+        return image
+
+    def scaled(self, image, max_dimension):
+        if max_dimension <= 0 or max(image.width(), image.height()) <= max_dimension:
+            return image
+        return image.scaled(max_dimension, max_dimension, Qt.AspectRatioMode.KeepAspectRatio,
+                            Qt.TransformationMode.SmoothTransformation)
+
+    def encode_payload(self, record):
+        with open(record["payload"], 'rb') as f:
+            return base64.b64encode(f.read()).decode('ascii')
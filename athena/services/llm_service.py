@@ -1,44 +1,412 @@
 # athena/services/llm_service.py
 import logging
+import socket
+import threading
+import time
+import uuid
 import requests
 import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from athena.services.backend_pool import BackendPool
+from athena.services.context_budget import parse_model_context
+from athena.utils.logging_config import set_request_id
+
+DEFAULT_HTTP_SETTINGS = {
+    "connect_timeout": 5.0,
+    "read_timeout": 120.0,
+    "max_retries": 3,
+    "backoff_factor": 0.5,
+    "pool_size": 10,
+}
+
+class GenerationCancelled(Exception):
+    pass
+
+class CancelToken:
+    """Lets another thread abort a streaming request by closing its HTTP connection.
+
+    Closing the connection (rather than just dropping the stream) makes Ollama
+    stop generating straight away instead of finishing into a dead socket.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.cancelled = False
+        self.response = None
+        self.on_backend = None  # called with the URL of the backend each request was sent to
+
+    def bind(self, response):
+        with self.lock:
+            if self.cancelled:
+                close_response(response)
+                raise GenerationCancelled()
+            self.response = response
+
+    def unbind(self):
+        with self.lock:
+            self.response = None
+
+    def cancel(self):
+        with self.lock:
+            self.cancelled = True
+            response, self.response = self.response, None
+        if response is not None:
+            close_response(response)
+
+def close_response(response):
+    # Shutting the socket down also wakes a reader blocked waiting for the first token
+    connection = getattr(response.raw, "_connection", None)
+    sock = getattr(connection, "sock", None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    response.close()
+
+def build_metrics(final_frame, endpoint, backend, started, first_byte, first_token, finished):
+    """Combine Ollama's final-frame timings (nanoseconds) with client-side timings (perf_counter seconds)."""
+    def ms(nanoseconds):
+        return round(nanoseconds / 1e6, 2) if nanoseconds is not None else None
+
+    eval_count = final_frame.get("eval_count")
+    eval_duration = final_frame.get("eval_duration")
+    prompt_eval_count = final_frame.get("prompt_eval_count")
+    prompt_eval_duration = final_frame.get("prompt_eval_duration")
+    return {
+        "timestamp": time.time(),
+        "model": final_frame.get("model"),
+        "endpoint": endpoint,
+        "backend": backend,
+        "ttfb_ms": round((first_byte - started) * 1000, 2),
+        "ttft_ms": round((first_token - started) * 1000, 2) if first_token is not None else None,
+        "wall_ms": round((finished - started) * 1000, 2),
+        "total_duration_ms": ms(final_frame.get("total_duration")),
+        "load_duration_ms": ms(final_frame.get("load_duration")),
+        "prompt_eval_count": prompt_eval_count,
+        "prompt_eval_ms": ms(prompt_eval_duration),
+        "eval_count": eval_count,
+        "eval_ms": ms(eval_duration),
+        "tokens_per_second": round(eval_count / (eval_duration / 1e9), 2) if eval_count and eval_duration else None,
+        "prompt_tokens_per_second": (round(prompt_eval_count / (prompt_eval_duration / 1e9), 2)
+                                     if prompt_eval_count and prompt_eval_duration else None),
+    }
 
 class LLMService:
-    def __init__(self, base_url):
+    def __init__(self, base_url, http_settings=None, backend_urls=None):
         self.base_url = base_url
+        self.pool = BackendPool([base_url] + list(backend_urls or []))
         self.logger = logging.getLogger(__name__)
+        self.session = None
+        self.keep_alive = None
+        self.options = {}
+        self.response_cache = None
+        self.model_digests = {}
+        self.model_contexts = {}
+        self.metrics_listeners = []
+        self.configure_http(**(http_settings or {}))
+
+    def configure_http(self, connect_timeout=None, read_timeout=None, max_retries=None,
+                       backoff_factor=None, pool_size=None):
+        settings = dict(DEFAULT_HTTP_SETTINGS)
+        settings.update({key: value for key, value in {
+            "connect_timeout": connect_timeout,
+            "read_timeout": read_timeout,
+            "max_retries": max_retries,
+            "backoff_factor": backoff_factor,
+            "pool_size": pool_size,
+        }.items() if value is not None})
+        if self.session is not None and settings == self.http_settings:
+            return
+        self.http_settings = settings
+        self.timeout = (settings["connect_timeout"], settings["read_timeout"])
+        self.pool.timeout = (settings["connect_timeout"], min(settings["read_timeout"], 10.0))
+
+        # Only idempotent calls are retried; a generation POST is never replayed
+        retry = Retry(
+            total=settings["max_retries"],
+            backoff_factor=settings["backoff_factor"],
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=settings["pool_size"],
+                              pool_maxsize=settings["pool_size"],
+                              max_retries=retry)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        self.pool.set_session(session)
+        old_session, self.session = self.session, session
+        if old_session is not None:
+            old_session.close()
+        self.logger.debug(f"HTTP client configured: {settings}")
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+        self.pool.close()
 
     def set_base_url(self, new_base_url):
-        self.base_url = new_base_url
-        self.logger.info(f"LLM service base URL updated to: {new_base_url}")
+        self.set_backends([new_base_url])
+
+    def set_backends(self, urls):
+        urls = list(dict.fromkeys(url.rstrip("/") for url in urls if url))
+        if urls == self.pool.urls() or not urls:
+            return
+        self.base_url = urls[0]
+        self.pool.set_urls(urls)
+        self.logger.info(f"LLM service backends updated to: {', '.join(urls)}")
+
+    def route(self, model=None):
+        return self.pool.select(model)
+
+    def post(self, endpoint, payload, stream=False):
+        """POST to the best backend for payload["model"], failing over on connection errors.
+
+        Failover only happens before a response is returned, so a stream that
+        breaks halfway is never replayed on another backend.
+        """
+        model = payload.get("model")
+        last_error = None
+        for url in self.pool.candidates(model):
+            try:
+                response = self.session.post(f"{url}{endpoint}", json=self.with_keep_alive(payload),
+                                             stream=stream, timeout=self.timeout)
+            except requests.ConnectionError as e:
+                self.pool.record_failure(url, e)
+                last_error = e
+                continue
+            if response.status_code in (502, 503, 504) or (response.status_code == 404 and model):
+                # Backend is overloaded or lacks the model; try the next one
+                if response.status_code != 404:
+                    self.pool.record_failure(url, f"HTTP {response.status_code}")
+                last_error = requests.HTTPError(f"{response.status_code} from {url}{endpoint}", response=response)
+                response.close()
+                continue
+            response.raise_for_status()
+            return response
+        raise last_error or requests.ConnectionError("No Ollama backend configured")
+
+    def set_keep_alive(self, keep_alive):
+        # Ollama accepts a duration string ("30m"), seconds, or -1 to keep a model loaded indefinitely.
+        # A string is always parsed as a duration, so bare numbers have to be sent as numbers.
+        if isinstance(keep_alive, str):
+            keep_alive = keep_alive.strip()
+            try:
+                keep_alive = int(keep_alive)
+            except ValueError:
+                try:
+                    keep_alive = float(keep_alive)
+                except ValueError:
+                    pass
+        self.keep_alive = keep_alive if keep_alive not in (None, "") else None
+
+    def with_keep_alive(self, payload):
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        return payload
+
+    def set_generation_options(self, temperature=None, num_predict=None, seed=None, num_ctx=None):
+        options = {"temperature": temperature, "num_predict": num_predict, "seed": seed, "num_ctx": num_ctx or None}
+        self.options = {key: value for key, value in options.items() if value is not None}
+
+    def set_response_cache(self, response_cache):
+        self.response_cache = response_cache
+
+    def add_metrics_listener(self, listener):
+        # Called with a metrics dict on the requesting thread after every completed stream
+        self.metrics_listeners.append(listener)
+
+    def remove_metrics_listener(self, listener):
+        if listener in self.metrics_listeners:
+            self.metrics_listeners.remove(listener)
+
+    def emit_metrics(self, metrics):
+        for listener in list(self.metrics_listeners):
+            try:
+                listener(metrics)
+            except Exception as e:
+                self.logger.warning(f"Metrics listener failed: {e}")
 
     def get_available_models(self):
+        """Poll every backend and return the union of their models."""
+        models = self.pool.refresh()
+        if not self.pool.is_healthy():
+            self.logger.error("Failed to fetch models: no Ollama backend is reachable")
+            raise requests.ConnectionError("No Ollama backend is reachable")
+        digests = self.pool.model_digests()
+        for model in list(self.model_contexts):
+            # A re-pulled model may come with a different context length
+            known = self.model_digests.get(model)
+            if known is not None and digests.get(model) != known:
+                self.model_contexts.pop(model, None)
+        self.model_digests = digests
+        return models
+
+    def load_model(self, model):
+        """Load model into memory without generating anything; returns once it is ready."""
         try:
-            response = requests.get(f"{self.base_url}/api/tags")
-            response.raise_for_status()
-            return [model['name'] for model in response.json()['models']]
+            # Same options as the chat requests, so a different num_ctx doesn't reload the model on first use
+            response = self.post("/api/generate", {"model": model, "stream": False, "options": dict(self.options)})
+            self.logger.info(f"Model loaded: {model} on {response.url.rsplit('/api/', 1)[0]}")
+            return model
         except requests.RequestException as e:
-            self.logger.error(f"Failed to fetch models: {e}")
+            self.logger.error(f"Failed to load model {model}: {e}")
             raise
 
-    def generate_response(self, prompt, model):
+    def get_model_context(self, model):
+        """Return (trained context length, Modelfile num_ctx) for a model; /api/show is asked once per model."""
+        if model not in self.model_contexts:
+            self.model_contexts[model] = parse_model_context(self.pool.show(model))
+        return self.model_contexts[model]
+
+    def stream_frames(self, endpoint, payload, cancel_token=None):
+        """Yield each decoded NDJSON frame of a streaming endpoint, including the final one.
+
+        Raises GenerationCancelled if cancel_token is cancelled before the stream completes.
+        """
+        if cancel_token is not None and cancel_token.cancelled:
+            raise GenerationCancelled()
+        # Tags this thread's log records until the stream ends; also recorded in the metrics
+        request_id = uuid.uuid4().hex[:12]
+        previous_request_id = set_request_id(request_id)
+        self.logger.debug(f"Streaming {endpoint} from {payload.get('model')}")
+        started = time.perf_counter()
+        first_token = None
         try:
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={"model": model, "prompt": prompt},
-                stream=True
-            )
-            response.raise_for_status()
-            full_response = ""
-            for line in response.iter_lines():
-                if line:
+            response = self.post(endpoint, payload, stream=True)
+            first_byte = time.perf_counter()
+            if cancel_token is not None:
+                cancel_token.bind(response)
+                if cancel_token.on_backend is not None:
+                    cancel_token.on_backend(response.url.rsplit('/api/', 1)[0])
+            with response:
+                for line in response.iter_lines():
+                    if not line:
+                        continue
                     try:
                         data = json.loads(line)
-                        if 'response' in data:
-                            full_response += data['response']
                     except json.JSONDecodeError:
                         self.logger.warning(f"Failed to parse line: {line}")
-            return full_response
+                        continue
+                    if 'error' in data:
+                        raise RuntimeError(data['error'])
+                    if first_token is None and (data.get('response') or data.get('message', {}).get('content')):
+                        first_token = time.perf_counter()
+                    if data.get('done'):
+                        data.setdefault('model', payload.get('model'))
+                        backend = response.url.rsplit('/api/', 1)[0]
+                        self.pool.record_loaded(backend, payload.get('model'))
+                        metrics = build_metrics(data, endpoint, backend,
+                                                started, first_byte, first_token, time.perf_counter())
+                        metrics["request_id"] = request_id
+                        self.emit_metrics(metrics)
+                        yield data
+                        return
+                    yield data
+        except GenerationCancelled:
+            raise
+        except Exception as e:
+            # Reading from a response closed by cancel() fails in various ways
+            if cancel_token is not None and cancel_token.cancelled:
+                raise GenerationCancelled() from None
+            if isinstance(e, requests.RequestException):
+                self.logger.error(f"Failed to generate response: {e}")
+            raise
+        finally:
+            if cancel_token is not None:
+                cancel_token.unbind()
+            set_request_id(previous_request_id)
+        if cancel_token is not None and cancel_token.cancelled:
+            raise GenerationCancelled()
+
+    def get_model_digest(self, model):
+        if model not in self.model_digests:
+            self.get_available_models()
+        return self.model_digests.get(model)
+
+    def cached_stream(self, request, model, stream, options=None):
+        """Serve a deterministic request from the response cache, filling it on a miss."""
+        options = self.options if options is None else options
+        if self.response_cache is None or not self.response_cache.is_cacheable(options):
+            yield from stream
+            return
+        try:
+            key = self.response_cache.make_key(model, self.get_model_digest(model), request, options)
+        except requests.RequestException:
+            yield from stream
+            return
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            self.logger.debug(f"Response cache hit for {model}")
+            stream.close()
+            yield cached
+            return
+        chunks = []
+        while True:
+            try:
+                chunk = next(stream)
+            except StopIteration as stop:
+                completed = stop.value
+                break
+            chunks.append(chunk)
+            yield chunk
+        # A stream the server closed before its final frame is not a complete answer
+        if completed:
+            self.response_cache.put(key, "".join(chunks))
+
+    def generate_stream(self, prompt, model, cancel_token=None):
+        """Yield response chunks from /api/generate as they arrive."""
+        return self.cached_stream({"prompt": prompt}, model,
+                                  self.iter_generate_chunks(prompt, model, cancel_token))
+
+    def iter_generate_chunks(self, prompt, model, cancel_token=None):
+        """Yield response chunks; returns True if the final frame arrived."""
+        payload = {"model": model, "prompt": prompt, "options": dict(self.options)}
+        for data in self.stream_frames("/api/generate", payload, cancel_token):
+            if data.get('response'):
+                yield data['response']
+            if data.get('done'):
+                return True
+        return False
+
+    def chat_stream(self, messages, model, cancel_token=None, options=None):
+        """Yield assistant content chunks from /api/chat for a full message history.
+
+        options are merged over the generation options for this request only.
+        """
+        options = {**self.options, **(options or {})}
+        return self.cached_stream({"messages": messages}, model,
+                                  self.iter_chat_chunks(messages, model, cancel_token, options), options)
+
+    def iter_chat_chunks(self, messages, model, cancel_token=None, options=None):
+        """Yield assistant content chunks; returns True if the final frame arrived."""
+        payload = {"model": model, "messages": messages, "options": dict(self.options if options is None else options)}
+        for data in self.stream_frames("/api/chat", payload, cancel_token):
+            content = data.get('message', {}).get('content')
+            if content:
+                yield content
+            if data.get('done'):
+                return True
+        return False
+
+    def generate_response(self, prompt, model, on_chunk=None):
+        chunks = []
+        for chunk in self.generate_stream(prompt, model):
+            chunks.append(chunk)
+            if on_chunk:
+                on_chunk(chunk)
+        return "".join(chunks)
+
+    def embed(self, texts, model):
+        try:
+            response = self.post("/api/embed", {"model": model, "input": list(texts)})
+            embeddings = response.json()['embeddings']
+            if len(embeddings) != len(texts):
+                raise ValueError(f"Expected {len(texts)} embeddings, got {len(embeddings)}")
+            return embeddings
         except requests.RequestException as e:
-            self.logger.error(f"Failed to generate response: {e}")
+            self.logger.error(f"Failed to compute embeddings: {e}")
             raise
\ No newline at end of file
@@ -0,0 +1,87 @@
+# athena/services/pdf_extractor.py
+
+import logging
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+logger = logging.getLogger(__name__)
+
+# Below this many pages, process start-up costs more than it saves
+PARALLEL_MIN_PAGES = 64
+
+# Per-process reader cache so a worker parses the document structure once
+_readers = {}
+
+class ExtractionCancelled(Exception):
+    pass
+
+def count_pages(file_path):
+    from PyPDF2 import PdfReader
+    with open(file_path, 'rb') as file:
+        return len(PdfReader(file).pages)
+
+def _get_reader(file_path):
+    reader = _readers.get(file_path)
+    if reader is None:
+        from PyPDF2 import PdfReader
+        _readers.clear()
+        reader = PdfReader(file_path)
+        _readers[file_path] = reader
+    return reader
+
+def extract_page_range(file_path, start, stop):
+    reader = _get_reader(file_path)
+    return [reader.pages[index].extract_text() or "" for index in range(start, stop)]
+
+def iter_pdf_pages(file_path, max_workers=None, pages_per_task=8, cancel_event=None):
+    """Yield (page_index, text, page_count) in page order.
+
+    Page ranges are extracted concurrently in a process pool; pages are
+    yielded as soon as every earlier page is available. Setting cancel_event
+    stops the extraction and raises ExtractionCancelled.
+    """
+    from PyPDF2 import PdfReader  # imported on first use; it is slow to load and most sessions never need it
+    max_workers = max_workers or os.cpu_count() or 1
+    with open(file_path, 'rb') as file:
+        reader = PdfReader(file)
+        page_count = len(reader.pages)
+        if max_workers == 1 or page_count < PARALLEL_MIN_PAGES:
+            for index, page in enumerate(reader.pages):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ExtractionCancelled(file_path)
+                yield index, page.extract_text() or "", page_count
+            return
+
+    # Keep ranges small enough for ordered streaming but large enough to
+    # amortize per-task overhead: at least a few tasks per worker
+    pages_per_task = max(pages_per_task, math.ceil(page_count / (max_workers * 4)))
+    ranges = [(start, min(start + pages_per_task, page_count))
+              for start in range(0, page_count, pages_per_task)]
+
+    # spawn avoids forking a process that is running Qt threads
+    executor = ProcessPoolExecutor(max_workers=min(max_workers, len(ranges)),
+                                   mp_context=multiprocessing.get_context("spawn"))
+    try:
+        futures = {executor.submit(extract_page_range, file_path, start, stop): start
+                   for start, stop in ranges}
+        finished = {}
+        next_start = 0
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            if cancel_event is not None and cancel_event.is_set():
+                raise ExtractionCancelled(file_path)
+            for future in done:
+                finished[futures[future]] = future.result()
+            while next_start in finished:
+                pages = finished.pop(next_start)
+                for offset, text in enumerate(pages):
+                    # Ranges that already finished are still handed out a page at a time
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise ExtractionCancelled(file_path)
+                    yield next_start + offset, text, page_count
+                next_start += len(pages)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,116 @@
+# athena/services/response_cache.py
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+class ResponseCache:
+    """Two-tier cache of complete responses to deterministic requests.
+
+    The memory tier is an LRU of recent entries; the disk tier keeps one JSON
+    file per key under directory and evicts least recently used files once it
+    grows past max_disk_bytes.
+    """
+
+    def __init__(self, directory, memory_entries=128, max_disk_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+        os.makedirs(self.directory, exist_ok=True)
+        self.disk_bytes = sum(size for _, size, _ in self.scan())
+
+    @staticmethod
+    def is_cacheable(options):
+        # Sampling with temperature > 0 is only reproducible with a fixed seed
+        options = options or {}
+        temperature = options.get("temperature")
+        return temperature == 0 or options.get("seed") is not None
+
+    @staticmethod
+    def make_key(model, digest, request, options):
+        payload = json.dumps({"model": model, "digest": digest, "request": request, "options": options or {}},
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def scan(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, stat.st_size, stat.st_mtime
+
+    def get(self, key):
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                return self.memory[key]
+            path = self.path_for(key)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    value = json.load(f)["response"]
+                os.utime(path)
+            except (OSError, ValueError, KeyError):
+                return None
+            self.remember(key, value)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.remember(key, value)
+            path = self.path_for(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+            temp_path = path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({"response": value}, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+            self.disk_bytes += os.path.getsize(path) - previous_size
+            if self.disk_bytes > self.max_disk_bytes:
+                self.evict()
+
+    def remember(self, key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def evict(self):
+        # Trim to 90% of the cap so eviction does not run on every write
+        target = self.max_disk_bytes * 0.9
+        entries = sorted(self.scan(), key=lambda entry: entry[2])
+        self.disk_bytes = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in entries:
+            if self.disk_bytes <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.memory.pop(os.path.basename(path)[:-5], None)
+            self.disk_bytes -= size
+            removed += 1
+        self.logger.info(f"Evicted {removed} cached responses")
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+            for path, _, _ in list(self.scan()):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self.disk_bytes = 0
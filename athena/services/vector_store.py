@@ -0,0 +1,157 @@
+# athena/services/vector_store.py
+
+import json
+import logging
+import os
+import threading
+import numpy as np
+
+class VectorStore:
+    """Append-only store of normalized embeddings in a memory-mapped float32 matrix.
+
+    Rows are keyed by the content hash of the embedded text, so a chunk is
+    embedded once and reused by every document and session that contains it.
+    Keys are appended to a text file, one per line, in row order, so adding
+    vectors never rewrites what is already stored.
+    """
+
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.data_path = os.path.join(directory, "vectors.f32")
+        self.meta_path = os.path.join(directory, "vectors.json")
+        self.keys_path = os.path.join(directory, "vectors.keys")
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.dimension = None
+        self.keys = []
+        self.rows = {}
+        self.capacity = 0
+        self.vectors = None
+        os.makedirs(directory, exist_ok=True)
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.meta_path) or not os.path.exists(self.data_path):
+            return
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.warning(f"Ignoring unreadable vector store metadata {self.meta_path}: {e}")
+            return
+        self.dimension = meta["dimension"]
+        self.capacity = os.path.getsize(self.data_path) // (self.dimension * 4)
+        self.keys = self.read_keys()[:self.capacity]
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+        if self.capacity:
+            self.vectors = np.memmap(self.data_path, dtype=np.float32, mode='r+',
+                                     shape=(self.capacity, self.dimension))
+        self.logger.debug(f"Loaded {len(self.keys)} vectors from {self.directory}")
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.rows
+
+    def missing(self, keys):
+        return [key for key in keys if key not in self.rows]
+
+    def ensure_capacity(self, required):
+        if required <= self.capacity:
+            return
+        capacity = max(self.INITIAL_CAPACITY, self.capacity)
+        while capacity < required:
+            capacity *= 2
+        if self.vectors is not None:
+            self.vectors.flush()
+            del self.vectors
+        with open(self.data_path, 'ab') as f:
+            f.truncate(capacity * self.dimension * 4)
+        self.capacity = capacity
+        self.vectors = np.memmap(self.data_path, dtype=np.float32, mode='r+',
+                                 shape=(self.capacity, self.dimension))
+
+    def add(self, keys, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or len(keys) != len(vectors):
+            raise ValueError("Expected one vector per key")
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        with self.lock:
+            if self.dimension is None:
+                self.dimension = vectors.shape[1]
+            elif vectors.shape[1] != self.dimension:
+                raise ValueError(f"Vector dimension {vectors.shape[1]} does not match store dimension {self.dimension}")
+            new_keys = []
+            new_vectors = []
+            seen = set()
+            for key, vector in zip(keys, vectors):
+                if key not in self.rows and key not in seen:
+                    seen.add(key)
+                    new_keys.append(key)
+                    new_vectors.append(vector)
+            if not new_keys:
+                return
+            if not os.path.exists(self.meta_path):
+                self.save_meta()
+            start = len(self.keys)
+            self.ensure_capacity(start + len(new_keys))
+            self.vectors[start:start + len(new_keys)] = np.stack(new_vectors)
+            self.vectors.flush()
+            for offset, key in enumerate(new_keys):
+                self.rows[key] = start + offset
+            self.keys.extend(new_keys)
+            # The vectors are flushed first, so a key on disk always has its row
+            with open(self.keys_path, 'a', encoding='utf-8', newline='\n') as f:
+                f.write("".join(f"{key}\n" for key in new_keys))
+
+    def save_meta(self):
+        temp_path = self.meta_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"dimension": self.dimension}, f)
+        os.replace(temp_path, self.meta_path)
+
+    def read_keys(self):
+        try:
+            with open(self.keys_path, 'r', encoding='utf-8', newline='\n') as f:
+                text = f.read()
+        except FileNotFoundError:
+            return []
+        end = text.rfind("\n") + 1
+        if end < len(text):
+            # A write was cut off mid-key; drop the partial line so later appends start clean
+            with open(self.keys_path, 'r+b') as f:
+                f.truncate(len(text[:end].encode('utf-8')))
+        return text[:end].splitlines()
+
+    def search(self, query_vector, keys=None, top_k=5):
+        """Return up to top_k (key, cosine similarity) pairs, optionally restricted to keys."""
+        with self.lock:
+            if self.vectors is None or not self.keys:
+                return []
+            query = np.asarray(query_vector, dtype=np.float32)
+            norm = np.linalg.norm(query)
+            if norm == 0:
+                return []
+            query = query / norm
+            if keys is None:
+                rows = np.arange(len(self.keys))
+            else:
+                rows = np.fromiter((self.rows[key] for key in keys if key in self.rows), dtype=np.int64)
+            if rows.size == 0:
+                return []
+            similarities = self.vectors[rows] @ query
+            top_k = min(top_k, rows.size)
+            best = np.argpartition(-similarities, top_k - 1)[:top_k]
+            best = best[np.argsort(-similarities[best])]
+            return [(self.keys[rows[i]], float(similarities[i])) for i in best]
+
+    def close(self):
+        with self.lock:
+            if self.vectors is not None:
+                self.vectors.flush()
+                del self.vectors
+                self.vectors = None
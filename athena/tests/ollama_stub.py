@@ -0,0 +1,65 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.respond(None)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.respond(json.loads(self.rfile.read(length)))
+
+    def respond(self, payload):
+        self.server.requests.append((self.path, payload))
+        route = self.server.routes.get(self.path)
+        status, body = route(payload) if route is not None else (404, None)
+        if body is None:
+            self.send_error(status)
+            return
+        self.send_response(status)
+        if isinstance(body, list):
+            # NDJSON frames; the stream ends when the connection closes
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            for frame in body:
+                self.wfile.write(json.dumps(frame).encode('utf-8') + b"\n")
+            return
+        data = json.dumps(body).encode('utf-8')
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+class OllamaStub(ThreadingHTTPServer):
+    """Local stand-in for an Ollama server.
+
+    routes maps a path to a function of the decoded request body (None for
+    GET) returning (status, body): a dict is sent as JSON, a list as NDJSON
+    frames, and None as a bare error status. Every request is recorded.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, routes=None):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.routes = dict(routes or {})
+        self.requests = []
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+        threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+def chat_frames(text, done=True):
+    """Frames of a streamed /api/chat answer, one per word."""
+    words = text.split(" ")
+    frames = [{"message": {"role": "assistant", "content": word if index == 0 else " " + word}, "done": False}
+              for index, word in enumerate(words)]
+    if done:
+        frames.append({"message": {"role": "assistant", "content": ""}, "done": True, "eval_count": len(words)})
+    return frames
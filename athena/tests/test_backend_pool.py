@@ -0,0 +1,103 @@
+import pytest
+from athena.services.backend_pool import BackendPool
+from athena.tests.ollama_stub import OllamaStub
+
+# Nothing listens on port 1, so connecting fails straight away
+DEAD_URL = "http://127.0.0.1:1"
+
+def model_routes(models, loaded=()):
+    def show(payload):
+        if payload["model"] not in models:
+            return 404, None
+        return 200, {"model_info": {"llama.context_length": 8192}}
+
+    return {
+        "/api/tags": lambda payload: (200, {"models": [{"name": name, "digest": f"sha-{name}"} for name in models]}),
+        "/api/ps": lambda payload: (200, {"models": [{"name": name} for name in loaded]}),
+        "/api/show": show,
+    }
+
+@pytest.fixture
+def servers():
+    started = []
+
+    def start(models, loaded=()):
+        stub = OllamaStub(model_routes(models, loaded))
+        started.append(stub)
+        return stub
+
+    yield start
+    for stub in started:
+        stub.close()
+
+def make_pool(urls):
+    return BackendPool(urls, timeout=(1.0, 2.0))
+
+def test_refresh_collects_models_from_every_backend(servers):
+    first = servers(["llama3", "mistral"])
+    second = servers(["phi3"])
+    pool = make_pool([first.url, second.url])
+    assert pool.refresh() == ["llama3", "mistral", "phi3"]
+    assert pool.model_digests()["phi3"] == "sha-phi3"
+    pool.close()
+
+def test_candidates_prefer_backends_with_the_model(servers):
+    first = servers(["llama3"])
+    second = servers(["phi3"])
+    pool = make_pool([first.url, second.url])
+    pool.refresh()
+    assert pool.candidates("phi3") == [second.url, first.url]
+    assert pool.select("llama3") == first.url
+    pool.close()
+
+def test_candidates_prefer_a_backend_with_the_model_loaded(servers):
+    cold = servers(["llama3"])
+    warm = servers(["llama3"], loaded=["llama3"])
+    pool = make_pool([cold.url, warm.url])
+    pool.refresh()
+    assert pool.candidates("llama3")[0] == warm.url
+    assert pool.loaded_models() == ["llama3"]
+    pool.close()
+
+def test_candidates_break_ties_on_latency(servers):
+    first = servers(["llama3"])
+    second = servers(["llama3"])
+    pool = make_pool([first.url, second.url])
+    pool.refresh()
+    pool.backends[first.url].latency = 0.5
+    pool.backends[second.url].latency = 0.01
+    assert pool.candidates("llama3") == [second.url, first.url]
+    pool.close()
+
+def test_unreachable_backends_are_tried_last(servers):
+    live = servers(["llama3"])
+    pool = make_pool([DEAD_URL, live.url])
+    pool.refresh()
+    assert not pool.backends[DEAD_URL].healthy
+    assert pool.is_healthy()
+    assert pool.candidates("llama3") == [live.url, DEAD_URL]
+    # A failed request marks the backend down until the next successful poll
+    pool.record_failure(live.url, "HTTP 503")
+    assert not pool.is_healthy()
+    pool.refresh()
+    assert pool.backends[live.url].healthy
+    assert pool.candidates("llama3") == [live.url, DEAD_URL]
+    pool.close()
+
+def test_record_loaded_only_marks_the_model(servers):
+    server = servers(["llama3"])
+    pool = make_pool([server.url])
+    pool.refresh()
+    latency = pool.backends[server.url].latency
+    pool.record_loaded(server.url, "llama3")
+    assert pool.backends[server.url].loaded == {"llama3"}
+    assert pool.backends[server.url].latency == latency
+    pool.close()
+
+def test_show_skips_backends_without_the_model(servers):
+    first = servers(["phi3"])
+    second = servers(["llama3"])
+    pool = make_pool([first.url, second.url])
+    assert pool.show("llama3") == {"model_info": {"llama.context_length": 8192}}
+    assert all(backend.latency is None and not backend.loaded for backend in pool.backends.values())
+    pool.close()
@@ -0,0 +1,70 @@
+import argparse
+import json
+import pytest
+from athena.batch import add_batch_parser, completed_ids, read_requests
+from athena.tests.ollama_stub import OllamaStub, chat_frames
+
+@pytest.fixture
+def stub():
+    def answer(payload):
+        prompt = payload["messages"][-1]["content"]
+        if prompt == "fail":
+            return 500, None
+        return 200, chat_frames(f"echo {prompt}")
+
+    stub = OllamaStub({"/api/chat": answer})
+    yield stub
+    stub.close()
+
+def write_lines(path, lines):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("".join(line + "\n" for line in lines))
+
+def read_results(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+def batch(stub, tmp_path, *extra):
+    parser = argparse.ArgumentParser()
+    add_batch_parser(parser.add_subparsers())
+    args = parser.parse_args(["batch", str(tmp_path / "prompts.jsonl"), "-o", str(tmp_path / "results.jsonl"),
+                              "-m", "llama3", "--url", stub.url, "--workspace", str(tmp_path / "workspace"),
+                              "--settings", str(tmp_path / "settings.json"), "-q", *extra])
+    return args.handler(args)
+
+def test_read_requests_numbers_lines_without_an_id(tmp_path):
+    write_lines(tmp_path / "prompts.jsonl", ['{"prompt": "a"}', '', '"b"', '{"id": "x", "prompt": "c"}'])
+    assert list(read_requests(tmp_path / "prompts.jsonl")) == \
+        [("1", {"prompt": "a"}), ("3", {"prompt": "b"}), ("x", {"id": "x", "prompt": "c"})]
+
+def test_batch_writes_one_result_per_request(stub, tmp_path):
+    write_lines(tmp_path / "prompts.jsonl", ['{"id": "a", "prompt": "one"}', '{"id": "b", "prompt": "fail"}',
+                                             '{"id": "c", "prompt": "three", "system": "Be brief."}'])
+    assert batch(stub, tmp_path, "-w", "2") == 1
+    results = {result["id"]: result for result in read_results(tmp_path / "results.jsonl")}
+    assert results["a"]["response"] == "echo one"
+    assert results["b"]["error"] and results["b"]["response"] is None
+    assert results["c"]["timings"]["total_ms"] >= results["c"]["timings"]["first_token_ms"]
+    assert completed_ids(tmp_path / "results.jsonl") == {"a", "c"}
+
+def test_resume_after_an_interrupted_line(stub, tmp_path):
+    write_lines(tmp_path / "prompts.jsonl", ['{"id": "a", "prompt": "one"}', '{"id": "b", "prompt": "two"}',
+                                             '{"id": "c", "prompt": "three"}'])
+    done = json.dumps({"id": "a", "model": "llama3", "response": "echo one", "error": None})
+    with open(tmp_path / "results.jsonl", 'w', encoding='utf-8') as f:
+        f.write(done + '\n{"id": "b", "model": "lla')
+    assert batch(stub, tmp_path, "--resume") == 0
+    results = read_results(tmp_path / "results.jsonl")
+    assert [result["id"] for result in results[:1]] == ["a"]
+    assert sorted(result["id"] for result in results[1:]) == ["b", "c"]
+    assert len(stub.requests) == 2
+    # Nothing is redone on a second resume
+    assert batch(stub, tmp_path, "--resume") == 0
+    assert len(stub.requests) == 2
+
+def test_resume_keeps_a_result_that_only_lost_its_newline(stub, tmp_path):
+    write_lines(tmp_path / "prompts.jsonl", ['{"id": "a", "prompt": "one"}', '{"id": "b", "prompt": "two"}'])
+    with open(tmp_path / "results.jsonl", 'w', encoding='utf-8') as f:
+        f.write(json.dumps({"id": "a", "model": "llama3", "response": "echo one", "error": None}))
+    assert batch(stub, tmp_path, "--resume") == 0
+    assert [result["id"] for result in read_results(tmp_path / "results.jsonl")] == ["a", "b"]
@@ -0,0 +1,111 @@
+import json
+import os
+import threading
+import pytest
+from athena.models.chat import ChatMessage
+from athena.services.chat_exporter import ChatExporter, ExportCancelled, export_format
+from athena.utils.chat_manager import ChatManager
+
+@pytest.fixture
+def chat_manager(tmp_path):
+    manager = ChatManager(str(tmp_path))
+    yield manager
+    manager.close()
+
+def stored_chat(chat_manager, name, contents):
+    chat_id = chat_manager.create_chat(name)
+    for sender, content in contents:
+        chat_manager.append_message(chat_id, ChatMessage(content, sender, 1700000000.0))
+    return {"id": chat_id, "name": name, "message_count": len(contents)}
+
+def export(chat_manager, tmp_path, chats, file_name, **kwargs):
+    path = os.path.join(tmp_path, file_name)
+    count = ChatExporter(chat_manager, **kwargs).export(chats, path, title="Export")
+    with open(path, encoding='utf-8') as f:
+        return count, f.read()
+
+def test_export_format_from_extension():
+    assert export_format("chat.MD") == "markdown"
+    assert export_format("chat.htm") == "html"
+    assert export_format("chat.jsonl") == "jsonl"
+    assert export_format("chat.txt") == "text"
+    assert export_format("chat.docx") is None
+
+def test_markdown(chat_manager, tmp_path):
+    chat = stored_chat(chat_manager, "Trip", [("You", "Hello"), ("Athena", "Hi **there**")])
+    count, text = export(chat_manager, tmp_path, [chat], "out.md")
+    assert count == 2
+    assert text.startswith("# Export\n\n")
+    assert "**You** · " in text
+    assert "Hi **there**\n\n" in text
+    assert "## Trip" not in text
+
+def test_text(chat_manager, tmp_path):
+    chat = stored_chat(chat_manager, "Trip", [("You", "Hello")])
+    _, text = export(chat_manager, tmp_path, [chat], "out.txt")
+    assert text.startswith("--- You (")
+    assert text.endswith("Hello\n\n")
+
+def test_jsonl_tags_every_message_with_its_chat(chat_manager, tmp_path):
+    first = stored_chat(chat_manager, "First", [("You", "one"), ("Athena", "two")])
+    second = stored_chat(chat_manager, "Second", [("You", "three")])
+    count, text = export(chat_manager, tmp_path, [first, second], "out.jsonl")
+    records = [json.loads(line) for line in text.splitlines()]
+    assert count == 3
+    assert [(record["chat"], record["seq"], record["content"]) for record in records] == \
+        [("First", 0, "one"), ("First", 1, "two"), ("Second", 0, "three")]
+    assert records[2]["chat_id"] == second["id"]
+
+def test_html_escapes_content_and_adds_chat_headings(chat_manager, tmp_path):
+    first = stored_chat(chat_manager, "A & B", [("You", "<script>alert(1)</script>")])
+    second = stored_chat(chat_manager, "Other", [("Athena", "fine")])
+    _, text = export(chat_manager, tmp_path, [first, second], "out.html")
+    assert text.startswith("<!DOCTYPE html>")
+    assert "<h2>A &amp; B</h2>" in text
+    assert "&lt;script&gt;" in text and "<script>" not in text
+    assert text.endswith("</body></html>\n")
+
+def test_unsaved_tail_follows_the_stored_snapshot(chat_manager, tmp_path):
+    chat = stored_chat(chat_manager, "Live", [("You", "saved")])
+    chat["messages"] = [ChatMessage("unsaved", "Athena", 1700000001.0).to_dict()]
+    # Saved after the export was requested; already part of the tail
+    chat_manager.append_message(chat["id"], ChatMessage("unsaved", "Athena", 1700000001.0))
+    count, text = export(chat_manager, tmp_path, [chat], "out.txt")
+    assert count == 2
+    assert text.count("unsaved") == 1
+
+def test_images_are_embedded_or_linked(chat_manager, tmp_path):
+    image_path = os.path.join(tmp_path, "cat.png")
+    with open(image_path, 'wb') as f:
+        f.write(b"\x89PNG\r\n\x1a\nfake")
+    chat = {"name": "Pics", "messages": [
+        ChatMessage(image_path, "You", 1700000000.0, 'image').to_dict(),
+        ChatMessage(os.path.join(tmp_path, "gone.png"), "You", 1700000000.0, 'image').to_dict(),
+    ]}
+    _, text = export(chat_manager, tmp_path, [chat], "embedded.md")
+    assert "![cat.png](data:image/png;base64," in text
+    assert "[Image missing: gone.png]" in text
+    _, text = export(chat_manager, tmp_path, [chat], "linked.md", embed_images=False)
+    assert "![cat.png](file:///" in text
+
+def test_unsupported_format_writes_nothing(chat_manager, tmp_path):
+    with pytest.raises(ValueError):
+        ChatExporter(chat_manager).export([], os.path.join(tmp_path, "out.docx"))
+    assert os.listdir(tmp_path) == ["chats"]
+
+def test_cancel_removes_the_partial_file(chat_manager, tmp_path):
+    chat = stored_chat(chat_manager, "Long", [("You", str(i)) for i in range(10)])
+    cancel_event = threading.Event()
+    cancel_event.set()
+    path = os.path.join(tmp_path, "out.md")
+    with pytest.raises(ExportCancelled):
+        ChatExporter(chat_manager, progress_interval=2).export([chat], path, cancel_event=cancel_event)
+    assert not os.path.exists(path)
+    assert not os.path.exists(path + ".tmp")
+
+def test_progress_is_reported(chat_manager, tmp_path):
+    chat = stored_chat(chat_manager, "Long", [("You", str(i)) for i in range(5)])
+    progress = []
+    ChatExporter(chat_manager, page_size=2, progress_interval=2).export(
+        [chat], os.path.join(tmp_path, "out.txt"), progress_callback=lambda done, total: progress.append((done, total)))
+    assert progress == [(2, 5), (4, 5), (5, 5)]
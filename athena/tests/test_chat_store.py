@@ -0,0 +1,88 @@
+import json
+import os
+import pytest
+from athena.utils.chat_store import ChatStore
+
+def make_store(tmp_path):
+    return ChatStore(os.path.join(tmp_path, "chats", "chats.sqlite3"))
+
+def test_append_assigns_consecutive_sequence_numbers(tmp_path):
+    store = make_store(tmp_path)
+    chat_id = store.create_chat("First", "llama3")
+    assert store.append_message(chat_id, "You", "hello") == 0
+    assert store.append_messages(chat_id, [("Athena", "hi", "text", 1.0), ("You", "a.png", "image", 2.0)]) == [1, 2]
+    chat = store.get_chat(chat_id)
+    assert chat["message_count"] == 3
+    assert chat["model"] == "llama3"
+    messages = store.load_messages(chat_id)
+    assert [message["seq"] for message in messages] == [0, 1, 2]
+    assert messages[2]["content_type"] == "image"
+    store.close()
+
+def test_load_messages_pages_by_sequence(tmp_path):
+    store = make_store(tmp_path)
+    chat_id = store.create_chat("Long")
+    store.append_messages(chat_id, [("You", f"message {i}", "text", None) for i in range(10)])
+    page = store.load_messages(chat_id, offset=4, limit=3)
+    assert [message["content"] for message in page] == ["message 4", "message 5", "message 6"]
+    assert [message["seq"] for message in store.iter_messages(chat_id, page_size=3)] == list(range(10))
+    store.close()
+
+def test_iter_messages_stops_at_end(tmp_path):
+    store = make_store(tmp_path)
+    chat_id = store.create_chat("Snapshot")
+    store.append_messages(chat_id, [("You", str(i), "text", None) for i in range(7)])
+    assert [message["content"] for message in store.iter_messages(chat_id, page_size=2, end=5)] == \
+        ["0", "1", "2", "3", "4"]
+    assert list(store.iter_messages(chat_id, end=0)) == []
+    store.close()
+
+def test_list_rename_and_delete(tmp_path):
+    store = make_store(tmp_path)
+    first = store.create_chat("First", created_at=1.0)
+    second = store.create_chat("Second", created_at=2.0)
+    store.append_message(first, "You", "newest activity")
+    assert [chat["id"] for chat in store.list_chats()] == [first, second]
+    assert [chat["id"] for chat in store.list_chats(limit=1, offset=1)] == [second]
+    store.rename_chat(second, "Renamed")
+    assert store.find_chat("Renamed")["id"] == second
+    store.delete_chat(first)
+    assert store.get_chat(first) is None
+    assert store.load_messages(first) == []
+    store.close()
+
+def test_unknown_chat_raises(tmp_path):
+    store = make_store(tmp_path)
+    with pytest.raises(KeyError):
+        store.append_message(42, "You", "hello")
+    store.close()
+
+def test_migrate_json_directory_imports_each_file_once(tmp_path):
+    chats_directory = os.path.join(tmp_path, "chats")
+    os.makedirs(chats_directory)
+    messages = [
+        {"sender": "You", "content": "hello", "timestamp": "2024-01-01T10:00:00"},
+        {"sender": "Athena", "content": "hi there", "content_type": "text", "timestamp": "2024-01-01T10:00:05"},
+    ]
+    with open(os.path.join(chats_directory, "Old chat.json"), 'w', encoding='utf-8') as f:
+        json.dump(messages, f)
+    with open(os.path.join(chats_directory, "broken.json"), 'w', encoding='utf-8') as f:
+        f.write("{not json")
+    with open(os.path.join(chats_directory, "object.json"), 'w', encoding='utf-8') as f:
+        json.dump({"messages": []}, f)
+    store = make_store(tmp_path)
+    assert store.migrate_json_directory(chats_directory) == 1
+    assert store.migrate_json_directory(chats_directory) == 0
+    chat = store.find_chat("Old chat")
+    assert chat["message_count"] == 2
+    loaded = store.load_messages(chat["id"])
+    assert [message["sender"] for message in loaded] == ["You", "Athena"]
+    assert loaded[0]["content_type"] == "text"
+    assert loaded[1]["timestamp"] - loaded[0]["timestamp"] == 5
+    assert len(store.list_chats()) == 1
+    store.close()
+
+def test_migrate_missing_directory(tmp_path):
+    store = make_store(tmp_path)
+    assert store.migrate_json_directory(os.path.join(tmp_path, "nowhere")) == 0
+    store.close()
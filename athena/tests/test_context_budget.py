@@ -0,0 +1,75 @@
+from athena.services.context_budget import (ContextBudget, DEFAULT_SERVER_CONTEXT, build_summary_request,
+                                            message_tokens, messages_tokens, parse_model_context)
+
+def turn(role, tokens):
+    # estimate_tokens counts four characters per token
+    return {"role": role, "content": "x" * (tokens * 4)}
+
+def test_window_is_capped_by_the_trained_context():
+    assert ContextBudget(8192, context_length=4096).context_window == 4096
+    assert ContextBudget(2048, context_length=8192).context_window == 2048
+    assert ContextBudget(0, context_length=8192, model_num_ctx=4096).context_window == 4096
+    assert ContextBudget(0).context_window == DEFAULT_SERVER_CONTEXT
+
+def test_reply_reservation_is_at_most_a_quarter():
+    budget = ContextBudget(2048, reply_tokens=2000)
+    assert budget.reply_tokens == 512
+    assert budget.prompt_tokens == 1536
+
+def test_parse_model_context():
+    show = {"model_info": {"llama.context_length": 8192}, "parameters": "stop \"<eot>\"\nnum_ctx 4096"}
+    assert parse_model_context(show) == (8192, 4096)
+    assert parse_model_context({}) == (None, None)
+
+def test_fit_keeps_everything_under_budget():
+    budget = ContextBudget(4096, reply_tokens=1024)
+    messages = [turn("system", 10), turn("user", 100), turn("assistant", 100), turn("user", 100)]
+    assert budget.fit(messages) == (messages, 0)
+
+def test_fit_drops_oldest_whole_turns_and_keeps_system_messages():
+    budget = ContextBudget(1000, reply_tokens=200)  # 800 prompt tokens
+    system = turn("system", 50)
+    history = [turn("user", 200), turn("assistant", 200), turn("user", 200), turn("assistant", 200),
+               turn("user", 100)]
+    fitted, dropped = budget.fit([system] + history)
+    assert dropped == 2
+    assert fitted == [system] + history[2:]
+    assert fitted[1]["role"] == "user"
+    assert messages_tokens(fitted) <= budget.prompt_tokens
+
+def test_fit_always_keeps_the_newest_message():
+    budget = ContextBudget(400, reply_tokens=100)
+    newest = turn("user", 1000)
+    fitted, dropped = budget.fit([turn("user", 10), turn("assistant", 10), newest])
+    assert fitted[-1] is newest
+    assert dropped == 2
+
+def test_image_tokens_are_counted():
+    assert message_tokens({"role": "user", "content": "", "images": ["a", "b"]}) > 1000
+
+def test_summary_cutoff_waits_for_the_threshold():
+    budget = ContextBudget(4096, reply_tokens=1024, summarize_at=0.75)
+    history = [turn("user", 100), turn("assistant", 100)] * 3
+    assert budget.summary_cutoff(history) == 0
+
+def test_summary_cutoff_folds_whole_turns_and_keeps_the_newest():
+    budget = ContextBudget(4096, reply_tokens=1024, summarize_at=0.75, keep_after_summary=0.5)
+    history = [turn("user", 300), turn("assistant", 300)] * 5
+    cutoff = budget.summary_cutoff(history)
+    assert cutoff > 0
+    assert cutoff % 2 == 0
+    assert history[cutoff]["role"] == "user"
+    assert cutoff <= len(history) - 2
+    assert messages_tokens(history[cutoff:]) <= budget.prompt_tokens * 0.75
+
+def test_summary_cutoff_counts_the_existing_summary():
+    budget = ContextBudget(4096, reply_tokens=1024, summarize_at=0.75)
+    history = [turn("user", 300), turn("assistant", 300)] * 3
+    assert budget.summary_cutoff(history) == 0
+    assert budget.summary_cutoff(history, summary_tokens=600) > 0
+
+def test_build_summary_request():
+    request = build_summary_request("Earlier.", [{"role": "user", "content": "Hi"},
+                                                 {"role": "assistant", "content": "Hello"}])
+    assert [message["role"] for message in request] == ["system", "user"]
+    assert request[1]["content"] == "Summary so far:\nEarlier.\n\nNew messages:\nUser: Hi\nAssistant: Hello"
@@ -0,0 +1,111 @@
+import json
+import os
+import threading
+import time
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+from athena.controllers.main_controller import MainController
+from athena.tests.ollama_stub import OllamaStub, chat_frames
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+@pytest.fixture
+def stub():
+    release = threading.Event()
+    release.set()
+
+    def chat(payload):
+        # Held back while the test wants a generation to stay in flight
+        release.wait(5)
+        return 200, chat_frames(f"reply {len(payload['messages'])}")
+
+    stub = OllamaStub({"/api/chat": chat, "/api/generate": lambda payload: (200, {"done": True})})
+    stub.release = release
+    yield stub
+    release.set()
+    stub.close()
+
+@pytest.fixture
+def controller(app, stub, tmp_path):
+    settings_file = os.path.join(tmp_path, "settings.json")
+    with open(settings_file, 'w') as f:
+        json.dump({"ollama_url": stub.url, "working_directory": os.path.join(tmp_path, "workspace"),
+                   "http_max_retries": 0, "max_concurrent_generations": 1}, f)
+    controller = MainController(settings_file)
+    yield controller
+    controller.shutdown()
+    controller.main_window.deleteLater()
+
+def wait_for(app, condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        app.processEvents()
+        time.sleep(0.01)
+
+def chat_requests(stub):
+    return [payload for path, payload in stub.requests if path == "/api/chat"]
+
+def test_turns_are_sent_with_the_whole_conversation(app, stub, controller):
+    session = controller.current_session()
+    for message in ("Hello", "And again"):
+        session.chat_window.display_message("You", message)
+        controller.handle_message_sent(session, message, "llama3")
+        wait_for(app, lambda: not session.is_generating())
+    assert session.conversation.messages == [
+        {"role": "user", "content": "Hello"}, {"role": "assistant", "content": "reply 1"},
+        {"role": "user", "content": "And again"}, {"role": "assistant", "content": "reply 3"}]
+    assert chat_requests(stub)[-1]["messages"] == session.conversation.messages[:3]
+    assert [message.content for message in session.chat_window.chat_history] == \
+        ["Hello", "reply 1", "And again", "reply 3"]
+
+def test_the_user_turn_is_added_before_the_job_runs(app, stub, controller):
+    session = controller.current_session()
+    stub.release.clear()
+    controller.handle_message_sent(session, "Hello", "llama3")
+    assert session.conversation.messages == [{"role": "user", "content": "Hello"}]
+    stub.release.set()
+    wait_for(app, lambda: not session.is_generating())
+    assert len(session.conversation) == 2
+
+def test_new_chat_drops_the_conversation(app, controller):
+    session = controller.current_session()
+    controller.handle_message_sent(session, "Hello", "llama3")
+    wait_for(app, lambda: not session.is_generating())
+    controller.handle_new_chat(session)
+    assert len(session.conversation) == 0
+    assert len(session.chat_window.chat_history) == 0
+
+def test_stopping_a_queued_message_takes_back_its_turn(app, stub, controller):
+    first = controller.current_session()
+    second = controller.open_session()
+    stub.release.clear()
+    controller.handle_message_sent(first, "Busy", "llama3")
+    controller.handle_message_sent(second, "Waiting", "llama3")
+    assert second.generation_job.state == "queued"
+    controller.cancel_generation(second)
+    assert not second.is_generating()
+    assert len(second.conversation) == 0
+    stub.release.set()
+    wait_for(app, lambda: not first.is_generating())
+    assert [payload["messages"][-1]["content"] for payload in chat_requests(stub)] == ["Busy"]
+
+def test_closing_a_tab_cancels_its_generation(app, stub, controller):
+    session = controller.current_session()
+    other = controller.open_session()
+    stub.release.clear()
+    controller.handle_message_sent(session, "Hello", "llama3")
+    job = session.generation_job
+    wait_for(app, lambda: job.state == "running")
+    controller.close_session(session.chat_window)
+    assert job.cancel_token.cancelled
+    assert session not in controller.sessions.values()
+    stub.release.set()
+    wait_for(app, lambda: job.state == "done")
+    assert controller.current_session() is other
@@ -0,0 +1,42 @@
+import pytest
+from athena.services.document_index import BM25Index, chunk_text, tokenize
+
+def test_chunk_text_overlaps_consecutive_chunks():
+    words = [f"w{i}" for i in range(25)]
+    chunks = chunk_text(" ".join(words), chunk_size=10, overlap=3)
+    assert [chunk.split() for chunk in chunks] == [words[0:10], words[7:17], words[14:24], words[21:25]]
+
+def test_chunk_text_short_and_empty_text():
+    assert chunk_text("just a few words", chunk_size=10, overlap=3) == ["just a few words"]
+    assert chunk_text("   \n ", chunk_size=10) == []
+
+def test_chunk_text_clamps_overlap():
+    # An overlap as large as the chunk would never advance
+    chunks = chunk_text("a b c d e f", chunk_size=2, overlap=5)
+    assert chunks == ["a b", "b c", "c d", "d e", "e f"]
+
+def test_chunk_text_rejects_non_positive_size():
+    with pytest.raises(ValueError):
+        chunk_text("text", chunk_size=0)
+
+def test_tokenize_drops_stopwords_and_case():
+    assert tokenize("What is the Capital of France?") == ["capital", "france"]
+
+def test_bm25_ranks_the_matching_chunk_first():
+    index = BM25Index([
+        "The cat sat on the mat.",
+        "Quarterly revenue grew by ten percent in Europe.",
+        "Revenue in Asia was flat; revenue in Europe grew.",
+    ])
+    results = index.search("europe revenue growth", top_k=2)
+    assert [chunk_id for chunk_id, _ in results] == [2, 1]
+    assert all(score > 0 for _, score in results)
+
+def test_bm25_rare_terms_weigh_more():
+    index = BM25Index(["apple banana", "apple cherry", "apple durian"])
+    assert index.idf("durian") > index.idf("apple")
+    assert index.search("apple durian")[0][0] == 2
+
+def test_bm25_no_match_and_empty_index():
+    assert BM25Index(["alpha beta"]).search("gamma") == []
+    assert BM25Index([]).search("anything") == []
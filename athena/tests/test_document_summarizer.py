@@ -0,0 +1,39 @@
+from athena.services.document_summarizer import pack, split_sections
+from athena.utils.tokens import estimate_tokens
+
+def paragraph(tokens, word="word"):
+    # Roughly tokens tokens of text at four characters per token
+    return " ".join([word] * (tokens * 4 // (len(word) + 1)))
+
+def test_pack_joins_consecutive_pieces_up_to_the_limit():
+    pieces = ["a" * 40, "b" * 40, "c" * 40, "d" * 40]  # 10 tokens each
+    assert pack(pieces, 25, "|") == ["a" * 40 + "|" + "b" * 40, "c" * 40 + "|" + "d" * 40]
+
+def test_pack_keeps_an_oversized_piece_on_its_own():
+    pieces = ["a" * 400, "b" * 8, "c" * 8]
+    assert pack(pieces, 10, "|") == ["a" * 400, "b" * 8 + "|" + "c" * 8]
+
+def test_pack_empty():
+    assert pack([], 10, "|") == []
+
+def test_split_sections_breaks_between_paragraphs():
+    paragraphs = [paragraph(40, f"p{i}") for i in range(6)]
+    sections = split_sections("\n\n".join(paragraphs), 100)
+    assert len(sections) == 3
+    assert sections[0] == "\n\n".join(paragraphs[:2])
+    assert "\n\n".join(sections) == "\n\n".join(paragraphs)
+
+def test_split_sections_splits_long_paragraphs_on_sentences():
+    sentences = [f"Sentence {i} " + paragraph(30) + "." for i in range(10)]
+    sections = split_sections(" ".join(sentences), 100)
+    assert len(sections) > 1
+    assert all(estimate_tokens(section) <= 100 for section in sections)
+    assert sections[0].startswith("Sentence 0 ")
+
+def test_split_sections_cuts_text_without_sentence_breaks():
+    sections = split_sections(paragraph(500), 100)
+    assert all(estimate_tokens(section) <= 100 for section in sections)
+    assert sum(len(section.split()) for section in sections) == len(paragraph(500).split())
+
+def test_split_sections_ignores_blank_text():
+    assert split_sections("\n\n  \n\n", 100) == []
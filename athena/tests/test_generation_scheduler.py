@@ -0,0 +1,114 @@
+import threading
+import time
+import pytest
+from athena.services.generation_scheduler import GenerationJob, GenerationScheduler
+
+class BlockingRun:
+    """Job body that runs until released, recording the order jobs started in."""
+
+    def __init__(self, name, started):
+        self.name = name
+        self.started = started
+        self.running = threading.Event()
+        self.release = threading.Event()
+        self.cancelled = False
+
+    def __call__(self, cancel_token):
+        self.started.append(self.name)
+        self.running.set()
+        while not self.release.wait(0.01):
+            if cancel_token.cancelled:
+                self.cancelled = True
+                return
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.01)
+
+@pytest.fixture
+def scheduler():
+    scheduler = GenerationScheduler(max_per_backend=1)
+    yield scheduler
+    scheduler.shutdown()
+
+def submit(scheduler, session_id, backend, name, started):
+    run = BlockingRun(name, started)
+    return scheduler.submit(GenerationJob(session_id, backend, run)), run
+
+def test_cap_is_per_backend(scheduler):
+    started = []
+    first, first_run = submit(scheduler, "a", "http://one", "first", started)
+    second, _ = submit(scheduler, "b", "http://one", "second", started)
+    other, other_run = submit(scheduler, "c", "http://two", "other", started)
+    first_run.running.wait(1)
+    other_run.running.wait(1)
+    assert (first.state, second.state, other.state) == ("running", "queued", "running")
+    assert scheduler.stats() == (2, 1)
+    first_run.release.set()
+    wait_for(lambda: second.state == "running")
+    assert first.state == "done"
+
+def test_raising_the_cap_starts_queued_jobs(scheduler):
+    started = []
+    jobs = [submit(scheduler, "a", "http://one", str(i), started) for i in range(3)]
+    scheduler.set_max_per_backend(3)
+    wait_for(lambda: len(started) == 3)
+    for _, run in jobs:
+        run.release.set()
+
+def test_free_slots_go_round_robin_across_sessions(scheduler):
+    started = []
+    blocker, blocker_run = submit(scheduler, "a", "http://one", "a0", started)
+    runs = [submit(scheduler, "a", "http://one", f"a{i}", started)[1] for i in (1, 2)]
+    runs.append(submit(scheduler, "b", "http://one", "b1", started)[1])
+    blocker_run.running.wait(1)
+    blocker_run.release.set()
+    for name in ("a1", "b1", "a2"):
+        wait_for(lambda: started[-1] == name)
+        next(run for run in runs if run.name == name).release.set()
+    assert started == ["a0", "a1", "b1", "a2"]
+
+def test_cancel_queued_job_never_runs(scheduler):
+    started = []
+    first, first_run = submit(scheduler, "a", "http://one", "first", started)
+    queued, _ = submit(scheduler, "b", "http://one", "queued", started)
+    assert scheduler.cancel(queued) is False
+    assert queued.state == "cancelled"
+    assert scheduler.stats() == (1, 0)
+    first_run.release.set()
+    wait_for(lambda: first.state == "done")
+    assert started == ["first"]
+
+def test_cancel_running_job_stops_it(scheduler):
+    started = []
+    job, run = submit(scheduler, "a", "http://one", "job", started)
+    run.running.wait(1)
+    assert scheduler.cancel(job) is True
+    wait_for(lambda: job.state == "done")
+    assert run.cancelled
+
+def test_cancel_finished_job_reports_not_running(scheduler):
+    started = []
+    job, run = submit(scheduler, "a", "http://one", "job", started)
+    run.release.set()
+    wait_for(lambda: job.state == "done")
+    assert scheduler.cancel(job) is False
+    assert job.state == "done"
+
+def test_failed_over_job_counts_against_its_new_backend(scheduler):
+    started = []
+    moved, moved_run = submit(scheduler, "a", "http://one", "moved", started)
+    moved_run.running.wait(1)
+    # The request behind the job was sent to another backend
+    moved.cancel_token.on_backend("http://two")
+    assert moved.backend == "http://two"
+    waiting, _ = submit(scheduler, "b", "http://two", "waiting", started)
+    freed, freed_run = submit(scheduler, "c", "http://one", "freed", started)
+    freed_run.running.wait(1)
+    assert (waiting.state, freed.state) == ("queued", "running")
+    moved_run.release.set()
+    wait_for(lambda: waiting.state == "running")
+    freed_run.release.set()
@@ -0,0 +1,68 @@
+import base64
+import os
+import pytest
+from PyQt6.QtGui import QColor, QImage
+from athena.services.image_store import ImageStore
+
+def make_image(width, height, alpha=False):
+    image = QImage(width, height, QImage.Format.Format_ARGB32 if alpha else QImage.Format.Format_RGB32)
+    image.fill(QColor(255, 0, 0, 128 if alpha else 255))
+    return image
+
+@pytest.fixture
+def store(tmp_path):
+    return ImageStore(str(tmp_path / "images"), max_dimension=64, thumbnail_size=16, quality=80)
+
+def test_images_are_stored_by_content_hash(store):
+    first = store.import_image(make_image(100, 50))
+    again = store.import_image(make_image(100, 50))
+    other = store.import_image(make_image(100, 51))
+    assert first == again
+    assert other["digest"] != first["digest"]
+    assert os.path.basename(first["path"]) == first["digest"] + ".png"
+    assert os.path.dirname(first["path"]).endswith(first["digest"][:2])
+
+def test_payload_and_thumbnail_are_downscaled(store):
+    record = store.import_image(make_image(200, 100))
+    payload = QImage(record["payload"])
+    thumbnail = QImage(record["thumbnail"])
+    assert (payload.width(), payload.height()) == (64, 32)
+    assert (thumbnail.width(), thumbnail.height()) == (16, 8)
+    # Without transparency the payload is recompressed as JPEG
+    assert record["payload"].endswith(".jpg")
+    assert QImage(record["path"]).width() == 200
+
+def test_transparent_images_keep_png_payloads(store):
+    record = store.import_image(make_image(10, 10, alpha=True))
+    assert record["payload"].endswith(".png")
+    # Small images are not scaled up
+    assert QImage(record["payload"]).width() == 10
+
+def test_files_are_imported_with_their_extension(store, tmp_path):
+    source = str(tmp_path / "photo.JPG")
+    make_image(80, 80).save(source, "JPG")
+    record = store.import_image(source)
+    assert record["path"].endswith(".jpg")
+    with open(source, 'rb') as f:
+        with open(record["path"], 'rb') as stored:
+            assert stored.read() == f.read()
+
+def test_a_new_payload_size_is_encoded_once(store):
+    record = store.import_image(make_image(200, 200))
+    store.configure(max_dimension=32, thumbnail_size=16, quality=80)
+    smaller = store.import_image(make_image(200, 200))
+    assert smaller["payload"] != record["payload"]
+    assert QImage(smaller["payload"]).width() == 32
+    assert os.path.exists(record["payload"])
+
+def test_encode_payload_is_base64_of_the_payload_file(store):
+    record = store.import_image(make_image(20, 20))
+    with open(record["payload"], 'rb') as f:
+        assert base64.b64decode(store.encode_payload(record)) == f.read()
+
+def test_unreadable_files_are_rejected(store, tmp_path):
+    source = str(tmp_path / "broken.png")
+    with open(source, 'wb') as f:
+        f.write(b"not an image")
+    with pytest.raises(ValueError):
+        store.import_image(source)
@@ -0,0 +1,119 @@
+import pytest
+import requests
+from athena.services.llm_service import LLMService
+from athena.services.response_cache import ResponseCache
+from athena.tests.ollama_stub import OllamaStub, chat_frames
+
+# Nothing listens on port 1, so connecting fails straight away
+DEAD_URL = "http://127.0.0.1:1"
+
+@pytest.fixture
+def stubs():
+    started = []
+
+    def start(routes):
+        stub = OllamaStub(routes)
+        started.append(stub)
+        return stub
+
+    yield start
+    for stub in started:
+        stub.close()
+
+def make_service(url, backend_urls=None):
+    return LLMService(url, {"connect_timeout": 1.0, "read_timeout": 2.0, "max_retries": 0}, backend_urls)
+
+def fake_embeddings(payload):
+    # One two-dimensional vector per input, derived from its length
+    return 200, {"embeddings": [[float(len(text)), 1.0] for text in payload["input"]]}
+
+def test_embed_sends_the_batch_in_one_request(stubs):
+    stub = stubs({"/api/embed": fake_embeddings})
+    service = make_service(stub.url)
+    assert service.embed(["a", "bbb"], "nomic-embed-text") == [[1.0, 1.0], [3.0, 1.0]]
+    assert stub.requests == [("/api/embed", {"model": "nomic-embed-text", "input": ["a", "bbb"]})]
+    service.close()
+
+def test_embed_rejects_a_short_answer(stubs):
+    stub = stubs({"/api/embed": lambda payload: (200, {"embeddings": [[1.0, 0.0]]})})
+    service = make_service(stub.url)
+    with pytest.raises(ValueError):
+        service.embed(["a", "b"], "nomic-embed-text")
+    service.close()
+
+@pytest.mark.parametrize("setting, sent", [("-1", -1), ("300", 300), ("30m", "30m"), (" 1.5 ", 1.5), (-1, -1)])
+def test_keep_alive_numbers_are_sent_as_numbers(stubs, setting, sent):
+    stub = stubs({"/api/embed": fake_embeddings})
+    service = make_service(stub.url)
+    service.set_keep_alive(setting)
+    service.embed(["a"], "nomic-embed-text")
+    assert stub.requests[-1][1]["keep_alive"] == sent
+    service.close()
+
+def test_blank_keep_alive_is_left_to_the_server(stubs):
+    stub = stubs({"/api/embed": fake_embeddings})
+    service = make_service(stub.url)
+    service.set_keep_alive("")
+    service.embed(["a"], "nomic-embed-text")
+    assert "keep_alive" not in stub.requests[-1][1]
+    service.close()
+
+def cached_service(stub, tmp_path):
+    service = make_service(stub.url)
+    service.model_digests["llama3"] = "sha-llama3"
+    service.set_generation_options(temperature=0, seed=1)
+    service.set_response_cache(ResponseCache(str(tmp_path)))
+    return service
+
+def test_complete_streams_are_cached(stubs, tmp_path):
+    stub = stubs({"/api/chat": lambda payload: (200, chat_frames("The answer"))})
+    service = cached_service(stub, tmp_path)
+    messages = [{"role": "user", "content": "Question?"}]
+    assert "".join(service.chat_stream(messages, "llama3")) == "The answer"
+    assert "".join(service.chat_stream(messages, "llama3")) == "The answer"
+    assert len(stub.requests) == 1
+    service.close()
+
+def test_stream_cut_short_is_not_cached(stubs, tmp_path):
+    answers = iter([chat_frames("The ans", done=False), chat_frames("The answer")])
+    stub = stubs({"/api/chat": lambda payload: (200, next(answers))})
+    service = cached_service(stub, tmp_path)
+    messages = [{"role": "user", "content": "Question?"}]
+    assert "".join(service.chat_stream(messages, "llama3")) == "The ans"
+    assert "".join(service.chat_stream(messages, "llama3")) == "The answer"
+    assert len(stub.requests) == 2
+    service.close()
+
+def test_post_fails_over_when_a_backend_is_unreachable(stubs):
+    stub = stubs({"/api/embed": fake_embeddings})
+    service = make_service(DEAD_URL, [stub.url])
+    assert service.embed(["a"], "nomic-embed-text") == [[1.0, 1.0]]
+    assert not service.pool.backends[DEAD_URL].healthy
+    assert service.route("nomic-embed-text") == stub.url
+    service.close()
+
+@pytest.mark.parametrize("status", [502, 503, 504])
+def test_post_fails_over_on_an_overloaded_backend(stubs, status):
+    busy = stubs({"/api/embed": lambda payload: (status, None)})
+    stub = stubs({"/api/embed": fake_embeddings})
+    service = make_service(busy.url, [stub.url])
+    assert service.embed(["a"], "nomic-embed-text") == [[1.0, 1.0]]
+    assert len(busy.requests) == 1
+    assert not service.pool.backends[busy.url].healthy
+    service.close()
+
+def test_post_falls_through_a_backend_without_the_model(stubs):
+    missing = stubs({"/api/embed": lambda payload: (404, None)})
+    stub = stubs({"/api/embed": fake_embeddings})
+    service = make_service(missing.url, [stub.url])
+    assert service.embed(["a"], "nomic-embed-text") == [[1.0, 1.0]]
+    # Lacking a model is not a fault of the backend
+    assert service.pool.backends[missing.url].healthy
+    service.close()
+
+def test_post_raises_the_last_error_when_every_backend_fails(stubs):
+    busy = stubs({"/api/embed": lambda payload: (503, None)})
+    service = make_service(DEAD_URL, [busy.url])
+    with pytest.raises(requests.HTTPError):
+        service.embed(["a"], "nomic-embed-text")
+    service.close()
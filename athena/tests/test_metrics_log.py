@@ -0,0 +1,41 @@
+import json
+import os
+from athena.utils.metrics_log import MetricsLog, percentile
+
+def test_percentile_uses_the_nearest_rank():
+    values = list(range(100, 0, -1))
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile([7], 0.95) == 7
+    assert percentile([], 0.5) is None
+
+def test_summary_has_p50_and_p95_per_model(tmp_path):
+    log = MetricsLog(str(tmp_path))
+    for index in range(1, 21):
+        log.record({"model": "llama3", "ttft_ms": index * 10.0, "tokens_per_second": float(index)})
+    log.record({"model": "phi3", "ttft_ms": 5.0, "tokens_per_second": None})
+    summary = log.summary()
+    assert summary["llama3"]["count"] == 20
+    assert summary["llama3"]["ttft_ms"] == {"p50": 100.0, "p95": 190.0}
+    assert summary["llama3"]["tokens_per_second"] == {"p50": 10.0, "p95": 19.0}
+    assert "tokens_per_second" not in summary["phi3"]
+    with open(os.path.join(tmp_path, "summary.json"), encoding='utf-8') as f:
+        assert json.load(f) == summary
+
+def test_summary_covers_the_recent_window_and_survives_a_restart(tmp_path):
+    log = MetricsLog(str(tmp_path), window=10)
+    for index in range(1, 31):
+        log.record({"model": "llama3", "wall_ms": float(index)})
+    assert log.summary()["llama3"]["wall_ms"] == {"p50": 25.0, "p95": 30.0}
+    reopened = MetricsLog(str(tmp_path), window=10)
+    assert reopened.summary() == log.summary()
+
+def test_log_rotates_by_size(tmp_path):
+    log = MetricsLog(str(tmp_path), max_bytes=200, backup_count=2)
+    for index in range(20):
+        log.record({"model": "llama3", "wall_ms": float(index)})
+    names = sorted(os.listdir(tmp_path))
+    assert names == ["metrics.jsonl", "metrics.jsonl.1", "metrics.jsonl.2", "summary.json"]
+    assert all(os.path.getsize(os.path.join(tmp_path, name)) <= 200 for name in names if name != "summary.json")
+    # Rotation does not reset the aggregates
+    assert log.summary()["llama3"]["count"] == 20
@@ -0,0 +1,56 @@
+import os
+import pytest
+from athena.models.chat import Chat, ChatMessage
+from athena.utils.chat_store import ChatStore
+
+def make_stored_chat(tmp_path, count, **kwargs):
+    store = ChatStore(os.path.join(tmp_path, "chats.sqlite3"))
+    chat_id = store.create_chat("Paged")
+    store.append_messages(chat_id, [("You", f"message {i}", "text", float(i)) for i in range(count)])
+    return store, Chat.load(chat_id, "Paged", store, count, **kwargs)
+
+def test_message_round_trip():
+    message = ChatMessage("hello", "You", 12.5)
+    copy = ChatMessage.from_dict(message.to_dict())
+    assert (copy.content, copy.sender, copy.timestamp, copy.content_type) == ("hello", "You", 12.5, "text")
+
+def test_load_keeps_only_the_newest_messages_resident(tmp_path):
+    store, chat = make_stored_chat(tmp_path, 100, max_resident=20, page_size=10)
+    assert len(chat) == 100
+    assert len(chat.messages) == 10
+    assert chat.paged_out == 90
+    assert chat[-1].content == "message 99"
+    store.close()
+
+def test_indexing_pages_in_from_the_store(tmp_path):
+    store, chat = make_stored_chat(tmp_path, 100, max_resident=20, page_size=10, cached_pages=2)
+    assert chat[5].content == "message 5"
+    assert chat[37].content == "message 37"
+    assert [message.content for message in chat[88:92]] == [f"message {i}" for i in range(88, 92)]
+    assert len(chat.page_cache) <= 2
+    assert [message.content for message in chat][:3] == ["message 0", "message 1", "message 2"]
+    store.close()
+
+def test_append_pages_out_only_persisted_messages(tmp_path):
+    store, chat = make_stored_chat(tmp_path, 10, max_resident=10, page_size=5)
+    for i in range(10, 16):
+        chat.append(ChatMessage(f"message {i}", "You"))
+    # Nothing new is persisted yet, so only the ten stored messages may leave memory
+    assert chat.paged_out <= 10
+    assert len(chat) == 16
+    assert chat[15].content == "message 15"
+    store.close()
+
+def test_pop_and_remove_only_touch_unsaved_messages(tmp_path):
+    store, chat = make_stored_chat(tmp_path, 3)
+    streaming = ChatMessage("", "Athena")
+    chat.append(streaming)
+    chat.append(ChatMessage("note", "System"))
+    chat.remove(streaming)
+    assert [message.content for message in chat.messages[-2:]] == ["message 2", "note"]
+    assert chat.pop().content == "note"
+    with pytest.raises(IndexError):
+        chat.pop()
+    with pytest.raises(ValueError):
+        chat.remove(chat[0])
+    store.close()
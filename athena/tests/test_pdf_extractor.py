@@ -0,0 +1,55 @@
+import threading
+import pytest
+from athena.services import pdf_extractor
+from athena.services.pdf_extractor import ExtractionCancelled, count_pages, iter_pdf_pages
+
+def write_pdf(path, pages):
+    """Write a minimal uncompressed PDF whose page i reads "page i"."""
+    objects = [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>", b""]
+    kids = []
+    for page in range(pages):
+        stream = b"BT /F1 12 Tf 72 720 Td (page %d) Tj ET" % page
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+                       b"/Resources << /Font << /F1 1 0 R >> >> >>" % len(objects))
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % kid for kid in kids), pages)
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, data in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, data)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, len(objects), xref)
+    with open(path, 'wb') as f:
+        f.write(out)
+    return str(path)
+
+def test_small_documents_are_read_in_process(tmp_path):
+    path = write_pdf(tmp_path / "small.pdf", 3)
+    assert count_pages(path) == 3
+    pages = list(iter_pdf_pages(path, max_workers=4))
+    assert [(index, text.strip(), count) for index, text, count in pages] == \
+        [(0, "page 0", 3), (1, "page 1", 3), (2, "page 2", 3)]
+
+def test_parallel_extraction_yields_pages_in_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_extractor, "PARALLEL_MIN_PAGES", 4)
+    path = write_pdf(tmp_path / "large.pdf", 20)
+    pages = list(iter_pdf_pages(path, max_workers=2, pages_per_task=3))
+    assert [index for index, _, _ in pages] == list(range(20))
+    assert [text.strip() for _, text, _ in pages] == [f"page {index}" for index in range(20)]
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_cancel_stops_the_extraction(tmp_path, monkeypatch, parallel):
+    if parallel:
+        monkeypatch.setattr(pdf_extractor, "PARALLEL_MIN_PAGES", 4)
+    path = write_pdf(tmp_path / "doc.pdf", 12)
+    cancel_event = threading.Event()
+    pages = iter_pdf_pages(path, max_workers=2, pages_per_task=2, cancel_event=cancel_event)
+    next(pages)
+    cancel_event.set()
+    with pytest.raises(ExtractionCancelled):
+        list(pages)
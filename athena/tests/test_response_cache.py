@@ -0,0 +1,46 @@
+import os
+from athena.services.response_cache import ResponseCache
+
+REQUEST = {"messages": [{"role": "user", "content": "hi"}]}
+OPTIONS = {"temperature": 0, "num_ctx": 4096}
+
+def test_key_ignores_option_order():
+    key = ResponseCache.make_key("llama3", "sha-1", REQUEST, {"temperature": 0, "num_ctx": 4096})
+    assert key == ResponseCache.make_key("llama3", "sha-1", REQUEST, {"num_ctx": 4096, "temperature": 0})
+
+def test_key_changes_with_every_input():
+    key = ResponseCache.make_key("llama3", "sha-1", REQUEST, OPTIONS)
+    others = [
+        ResponseCache.make_key("mistral", "sha-1", REQUEST, OPTIONS),
+        ResponseCache.make_key("llama3", "sha-2", REQUEST, OPTIONS),
+        ResponseCache.make_key("llama3", "sha-1", {"messages": [{"role": "user", "content": "hey"}]}, OPTIONS),
+        ResponseCache.make_key("llama3", "sha-1", REQUEST, {"temperature": 0, "num_ctx": 8192}),
+    ]
+    assert key not in others
+    assert len(set(others)) == len(others)
+
+def test_missing_options_match_empty_options():
+    assert ResponseCache.make_key("m", None, REQUEST, None) == ResponseCache.make_key("m", None, REQUEST, {})
+
+def test_only_deterministic_requests_are_cacheable():
+    assert ResponseCache.is_cacheable({"temperature": 0})
+    assert ResponseCache.is_cacheable({"temperature": 0.7, "seed": 42})
+    assert not ResponseCache.is_cacheable({"temperature": 0.7})
+    assert not ResponseCache.is_cacheable(None)
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    cache = ResponseCache(str(tmp_path), memory_entries=1)
+    key = ResponseCache.make_key("llama3", "sha-1", REQUEST, OPTIONS)
+    cache.put(key, "Hello there")
+    cache.put(ResponseCache.make_key("llama3", "sha-1", {"prompt": "other"}, OPTIONS), "Other")
+    assert key not in cache.memory
+    assert cache.get(key) == "Hello there"
+    assert ResponseCache(str(tmp_path)).get(key) == "Hello there"
+    assert cache.get("0" * 64) is None
+
+def test_eviction_keeps_the_disk_tier_under_its_cap(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_disk_bytes=2000)
+    for i in range(20):
+        cache.put(ResponseCache.make_key("m", None, {"prompt": str(i)}, OPTIONS), "x" * 200)
+    assert cache.disk_bytes <= 2000
+    assert sum(os.path.getsize(path) for path, _, _ in cache.scan()) == cache.disk_bytes
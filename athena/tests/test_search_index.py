@@ -0,0 +1,59 @@
+import os
+from athena.utils.search_index import HIGHLIGHT_END, HIGHLIGHT_START, SearchIndex, build_match_query
+
+def make_index(tmp_path):
+    return SearchIndex(os.path.join(tmp_path, "search.sqlite3"))
+
+def test_build_match_query_quotes_terms_and_prefixes_the_last():
+    assert build_match_query("hello world") == '"hello" "world"*'
+    assert build_match_query("  zebra ") == '"zebra"*'
+
+def test_build_match_query_neutralizes_fts_syntax():
+    assert build_match_query('title:foo OR "bar" NEAR(baz) -qux*') == \
+        '"title" "foo" "OR" "bar" "NEAR" "baz" "qux"*'
+    assert build_match_query("*** () ::") is None
+    assert build_match_query("") is None
+
+def test_build_match_query_keeps_unicode_words():
+    assert build_match_query("café Zürich") == '"café" "Zürich"*'
+
+def test_search_finds_chats_and_documents(tmp_path):
+    index = make_index(tmp_path)
+    index.add_messages(1, "Trip", [(0, "You", "Where do zebras live?"), (1, "Athena", "On the savanna.")])
+    index.add_document("doc-1", "Field guide", ["Zebras are striped.", "Lions hunt at night."])
+    results = index.search("zebra")
+    assert {(result["kind"], result["ref"]) for result in results} == {("chat", "1"), ("document", "doc-1")}
+    assert all(HIGHLIGHT_START in result["snippet"] and HIGHLIGHT_END in result["snippet"] for result in results)
+    assert [result["ref"] for result in index.search("zebra", kind="document")] == ["doc-1"]
+    index.close()
+
+def test_add_messages_skips_indexed_sequence_numbers(tmp_path):
+    index = make_index(tmp_path)
+    index.add_messages(1, "Chat", [(0, "You", "alpha")])
+    index.add_messages(1, "Chat", [(0, "You", "alpha"), (1, "Athena", "beta")])
+    assert index.get_indexed_seq(1) == 2
+    assert len(index.search("alpha")) == 1
+    index.close()
+
+def test_rename_and_remove(tmp_path):
+    index = make_index(tmp_path)
+    index.add_messages(1, "Old name", [(0, "You", "gamma"), (1, "Athena", "gamma again")])
+    index.add_messages(2, "Other", [(0, "You", "gamma")])
+    index.rename_chat(1, "New name")
+    assert {result["title"] for result in index.search("gamma")} == {"New name", "Other"}
+    index.remove_chat(1)
+    assert [result["ref"] for result in index.search("gamma")] == ["2"]
+    assert index.get_indexed_seq(1) == 0
+    index.close()
+
+def test_documents_are_replaced_and_removed(tmp_path):
+    index = make_index(tmp_path)
+    index.add_document("doc-1", "Guide", ["first version"])
+    index.add_document("doc-1", "Guide", ["second version"])
+    assert index.has_document("doc-1")
+    assert index.search("first") == []
+    assert len(index.search("second")) == 1
+    index.remove_document("doc-1")
+    assert not index.has_document("doc-1")
+    assert index.search("second") == []
+    index.close()
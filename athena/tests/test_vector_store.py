@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from athena.services.document_service import DocumentService
+from athena.services.llm_service import LLMService
+from athena.services.vector_store import VectorStore
+from athena.tests.ollama_stub import OllamaStub
+
+def test_search_ranks_by_cosine_similarity(tmp_path):
+    store = VectorStore(str(tmp_path))
+    store.add(["east", "north", "north-east"], [[1, 0], [0, 3], [2, 2]])
+    results = store.search([1, 0.1], top_k=2)
+    assert [key for key, _ in results] == ["east", "north-east"]
+    assert results[0][1] == pytest.approx(0.995, abs=1e-3)
+    assert [key for key, _ in store.search([1, 0.1], keys=["north", "north-east"])] == ["north-east", "north"]
+    store.close()
+
+def test_keys_are_stored_once(tmp_path):
+    store = VectorStore(str(tmp_path))
+    store.add(["a", "b", "a"], [[1, 0], [0, 1], [5, 5]])
+    store.add(["b", "c"], [[1, 1], [1, -1]])
+    assert len(store) == 3
+    assert store.missing(["a", "c", "d"]) == ["d"]
+    # The first vector stored for a key wins
+    assert store.search([1, 0], keys=["a"])[0][1] == pytest.approx(1.0)
+    store.close()
+
+def test_dimension_must_match(tmp_path):
+    store = VectorStore(str(tmp_path))
+    store.add(["a"], [[1, 0]])
+    with pytest.raises(ValueError):
+        store.add(["b"], [[1, 0, 0]])
+    store.close()
+
+def test_vectors_survive_a_reopen_and_growth(tmp_path):
+    store = VectorStore(str(tmp_path))
+    count = VectorStore.INITIAL_CAPACITY + 10
+    vectors = np.random.default_rng(0).normal(size=(count, 8))
+    store.add([f"k{i}" for i in range(count)], vectors)
+    store.close()
+    reopened = VectorStore(str(tmp_path))
+    assert len(reopened) == count
+    assert reopened.search(vectors[count - 1], top_k=1)[0][0] == f"k{count - 1}"
+    reopened.close()
+
+def test_a_partly_written_key_is_dropped_on_load(tmp_path):
+    store = VectorStore(str(tmp_path))
+    store.add(["a", "b"], [[1, 0], [0, 1]])
+    store.close()
+    with open(store.keys_path, 'a', encoding='utf-8') as f:
+        f.write("c-cut-sh")
+    reopened = VectorStore(str(tmp_path))
+    assert len(reopened) == 2
+    reopened.add(["c"], [[1, 1]])
+    reopened.close()
+    with open(store.keys_path, encoding='utf-8') as f:
+        assert f.read() == "a\nb\nc\n"
+
+def test_document_chunks_are_embedded_once_through_the_endpoint(tmp_path):
+    vectors = {"apples": [1.0, 0.0], "pears": [0.0, 1.0]}
+
+    def embed(payload):
+        return 200, {"embeddings": [vectors["apples" if "apple" in text else "pears"] for text in payload["input"]]}
+
+    stub = OllamaStub({"/api/embed": embed})
+    llm_service = LLMService(stub.url, {"max_retries": 0})
+    service = DocumentService(str(tmp_path), chunk_size=4, chunk_overlap=0)
+    service.index_document("doc", "apple pie is sweet pears are juicy and green")
+    embed_fn = lambda texts: llm_service.embed(texts, "nomic-embed-text")
+    assert service.embed_document("doc", embed_fn, "nomic-embed-text", batch_size=2) == 3
+    assert len(stub.requests) == 2
+    assert service.is_embedded("doc", "nomic-embed-text")
+    assert service.get_semantic_context("doc", [1.0, 0.0], "nomic-embed-text", top_k=1) == "apple pie is sweet"
+    # After a restart the stored vectors are reused instead of embedding the chunks again
+    service.get_vector_store("nomic-embed-text").close()
+    restarted = DocumentService(str(tmp_path), chunk_size=4, chunk_overlap=0)
+    restarted.index_document("doc", "apple pie is sweet pears are juicy and green")
+    assert restarted.embed_document("doc", embed_fn, "nomic-embed-text") == 0
+    assert len(stub.requests) == 2
+    llm_service.close()
+    stub.close()
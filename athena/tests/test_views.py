@@ -0,0 +1,72 @@
+import os
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+from athena.views.chat_window import ChatWindow
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+@pytest.fixture
+def chat_window(app):
+    window = ChatWindow()
+    yield window
+    window.deleteLater()
+
+def shown_text(chat_window):
+    return chat_window.chat_display.toPlainText()
+
+def test_stream_chunks_are_appended_to_the_reply(chat_window):
+    finished = []
+    chat_window.message_added.connect(finished.append)
+    chat_window.display_message("You", "Hello")
+    chat_window.begin_stream_message("Athena")
+    assert not chat_window.send_button.isEnabled()
+    for chunk in ["Hi", " there", ",\nfriend"]:
+        chat_window.append_stream_chunk(chunk)
+    assert shown_text(chat_window).endswith("Hi there,\nfriend")
+    chat_window.end_stream_message("Hi there,\nfriend")
+    assert chat_window.send_button.isEnabled()
+    assert [(message.sender, message.content) for message in finished] == \
+        [("You", "Hello"), ("Athena", "Hi there,\nfriend")]
+
+def test_messages_shown_during_a_stream_stay_below_the_reply(chat_window):
+    chat_window.begin_stream_message("Athena")
+    chat_window.append_stream_chunk("first")
+    chat_window.display_message("System", "note")
+    chat_window.append_stream_chunk(" second")
+    text = shown_text(chat_window)
+    assert text.index("first second") < text.index("note")
+
+def test_discarded_reply_leaves_the_rest_of_the_chat(chat_window):
+    chat_window.display_message("You", "Hello")
+    chat_window.begin_stream_message("Athena")
+    chat_window.display_message("System", "note")
+    chat_window.discard_stream_message()
+    assert [message.content for message in chat_window.chat_history] == ["Hello", "note"]
+    assert chat_window.send_button.isEnabled()
+    chat_window.append_stream_chunk("late")
+    assert "late" not in shown_text(chat_window)
+
+def test_messages_are_appended_without_rebuilding(chat_window):
+    chat_window.display_message("You", "one")
+    first_fragment = chat_window.get_message_html(chat_window.chat_history[0])
+    chat_window.display_message("Athena", "two")
+    assert "one" in shown_text(chat_window) and "two" in shown_text(chat_window)
+    assert chat_window.get_message_html(chat_window.chat_history[0]) is first_fragment
+    assert len(chat_window.fragment_cache) == 2
+
+def test_long_histories_switch_to_the_virtualized_view(chat_window):
+    chat_window.set_virtualization_threshold(3)
+    for index in range(3):
+        chat_window.display_message("You", f"message {index}")
+    assert not chat_window.is_virtualized()
+    chat_window.begin_stream_message("Athena")
+    assert chat_window.is_virtualized()
+    chat_window.append_stream_chunk("streamed")
+    chat_window.end_stream_message()
+    assert chat_window.chat_list_view.model().rowCount() == 4
+    assert chat_window.chat_history[3].content == "streamed"
@@ -1,34 +1,91 @@
 # athena/utils/chat_manager.py
 import os
-import json
-from datetime import datetime
+import threading
+from athena.utils.chat_store import ChatStore
+
+CHAT_DATABASE = "chats.sqlite3"
 
 class ChatManager:
-    def __init__(self, working_directory):
-        self.working_directory = working_directory
-        self.chats_directory = os.path.join(working_directory, 'chats')
-        os.makedirs(self.chats_directory, exist_ok=True)
+    def __init__(self, working_directory, search_index=None):
+        self.store = None
+        self.search_index = search_index
+        self.import_lock = threading.Lock()
+        self.set_working_directory(working_directory)
+
+    def set_search_index(self, search_index):
+        self.search_index = search_index
+        if search_index is not None:
+            self.sync_search_index()
+
+    def sync_search_index(self):
+        # Catch the index up with chats written before it existed (or by a migration)
+        for chat in self.store.list_chats():
+            next_seq = self.search_index.get_indexed_seq(chat["id"])
+            if next_seq >= chat["message_count"]:
+                continue
+            messages = [(message["seq"], message["sender"], message["content"])
+                        for message in self.store.iter_messages(chat["id"])
+                        if message["seq"] >= next_seq and message["content_type"] == 'text']
+            if messages:
+                self.search_index.add_messages(chat["id"], chat["name"], messages)
+
+    def create_chat(self, chat_name, model=None):
+        return self.store.create_chat(chat_name, model)
+
+    def append_message(self, chat_id, message):
+        seq = self.store.append_message(chat_id, message.sender, message.content,
+                                        message.content_type, message.timestamp)
+        if self.search_index is not None and message.content_type == 'text':
+            chat = self.store.get_chat(chat_id)
+            self.search_index.add_messages(chat_id, chat["name"], [(seq, message.sender, message.content)])
+        return seq
 
-    def save_chat(self, chat_id, chat_name, messages):
-        file_name = f"{chat_id}_{chat_name}.json"
-        file_path = os.path.join(self.chats_directory, file_name)
-        with open(file_path, 'w') as f:
-            json.dump([msg.__dict__ for msg in messages], f, indent=4, default=str)
+    def load_messages(self, chat_id, offset=0, limit=500):
+        return self.store.load_messages(chat_id, offset, limit)
 
-    def load_chat(self, file_name):
-        file_path = os.path.join(self.chats_directory, file_name)
-        with open(file_path, 'r') as f:
-            return json.load(f)
+    def iter_chat(self, chat_id, page_size=500, end=None):
+        return self.store.iter_messages(chat_id, page_size, end)
 
-    def list_chats(self):
-        return [f for f in os.listdir(self.chats_directory) if f.endswith('.json')]
+    def find_chat(self, chat_name):
+        return self.store.find_chat(chat_name)
 
-    def rename_chat(self, old_name, new_name):
-        old_path = os.path.join(self.chats_directory, old_name)
-        new_path = os.path.join(self.chats_directory, new_name)
-        os.rename(old_path, new_path)
+    def list_chats(self, limit=-1, offset=0):
+        return self.store.list_chats(limit, offset)
+
+    def rename_chat(self, chat_id, new_name):
+        self.store.rename_chat(chat_id, new_name)
+        if self.search_index is not None:
+            self.search_index.rename_chat(chat_id, new_name)
+
+    def delete_chat(self, chat_id):
+        self.store.delete_chat(chat_id)
+        if self.search_index is not None:
+            self.search_index.remove_chat(chat_id)
+
+    def get_chat(self, chat_id):
+        return self.store.get_chat(chat_id)
 
     def set_working_directory(self, new_directory):
+        # Returns True when a different store was opened; call import_saved_chats() afterwards
+        if self.store is not None and new_directory == self.working_directory:
+            return False
         self.working_directory = new_directory
         self.chats_directory = os.path.join(new_directory, 'chats')
-        os.makedirs(self.chats_directory, exist_ok=True)
\ No newline at end of file
+        os.makedirs(self.chats_directory, exist_ok=True)
+        if self.store is not None:
+            self.store.close()
+        self.store = ChatStore(os.path.join(self.chats_directory, CHAT_DATABASE))
+        return True
+
+    def import_saved_chats(self):
+        # Migrates legacy JSON chats and catches the search index up; slow on a
+        # large workspace, so the controller runs it off the GUI thread
+        with self.import_lock:
+            migrated = self.store.migrate_json_directory(self.chats_directory)
+            if self.search_index is not None:
+                self.sync_search_index()
+        return migrated
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
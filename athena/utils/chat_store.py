@@ -0,0 +1,196 @@
+# athena/utils/chat_store.py
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chats (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    model TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    message_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS chats_updated_at ON chats(updated_at DESC);
+CREATE INDEX IF NOT EXISTS chats_name ON chats(name);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    chat_id INTEGER NOT NULL REFERENCES chats(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    sender TEXT NOT NULL,
+    content TEXT NOT NULL,
+    content_type TEXT NOT NULL DEFAULT 'text',
+    timestamp REAL NOT NULL,
+    UNIQUE (chat_id, seq)
+);
+CREATE TABLE IF NOT EXISTS imported_files (
+    path TEXT PRIMARY KEY,
+    chat_id INTEGER,
+    imported_at REAL NOT NULL
+);
+"""
+
+def to_epoch(timestamp):
+    if timestamp is None:
+        return time.time()
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    if isinstance(timestamp, datetime):
+        return timestamp.timestamp()
+    try:
+        return datetime.fromisoformat(str(timestamp)).timestamp()
+    except ValueError:
+        return time.time()
+
+class ChatStore:
+    """Single-file transactional chat store (SQLite in WAL mode).
+
+    Messages are appended one row at a time and read back in pages, so saving
+    never rewrites a chat and loading never has to parse all of it at once.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.RLock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def create_chat(self, name, model=None, created_at=None):
+        with self.lock, self.connection:
+            return self._insert_chat(name, model, created_at)
+
+    def append_message(self, chat_id, sender, content, content_type='text', timestamp=None):
+        return self.append_messages(chat_id, [(sender, content, content_type, timestamp)])[0]
+
+    def append_messages(self, chat_id, messages):
+        """Append (sender, content, content_type, timestamp) tuples; returns their sequence numbers."""
+        with self.lock, self.connection:
+            return self._insert_messages(chat_id, messages)
+
+    def _insert_chat(self, name, model=None, created_at=None):
+        created_at = to_epoch(created_at)
+        cursor = self.connection.execute(
+            "INSERT INTO chats (name, model, created_at, updated_at) VALUES (?, ?, ?, ?)",
+            (name, model, created_at, created_at))
+        return cursor.lastrowid
+
+    def _insert_messages(self, chat_id, messages):
+        row = self.connection.execute(
+            "SELECT message_count FROM chats WHERE id = ?", (chat_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"Unknown chat id: {chat_id}")
+        seq = row["message_count"]
+        rows = []
+        for sender, content, content_type, timestamp in messages:
+            rows.append((chat_id, seq, sender, content, content_type or 'text', to_epoch(timestamp)))
+            seq += 1
+        self.connection.executemany(
+            "INSERT INTO messages (chat_id, seq, sender, content, content_type, timestamp) "
+            "VALUES (?, ?, ?, ?, ?, ?)", rows)
+        self.connection.execute(
+            "UPDATE chats SET message_count = ?, updated_at = ? WHERE id = ?",
+            (seq, time.time(), chat_id))
+        return [row[1] for row in rows]
+
+    def load_messages(self, chat_id, offset=0, limit=500):
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT seq, sender, content, content_type, timestamp FROM messages "
+                "WHERE chat_id = ? AND seq >= ? ORDER BY seq LIMIT ?",
+                (chat_id, offset, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def iter_messages(self, chat_id, page_size=500, end=None):
+        # end stops before that sequence number, e.g. the message count of an earlier snapshot
+        offset = 0
+        while end is None or offset < end:
+            page = self.load_messages(chat_id, offset, page_size if end is None else min(page_size, end - offset))
+            if not page:
+                return
+            yield from page
+            offset = page[-1]["seq"] + 1
+
+    def get_chat(self, chat_id):
+        with self.lock:
+            row = self.connection.execute("SELECT * FROM chats WHERE id = ?", (chat_id,)).fetchone()
+        return dict(row) if row else None
+
+    def find_chat(self, name):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT * FROM chats WHERE name = ? ORDER BY updated_at DESC LIMIT 1", (name,)).fetchone()
+        return dict(row) if row else None
+
+    def list_chats(self, limit=-1, offset=0):
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT * FROM chats ORDER BY updated_at DESC LIMIT ? OFFSET ?", (limit, offset)).fetchall()
+        return [dict(row) for row in rows]
+
+    def rename_chat(self, chat_id, new_name):
+        with self.lock, self.connection:
+            self.connection.execute("UPDATE chats SET name = ? WHERE id = ?", (new_name, chat_id))
+
+    def set_chat_model(self, chat_id, model):
+        with self.lock, self.connection:
+            self.connection.execute("UPDATE chats SET model = ? WHERE id = ?", (model, chat_id))
+
+    def delete_chat(self, chat_id):
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM chats WHERE id = ?", (chat_id,))
+
+    def migrate_json_directory(self, directory):
+        """Import legacy chats/*.json files once each; the files themselves are left untouched."""
+        if not os.path.isdir(directory):
+            return 0
+        migrated = 0
+        for file_name in sorted(os.listdir(directory)):
+            if not file_name.endswith('.json'):
+                continue
+            path = os.path.abspath(os.path.join(directory, file_name))
+            with self.lock:
+                seen = self.connection.execute(
+                    "SELECT 1 FROM imported_files WHERE path = ?", (path,)).fetchone()
+            if seen:
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                self.logger.warning(f"Skipping unreadable chat file {path}: {e}")
+                continue
+            if not isinstance(data, list):
+                self.logger.warning(f"Skipping chat file with unexpected format: {path}")
+                continue
+            messages = [(item.get("sender", ""), str(item.get("content", "")),
+                         item.get("content_type", "text"), item.get("timestamp"))
+                        for item in data if isinstance(item, dict)]
+            with self.lock, self.connection:
+                created_at = to_epoch(messages[0][3]) if messages else os.path.getmtime(path)
+                chat_id = self._insert_chat(file_name[:-5], created_at=created_at)
+                if messages:
+                    self._insert_messages(chat_id, messages)
+                self.connection.execute(
+                    "INSERT INTO imported_files (path, chat_id, imported_at) VALUES (?, ?, ?)",
+                    (path, chat_id, time.time()))
+            migrated += 1
+        if migrated:
+            self.logger.info(f"Migrated {migrated} JSON chats from {directory}")
+        return migrated
@@ -1,13 +1,46 @@
 # athena/utils/exceptions.py
 import sys
+import threading
 import traceback
 import logging
 from PyQt6.QtWidgets import QMessageBox
+from PyQt6.QtCore import QObject, pyqtSignal
+
+class ExceptionNotifier(QObject):
+    # Created on the GUI thread, so exceptions raised on worker threads are queued to it
+    exception_raised = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.showing = False
+        self.exception_raised.connect(self.show_error)
+
+    def show_error(self, traceback_text):
+        # One dialog at a time; anything raised while it is open is only logged
+        if self.showing:
+            return
+        self.showing = True
+        try:
+            QMessageBox.critical(None, "Error", f"An unexpected error occurred:\n\n{traceback_text}")
+        finally:
+            self.showing = False
+
+notifier = None
 
 def global_exception_handler(exctype, value, tb):
     logging.error("Uncaught exception", exc_info=(exctype, value, tb))
     traceback_text = ''.join(traceback.format_exception(exctype, value, tb))
-    QMessageBox.critical(None, "Error", f"An unexpected error occurred:\n\n{traceback_text}")
+    if notifier is not None:
+        notifier.exception_raised.emit(traceback_text)
+
+def thread_exception_handler(args):
+    if args.exc_type is SystemExit:
+        return
+    global_exception_handler(args.exc_type, args.exc_value, args.exc_traceback)
 
 def setup_exception_handling():
-    sys.excepthook = global_exception_handler
\ No newline at end of file
+    # Call after the QApplication exists, from the GUI thread
+    global notifier
+    notifier = ExceptionNotifier()
+    sys.excepthook = global_exception_handler
+    threading.excepthook = thread_exception_handler
\ No newline at end of file
@@ -1,27 +1,123 @@
 # athena/utils/logging_config.py
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import threading
 from athena.config import LOG_FILE
 
-def setup_logging():
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
+LOG_LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR"]
+
+# Set while a request to Ollama is in flight on the current thread, so log
+# records and generation metrics can be matched by request_id
+request_context = threading.local()
+
+listener = None
+queue_handler = None
+log_options = {}
+
+def get_request_id():
+    return getattr(request_context, "request_id", None)
+
+def set_request_id(request_id):
+    """Set the current thread's request ID; returns the previous one so it can be restored."""
+    previous = get_request_id()
+    request_context.request_id = request_id
+    return previous
+
+class RequestIdFilter(logging.Filter):
+    # Runs on the thread that logs, before the record is handed to the writer thread
+    def filter(self, record):
+        record.request_id = get_request_id() or "-"
+        return True
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", "-")
+        if request_id != "-":
+            entry["request_id"] = request_id
+        return json.dumps(entry, ensure_ascii=False)
+
+def create_file_handler(json_lines, max_bytes, backup_count, rotate_when):
+    if rotate_when:
+        handler = logging.handlers.TimedRotatingFileHandler(LOG_FILE, when=rotate_when, backupCount=backup_count,
+                                                            encoding='utf-8', delay=True)
+    else:
+        handler = logging.handlers.RotatingFileHandler(LOG_FILE, maxBytes=max_bytes, backupCount=backup_count,
+                                                       encoding='utf-8', delay=True)
+    handler.setFormatter(JsonLinesFormatter() if json_lines else logging.Formatter(LOG_FORMAT))
+    return handler
+
+def create_console_handler():
+    console = logging.StreamHandler()
+    console.setLevel(logging.INFO)
+    console.setFormatter(logging.Formatter('%(name)-12s: %(levelname)-8s %(message)s'))
+    return console
+
+def setup_logging(level="INFO", json_lines=False, max_bytes=10 * 1024 * 1024, backup_count=5, rotate_when=""):
+    """Send all logging through a queue to a background thread that writes the file and console.
+
+    Logging calls only enqueue the record, so the GUI thread never waits on
+    disk I/O. The file rotates by size, or by time when rotate_when is set
+    (e.g. "midnight"); json_lines writes one JSON object per record.
+    """
+    global listener, queue_handler
     log_dir = os.path.dirname(LOG_FILE)
     if not os.path.exists(log_dir):
         os.makedirs(log_dir)
 
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        filename=LOG_FILE,
-        filemode='a'
-    )
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    root = logging.getLogger('')
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
 
-    # Also output to console
-    console = logging.StreamHandler()
-    console.setLevel(logging.INFO)
-    formatter = logging.Formatter('%(name)-12s: %(levelname)-8s %(message)s')
-    console.setFormatter(formatter)
-    logging.getLogger('').addHandler(console)
+    log_options.update(json_lines=json_lines, max_bytes=max_bytes, backup_count=backup_count,
+                       rotate_when=rotate_when)
+    listener = logging.handlers.QueueListener(log_queue, create_file_handler(**log_options), create_console_handler(),
+                                              respect_handler_level=True)
+    listener.start()
+    atexit.register(shutdown_logging)
 
     # Suppress overly verbose logs from libraries
     logging.getLogger('PyQt6').setLevel(logging.WARNING)
-    logging.getLogger('matplotlib').setLevel(logging.WARNING)
\ No newline at end of file
+    logging.getLogger('matplotlib').setLevel(logging.WARNING)
+    logging.getLogger('urllib3').setLevel(logging.WARNING)
+
+def update_logging(level=None, **options):
+    """Apply logging settings at runtime; a new format or rotation swaps the file handler."""
+    if listener is None:
+        return
+    if level is not None:
+        logging.getLogger('').setLevel(level)
+    options = {key: value for key, value in options.items() if value is not None}
+    if all(log_options.get(key) == value for key, value in options.items()):
+        return
+    log_options.update(options)
+    # Stopping drains the queue first; records logged meanwhile wait for the new handler
+    listener.stop()
+    old_handlers = listener.handlers
+    listener.handlers = (create_file_handler(**log_options),) + old_handlers[1:]
+    old_handlers[0].close()
+    listener.start()
+
+def shutdown_logging():
+    global listener
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+        listener = None
\ No newline at end of file
@@ -0,0 +1,94 @@
+# athena/utils/metrics_log.py
+
+import json
+import logging
+import math
+import os
+import threading
+from collections import defaultdict, deque
+
+SUMMARY_FIELDS = ("ttft_ms", "ttfb_ms", "wall_ms", "tokens_per_second", "prompt_eval_ms", "load_duration_ms")
+
+def percentile(values, fraction):
+    # Nearest-rank percentile; values need not be sorted
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+class MetricsLog:
+    """Appends per-request generation metrics to a size-rotated JSONL file.
+
+    The most recent `window` records per model are kept in memory (seeded
+    from the existing log on startup) and their p50/p95 are rewritten to
+    summary.json next to the log after every record. record() may be
+    called from any thread.
+    """
+
+    def __init__(self, directory, max_bytes=5 * 1024 * 1024, backup_count=3, window=500):
+        self.directory = directory
+        self.path = os.path.join(directory, "metrics.jsonl")
+        self.summary_path = os.path.join(directory, "summary.json")
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.window = window
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.recent = defaultdict(lambda: deque(maxlen=self.window))
+        os.makedirs(directory, exist_ok=True)
+        self.load_recent()
+
+    def load_recent(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    metrics = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self.recent[metrics.get("model")].append(metrics)
+
+    def rotate(self):
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def record(self, metrics):
+        line = json.dumps(metrics) + "\n"
+        with self.lock:
+            try:
+                if os.path.exists(self.path) and os.path.getsize(self.path) + len(line) > self.max_bytes:
+                    self.rotate()
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+                self.recent[metrics.get("model")].append(metrics)
+                self.write_summary()
+            except OSError as e:
+                self.logger.warning(f"Could not write generation metrics: {e}")
+
+    def summary(self):
+        with self.lock:
+            return self.build_summary()
+
+    def build_summary(self):
+        summary = {}
+        for model, records in self.recent.items():
+            entry = {"count": len(records)}
+            for field in SUMMARY_FIELDS:
+                values = [record[field] for record in records if record.get(field) is not None]
+                if values:
+                    entry[field] = {"p50": percentile(values, 0.5), "p95": percentile(values, 0.95)}
+            summary[model] = entry
+        return summary
+
+    def write_summary(self):
+        temp_path = self.summary_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.build_summary(), f, indent=2)
+        os.replace(temp_path, self.summary_path)
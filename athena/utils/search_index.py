@@ -0,0 +1,150 @@
+# athena/utils/search_index.py
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entries USING fts5(
+    title,
+    body,
+    kind UNINDEXED,
+    ref UNINDEXED,
+    seq UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS indexed_chats (
+    chat_id INTEGER PRIMARY KEY,
+    next_seq INTEGER NOT NULL
+);
+-- kind and ref are UNINDEXED in entries, so updates and deletes find their rows through this table
+CREATE TABLE IF NOT EXISTS entry_sources (
+    entry_id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    ref TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entry_sources_ref ON entry_sources (kind, ref);
+"""
+
+SOURCE_ROWIDS = "SELECT entry_id FROM entry_sources WHERE kind = ? AND ref = ?"
+
+QUERY_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Snippet highlight markers; views escape the snippet and then replace these
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_END = "\x03"
+
+def build_match_query(text):
+    # Quote every term so user input can never be parsed as FTS5 syntax;
+    # the last term is a prefix match to support search-as-you-type
+    terms = QUERY_TOKEN.findall(text)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+class SearchIndex:
+    """Incrementally maintained SQLite FTS5 index over chat messages and document passages."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.RLock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def get_indexed_seq(self, chat_id):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT next_seq FROM indexed_chats WHERE chat_id = ?", (chat_id,)).fetchone()
+        return row["next_seq"] if row else 0
+
+    def add_messages(self, chat_id, chat_name, messages):
+        """Index (seq, sender, content) tuples for a chat; already indexed sequence numbers are skipped."""
+        with self.lock, self.connection:
+            next_seq = self.get_indexed_seq(chat_id)
+            rows = [(chat_name, f"{sender}: {content}", "chat", str(chat_id), seq)
+                    for seq, sender, content in messages if seq >= next_seq]
+            if not rows:
+                return
+            self.insert_entries(rows)
+            self.connection.execute(
+                "INSERT INTO indexed_chats (chat_id, next_seq) VALUES (?, ?) "
+                "ON CONFLICT(chat_id) DO UPDATE SET next_seq = excluded.next_seq",
+                (chat_id, max(row[4] for row in rows) + 1))
+
+    def insert_entries(self, rows):
+        # Each (title, body, kind, ref, seq) row gets its rowid from entry_sources first
+        for title, body, kind, ref, seq in rows:
+            entry_id = self.connection.execute(
+                "INSERT INTO entry_sources (kind, ref) VALUES (?, ?)", (kind, ref)).lastrowid
+            self.connection.execute(
+                "INSERT INTO entries (rowid, title, body, kind, ref, seq) VALUES (?, ?, ?, ?, ?, ?)",
+                (entry_id, title, body, kind, ref, seq))
+
+    def delete_entries(self, kind, ref):
+        self.connection.execute(f"DELETE FROM entries WHERE rowid IN ({SOURCE_ROWIDS})", (kind, ref))
+        self.connection.execute("DELETE FROM entry_sources WHERE kind = ? AND ref = ?", (kind, ref))
+
+    def rename_chat(self, chat_id, chat_name):
+        with self.lock, self.connection:
+            row = self.connection.execute(
+                f"SELECT title FROM entries WHERE rowid = ({SOURCE_ROWIDS} LIMIT 1)", ("chat", str(chat_id))).fetchone()
+            if row is None or row["title"] == chat_name:
+                return
+            self.connection.execute(f"UPDATE entries SET title = ? WHERE rowid IN ({SOURCE_ROWIDS})",
+                                    (chat_name, "chat", str(chat_id)))
+
+    def remove_chat(self, chat_id):
+        with self.lock, self.connection:
+            self.delete_entries("chat", str(chat_id))
+            self.connection.execute("DELETE FROM indexed_chats WHERE chat_id = ?", (chat_id,))
+
+    def has_document(self, document_id):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT 1 FROM entry_sources WHERE kind = 'document' AND ref = ? LIMIT 1", (document_id,)).fetchone()
+        return row is not None
+
+    def add_document(self, document_id, title, passages):
+        with self.lock, self.connection:
+            self.delete_entries("document", document_id)
+            self.insert_entries([(title, passage, "document", document_id, seq)
+                                 for seq, passage in enumerate(passages)])
+
+    def remove_document(self, document_id):
+        with self.lock, self.connection:
+            self.delete_entries("document", document_id)
+
+    def search(self, text, limit=50, kind=None):
+        match = build_match_query(text)
+        if match is None:
+            return []
+        sql = ("SELECT kind, ref, seq, title, "
+               "snippet(entries, 1, ?, ?, '…', 16) AS snippet, bm25(entries, 2.0, 1.0) AS rank "
+               "FROM entries WHERE entries MATCH ?")
+        params = [HIGHLIGHT_START, HIGHLIGHT_END, match]
+        if kind:
+            sql += " AND kind = ?"
+            params.append(kind)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+        with self.lock:
+            try:
+                rows = self.connection.execute(sql, params).fetchall()
+            except sqlite3.OperationalError as e:
+                self.logger.warning(f"Search failed for {text!r}: {e}")
+                return []
+        return [dict(row) for row in rows]
@@ -20,7 +20,9 @@ class SettingsManager:
                     default_settings = self.get_default_settings()
                     self.save_settings(default_settings)
                     return default_settings
-                return json.loads(content)
+                settings = self.get_default_settings()
+                settings.update(json.loads(content))
+                return settings
         except json.JSONDecodeError:
             print(f"Error decoding JSON from {self.settings_file}. Using default settings.")
             default_settings = self.get_default_settings()
@@ -32,9 +34,72 @@ class SettingsManager:
         with open(self.settings_file, 'w') as f:
             json.dump(settings, f, indent=4)
 
+    def get_http_settings(self, settings):
+        defaults = self.get_default_settings()
+        return {
+            "connect_timeout": settings.get("http_connect_timeout", defaults["http_connect_timeout"]),
+            "read_timeout": settings.get("http_read_timeout", defaults["http_read_timeout"]),
+            "max_retries": settings.get("http_max_retries", defaults["http_max_retries"]),
+            "backoff_factor": settings.get("http_backoff_factor", defaults["http_backoff_factor"]),
+            "pool_size": settings.get("http_pool_size", defaults["http_pool_size"]),
+        }
+
+    def get_backend_urls(self, settings):
+        # The primary URL comes first; extra backends are tried after it on a tie
+        return [settings["ollama_url"]] + list(settings.get("ollama_urls", []))
+
     def get_default_settings(self):
         return {
             "ollama_url": "http://localhost:11434",
+            "ollama_urls": [],
+            "backend_poll_interval": 30,
             "working_directory": os.path.expanduser("~/Athena_Workspace"),
-            "theme": "light_blue.xml"
+            # On by default, as the settings dialog has always shown it: every final message is appended to the store
+            "auto_save": True,
+            "theme": "light_blue.xml",
+            "virtualized_chat_threshold": 500,
+            "http_connect_timeout": 5.0,
+            "http_read_timeout": 120.0,
+            "http_max_retries": 3,
+            "http_backoff_factor": 0.5,
+            "http_pool_size": 10,
+            "chunk_size": 200,
+            "chunk_overlap": 40,
+            "retrieval_top_k": 5,
+            "retrieval_token_budget": 2000,
+            "embedding_model": "",
+            "embedding_batch_size": 32,
+            "document_cache_max_mb": 1024,
+            "pdf_workers": 0,
+            "pdf_pages_per_task": 8,
+            "keep_alive": "30m",
+            "warm_up_models": True,
+            "temperature": 0.7,
+            "max_tokens": 2000,
+            "seed": None,
+            "response_cache_enabled": False,
+            "response_cache_memory_entries": 128,
+            "response_cache_max_mb": 256,
+            "search_result_limit": 50,
+            "max_resident_messages": 2000,
+            "image_max_dimension": 1024,
+            "image_thumbnail_size": 200,
+            "image_quality": 85,
+            "max_concurrent_generations": 2,
+            "metrics_enabled": True,
+            "metrics_max_mb": 5,
+            "last_models": [],
+            "context_window": 4096,
+            "summarize_history": True,
+            "summarize_at": 0.75,
+            "summary_model": "",
+            "summary_max_tokens": 512,
+            "document_summary_section_tokens": 3000,
+            "document_summary_tokens": 400,
+            "log_level": "INFO",
+            "log_json": False,
+            "log_max_mb": 10,
+            "log_backup_count": 5,
+            "log_rotate_when": "",
+            "export_embed_images": True
         }
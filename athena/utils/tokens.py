@@ -0,0 +1,11 @@
+# athena/utils/tokens.py
+
+import math
+
+# Rough average for English text with the BPE vocabularies used by Ollama models
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text):
+    if not text:
+        return 0
+    return int(math.ceil(len(text) / CHARS_PER_TOKEN))
@@ -0,0 +1,124 @@
+# athena/views/chat_list_view.py
+
+from collections import OrderedDict
+from PyQt6.QtWidgets import QListView, QStyledItemDelegate, QStyle, QAbstractItemView
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QSize
+from PyQt6.QtGui import QTextDocument
+
+class ChatListModel(QAbstractListModel):
+    """List model over a chat history; only rows in view are laid out by the delegate."""
+
+    def __init__(self, messages, formatter, parent=None):
+        super().__init__(parent)
+        self.messages = messages
+        self.formatter = formatter
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.messages)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.messages):
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.formatter(self.messages[index.row()])
+        return None
+
+    def message_appended(self):
+        row = len(self.messages) - 1
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.endInsertRows()
+
+    def message_changed(self, row):
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def reset(self, messages=None):
+        self.beginResetModel()
+        if messages is not None:
+            self.messages = messages
+        self.endResetModel()
+
+class ChatMessageDelegate(QStyledItemDelegate):
+    def __init__(self, parent=None, max_cached_documents=256):
+        super().__init__(parent)
+        self.max_cached_documents = max_cached_documents
+        self.documents = OrderedDict()
+
+    def document_for(self, index, width):
+        html = index.data(Qt.ItemDataRole.DisplayRole) or ""
+        key = (index.row(), width)
+        cached = self.documents.get(key)
+        if cached is not None and cached[0] == html:
+            self.documents.move_to_end(key)
+            return cached[1]
+        document = QTextDocument()
+        document.setDefaultFont(self.parent().font() if self.parent() else document.defaultFont())
+        document.setHtml(html)
+        document.setTextWidth(width)
+        self.documents[key] = (html, document)
+        if len(self.documents) > self.max_cached_documents:
+            self.documents.popitem(last=False)
+        return document
+
+    def invalidate(self, row=None):
+        if row is None:
+            self.documents.clear()
+            return
+        for key in [key for key in self.documents if key[0] == row]:
+            del self.documents[key]
+
+    def paint(self, painter, option, index):
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        document = self.document_for(index, option.rect.width())
+        painter.save()
+        painter.translate(option.rect.topLeft())
+        document.drawContents(painter)
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        width = option.rect.width()
+        if width <= 0 and self.parent() is not None:
+            width = self.parent().viewport().width()
+        document = self.document_for(index, max(width, 100))
+        return QSize(int(document.idealWidth()), int(document.size().height()))
+
+class ChatListView(QListView):
+    def __init__(self, messages, formatter, parent=None):
+        super().__init__(parent)
+        self.chat_model = ChatListModel(messages, formatter, self)
+        self.delegate = ChatMessageDelegate(self)
+        self.setModel(self.chat_model)
+        self.setItemDelegate(self.delegate)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setUniformItemSizes(False)
+        self.setLayoutMode(QListView.LayoutMode.Batched)
+        self.setBatchSize(50)
+        self.setWordWrap(True)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+
+    def message_appended(self):
+        self.chat_model.message_appended()
+        self.scrollToBottom()
+
+    def message_changed(self, row):
+        self.delegate.invalidate(row)
+        self.chat_model.message_changed(row)
+        self.scrollToBottom()
+
+    def reset_messages(self):
+        self.delegate.invalidate()
+        self.chat_model.reset()
+        self.scrollToBottom()
+
+    def set_messages(self, messages):
+        self.delegate.invalidate()
+        self.chat_model.reset(messages)
+
+    def resizeEvent(self, event):
+        if event.oldSize().width() != event.size().width():
+            self.delegate.invalidate()
+        super().resizeEvent(event)
@@ -2,21 +2,32 @@
 
 import os
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QTextBrowser, QTextEdit, QPushButton, 
-                             QComboBox, QLabel, QHBoxLayout, QFileDialog, QApplication)
-from PyQt6.QtCore import pyqtSignal, Qt, QBuffer, QByteArray, QIODevice, QUrl
-from PyQt6.QtGui import QImage, QPixmap, QKeyEvent, QDesktopServices
-from datetime import datetime
-import base64
-
-class ChatMessage:
-    def __init__(self, content, sender, timestamp=None, content_type='text'):
-        self.content = content
-        self.sender = sender
-        self.timestamp = timestamp or datetime.now()
-        self.content_type = content_type  # 'text', 'image', or 'document'
+                             QComboBox, QLabel, QHBoxLayout, QFileDialog,
+                             QStackedWidget, QProgressBar)
+from PyQt6.QtCore import pyqtSignal, Qt
+from PyQt6.QtGui import QImage, QKeyEvent, QTextCursor
+from collections import OrderedDict
+from athena.models.chat import Chat, ChatMessage
+from athena.views.message_format import format_message_html
+from athena.views.chat_list_view import ChatListView
+from athena.services.image_store import IMAGE_EXTENSIONS
+
+# Save dialog filters and the extension each adds when none is typed
+EXPORT_FILTERS = {
+    "Markdown (*.md)": ".md",
+    "HTML (*.html)": ".html",
+    "JSON Lines (*.jsonl)": ".jsonl",
+    "Text Files (*.txt)": ".txt",
+}
+
+def get_export_path(parent, caption):
+    file_path, selected_filter = QFileDialog.getSaveFileName(parent, caption, "", ";;".join(EXPORT_FILTERS))
+    if file_path and not os.path.splitext(file_path)[1]:
+        file_path += EXPORT_FILTERS.get(selected_filter, ".md")
+    return file_path
 
 class PasteAwareTextEdit(QTextEdit):
-    image_pasted = pyqtSignal(str, str)  # signal emits file_path, content_type
+    image_pasted = pyqtSignal(object, str)  # signal emits a QImage or file path, content_type
 
     def keyPressEvent(self, event: QKeyEvent):
         if event.key() == Qt.Key.Key_Return and not event.modifiers() & Qt.KeyboardModifier.ShiftModifier:
@@ -28,16 +39,14 @@ class PasteAwareTextEdit(QTextEdit):
         if source.hasImage():
             image = QImage(source.imageData())
             if not image.isNull():
-                # Save the image to a temporary file
-                temp_path = os.path.join(os.path.expanduser("~"), "temp_pasted_image.png")
-                image.save(temp_path, "PNG")
-                self.image_pasted.emit(temp_path, "image")
+                # Storing and downscaling happen off the GUI thread
+                self.image_pasted.emit(image, "image")
             else:
                 super().insertFromMimeData(source)
         elif source.hasUrls():
             for url in source.urls():
                 file_path = url.toLocalFile()
-                if file_path.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp')):
+                if file_path.lower().endswith(IMAGE_EXTENSIONS):
                     self.image_pasted.emit(file_path, "image")
                 else:
                     self.insertPlainText(file_path)
@@ -52,12 +61,24 @@ class ChatWindow(QWidget):
     document_uploaded = pyqtSignal(str)
     model_changed = pyqtSignal(str)
     export_requested = pyqtSignal(str)
+    summarize_requested = pyqtSignal()
+    cancel_task_requested = pyqtSignal()
+    stop_requested = pyqtSignal()
+    message_added = pyqtSignal(object)  # emitted once a message is final
+    image_attached = pyqtSignal(object)  # QImage or file path
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.controller = None
-        self.chat_history = []
+        self.chat_history = Chat()
         self.current_document = None
+        self.current_document_name = None
+        self.streaming_message = None
+        self.streaming_row = None
+        self.streaming_block = None
+        self.fragment_cache = OrderedDict()
+        self.fragment_cache_size = 2000
+        self.virtualization_threshold = 500
         self.init_ui()
 
     def set_controller(self, controller):
@@ -74,10 +95,29 @@ class ChatWindow(QWidget):
         model_layout.addWidget(self.model_selector)
         layout.addLayout(model_layout)
 
-        # Chat display
+        # Chat display: a rich text browser for normal sessions, swapped for a
+        # virtualized list view once the history grows past the threshold
         self.chat_display = QTextBrowser()
         self.chat_display.setOpenExternalLinks(True)
-        layout.addWidget(self.chat_display)
+        self.chat_list_view = ChatListView(self.chat_history, self.get_message_html)
+        self.display_stack = QStackedWidget()
+        self.display_stack.addWidget(self.chat_display)
+        self.display_stack.addWidget(self.chat_list_view)
+        layout.addWidget(self.display_stack)
+
+        # Progress for long-running background tasks
+        progress_layout = QHBoxLayout()
+        self.progress_label = QLabel()
+        self.progress_bar = QProgressBar()
+        self.cancel_task_button = QPushButton("Cancel")
+        self.cancel_task_button.clicked.connect(self.cancel_task_requested.emit)
+        progress_layout.addWidget(self.progress_label)
+        progress_layout.addWidget(self.progress_bar)
+        progress_layout.addWidget(self.cancel_task_button)
+        self.progress_widget = QWidget()
+        self.progress_widget.setLayout(progress_layout)
+        self.progress_widget.hide()
+        layout.addWidget(self.progress_widget)
 
         # Message input
         self.message_input = PasteAwareTextEdit()
@@ -91,6 +131,12 @@ class ChatWindow(QWidget):
         self.send_button.clicked.connect(self.send_message)
         layout.addWidget(self.send_button)
 
+        # Stop button, shown while a response is generating
+        self.stop_button = QPushButton("Stop")
+        self.stop_button.clicked.connect(self.stop_requested.emit)
+        self.stop_button.hide()
+        layout.addWidget(self.stop_button)
+
         # Additional buttons
         button_layout = QHBoxLayout()
         self.new_chat_button = QPushButton("New Chat")
@@ -99,8 +145,12 @@ class ChatWindow(QWidget):
         self.upload_button.clicked.connect(self.upload_document)
         self.export_button = QPushButton("Export Chat")
         self.export_button.clicked.connect(self.export_chat)
+        self.summarize_button = QPushButton("Summarize Document")
+        self.summarize_button.clicked.connect(self.summarize_requested.emit)
+        self.summarize_button.setEnabled(False)
         button_layout.addWidget(self.new_chat_button)
         button_layout.addWidget(self.upload_button)
+        button_layout.addWidget(self.summarize_button)
         button_layout.addWidget(self.export_button)
         layout.addLayout(button_layout)
 
@@ -108,49 +158,151 @@ class ChatWindow(QWidget):
 
     def send_message(self):
         message = self.message_input.toPlainText().strip()
-        if message:
+        if message and self.streaming_message is None:
             model = self.model_selector.currentText()
             self.display_message("You", message)
             self.message_sent.emit(message, model)
             self.message_input.clear()
 
-    def handle_pasted_image(self, file_path, content_type):
+    def handle_pasted_image(self, source, content_type):
         if content_type == "image":
-            self.display_message("You", file_path, content_type='image')
-            with open(file_path, "rb") as image_file:
-                base64_image = base64.b64encode(image_file.read()).decode('utf-8')
-            self.message_sent.emit(f"[IMAGE]{base64_image}", self.get_selected_model())
+            self.image_attached.emit(source)
 
     def display_message(self, sender, content, content_type='text'):
         message = ChatMessage(content, sender, content_type=content_type)
         self.chat_history.append(message)
+        self.append_to_display(message)
+        self.message_added.emit(message)
+
+    def begin_stream_message(self, sender):
+        self.streaming_message = ChatMessage("", sender)
+        self.chat_history.append(self.streaming_message)
+        self.streaming_row = len(self.chat_history) - 1
+        self.append_to_display(self.streaming_message)
+        if not self.is_virtualized():
+            # Chunks go into this block even if other messages are appended below it meanwhile
+            self.streaming_block = self.chat_display.document().lastBlock()
+        self.set_input_enabled(False)
+
+    def append_stream_chunk(self, chunk):
+        if self.streaming_message is None:
+            return
+        self.streaming_message.content += chunk
+        if self.is_virtualized():
+            self.chat_list_view.message_changed(self.streaming_row)
+            return
+        scrollbar = self.chat_display.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 4
+        cursor = QTextCursor(self.streaming_block)
+        cursor.movePosition(QTextCursor.MoveOperation.EndOfBlock)
+        cursor.insertText(chunk)
+        # A newline in the chunk starts a new block; keep following the message's last one
+        self.streaming_block = cursor.block()
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def end_stream_message(self, content=None):
+        message = self.streaming_message
+        if message is None:
+            return
+        if content is not None:
+            message.content = content
+        self.streaming_message = None
+        self.streaming_block = None
+        self.fragment_cache.pop(id(message), None)
+        if self.is_virtualized():
+            self.chat_list_view.message_changed(self.streaming_row)
+        self.set_input_enabled(True)
+        self.message_added.emit(message)
+
+    def discard_stream_message(self):
+        message = self.streaming_message
+        if message is None:
+            return
+        self.streaming_message = None
+        self.chat_history.remove(message)
+        self.streaming_row = None
+        self.streaming_block = None
+        self.update_chat_display()
+        self.set_input_enabled(True)
+
+    def set_input_enabled(self, enabled):
+        self.send_button.setEnabled(enabled)
+        self.stop_button.setVisible(not enabled)
+        self.message_input.setReadOnly(not enabled)
+
+    def get_message_html(self, message):
+        if message is self.streaming_message:
+            return format_message_html(message)
+        # Entries hold the message itself so its id() cannot be reused while cached
+        key = id(message)
+        cached = self.fragment_cache.get(key)
+        if cached is not None and cached[0] is message:
+            self.fragment_cache.move_to_end(key)
+            return cached[1]
+        fragment = format_message_html(message)
+        self.fragment_cache[key] = (message, fragment)
+        if len(self.fragment_cache) > self.fragment_cache_size:
+            self.fragment_cache.popitem(last=False)
+        return fragment
+
+    def set_virtualization_threshold(self, threshold):
+        self.virtualization_threshold = threshold
+        self.fragment_cache_size = max(2000, threshold * 2)
         self.update_chat_display()
 
+    def is_virtualized(self):
+        return self.display_stack.currentWidget() is self.chat_list_view
+
+    def append_to_display(self, message):
+        if not self.is_virtualized() and len(self.chat_history) > self.virtualization_threshold:
+            self.update_chat_display()
+            return
+        if self.is_virtualized():
+            self.chat_list_view.message_appended()
+            return
+        scrollbar = self.chat_display.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 4
+        self.chat_display.append(self.get_message_html(message))
+        if at_bottom or message.sender == "You":
+            scrollbar.setValue(scrollbar.maximum())
+
     def update_chat_display(self):
-        self.chat_display.clear()
-        for message in self.chat_history:
-            timestamp = message.timestamp.strftime("%Y-%m-%d %H:%M:%S")
-            if message.sender == "You":
-                color = "blue"
-            elif message.sender == "System":
-                color = "red"
-            else:
-                color = "green"
-            
-            formatted_message = f'<p style="color: {color};"><b>{message.sender} ({timestamp}):</b> '
-            
-            if message.content_type == 'text':
-                formatted_message += f'{message.content}</p>'
-            elif message.content_type == 'image':
-                formatted_message += f'[Image: <a href="file:///{message.content}">{os.path.basename(message.content)}</a>]</p>'
-                formatted_message += f'<img src="file:///{message.content}" width="200">'
-            elif message.content_type == 'document':
-                formatted_message += f'[Document: {message.content}]</p>'
-            
-            self.chat_display.append(formatted_message)
-        
+        # Full rebuild; only needed when the history is replaced or the display mode changes
+        if len(self.chat_history) > self.virtualization_threshold:
+            self.chat_display.clear()
+            self.display_stack.setCurrentWidget(self.chat_list_view)
+            self.chat_list_view.reset_messages()
+            return
+        self.display_stack.setCurrentWidget(self.chat_display)
+        self.chat_list_view.reset_messages()
+        fragments = [self.get_message_html(message) for message in self.chat_history]
+        if self.streaming_message is None:
+            self.chat_display.setHtml("".join(fragments))
+        else:
+            # Render up to the streaming message first so its block can be found again
+            self.chat_display.setHtml("".join(fragments[:self.streaming_row + 1]))
+            self.streaming_block = self.chat_display.document().lastBlock()
+            for fragment in fragments[self.streaming_row + 1:]:
+                self.chat_display.append(fragment)
         self.chat_display.verticalScrollBar().setValue(self.chat_display.verticalScrollBar().maximum())
 
+    def show_progress(self, label, value, maximum):
+        # A maximum of 0 shows a busy indicator
+        self.progress_label.setText(label)
+        self.progress_bar.setRange(0, maximum)
+        self.progress_bar.setValue(value)
+        self.progress_widget.show()
+
+    def hide_progress(self):
+        self.progress_widget.hide()
+
+    def set_chat(self, chat):
+        self.clear_chat()
+        self.chat_history = chat
+        self.chat_list_view.set_messages(chat)
+        self.update_chat_display()
+
     def on_model_changed(self, model):
         self.model_changed.emit(model)
 
@@ -159,9 +311,16 @@ class ChatWindow(QWidget):
         self.clear_chat()
 
     def clear_chat(self):
+        self.streaming_message = None
+        self.streaming_row = None
+        self.streaming_block = None
+        self.set_input_enabled(True)
         self.chat_history.clear()
-        self.chat_display.clear()
+        self.fragment_cache.clear()
+        self.update_chat_display()
         self.current_document = None
+        self.current_document_name = None
+        self.summarize_button.setEnabled(False)
 
     def upload_document(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "Upload Document", "", "Documents (*.pdf *.docx)")
@@ -171,19 +330,34 @@ class ChatWindow(QWidget):
     def set_document_content(self, file_path, content):
         self.current_document = content
         file_name = os.path.basename(file_path)
+        self.current_document_name = file_name
+        self.summarize_button.setEnabled(bool(content))
         self.display_message("System", f"Document loaded: {file_name}")
 
     def export_chat(self):
-        file_path, _ = QFileDialog.getSaveFileName(self, "Export Chat", "", "Text Files (*.txt)")
+        file_path = get_export_path(self, "Export Chat")
         if file_path:
             self.export_requested.emit(file_path)
 
     def set_model_list(self, models):
+        current = self.model_selector.currentText()
+        if [self.model_selector.itemText(i) for i in range(self.model_selector.count())] == list(models):
+            return
+        # Keep the selection across refreshes so the model isn't warmed up again
+        self.model_selector.blockSignals(True)
         self.model_selector.clear()
         self.model_selector.addItems(models)
+        if current in models:
+            self.model_selector.setCurrentText(current)
+        self.model_selector.blockSignals(False)
+        if self.model_selector.currentText() != current:
+            self.on_model_changed(self.model_selector.currentText())
 
     def get_selected_model(self):
         return self.model_selector.currentText()
 
     def get_current_document(self):
-        return self.current_document
\ No newline at end of file
+        return self.current_document
+
+    def get_current_document_name(self):
+        return self.current_document_name
\ No newline at end of file
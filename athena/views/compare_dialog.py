@@ -0,0 +1,145 @@
+# athena/views/compare_dialog.py
+
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QListWidget, QListWidgetItem, QPlainTextEdit,
+                             QPushButton, QLabel, QSplitter, QWidget)
+from PyQt6.QtGui import QTextCursor
+from PyQt6.QtCore import Qt, pyqtSignal
+
+class ComparePane(QWidget):
+    """One model's answer in a comparison, with its timings underneath."""
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.model = model
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.title_label = QLabel(f"<b>{model}</b>")
+        self.output = QPlainTextEdit()
+        self.output.setReadOnly(True)
+        self.stats_label = QLabel("Queued")
+        self.stats_label.setWordWrap(True)
+        layout.addWidget(self.title_label)
+        layout.addWidget(self.output)
+        layout.addWidget(self.stats_label)
+        self.started = False
+        self.metrics = None
+
+    def append_chunk(self, chunk):
+        if not self.started:
+            self.started = True
+            self.stats_label.setText("Generating...")
+        cursor = self.output.textCursor()
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(chunk)
+        self.output.setTextCursor(cursor)
+
+    def set_metrics(self, metrics):
+        self.metrics = metrics
+
+    def format_metrics(self):
+        metrics = self.metrics
+        if metrics is None:
+            # Served from the response cache, so there is nothing to time
+            return "Cached response"
+        parts = []
+        if metrics.get("ttft_ms") is not None:
+            parts.append(f"TTFT {metrics['ttft_ms']:.0f} ms")
+        if metrics.get("tokens_per_second"):
+            parts.append(f"{metrics['tokens_per_second']:.1f} tok/s")
+        if metrics.get("eval_count") is not None:
+            parts.append(f"{metrics['eval_count']} tokens")
+        if metrics.get("load_duration_ms"):
+            parts.append(f"load {metrics['load_duration_ms']:.0f} ms")
+        parts.append(f"total {metrics['wall_ms']:.0f} ms")
+        return " | ".join(parts)
+
+    def set_finished(self):
+        self.stats_label.setText(self.format_metrics())
+
+    def set_failed(self, error_message):
+        self.stats_label.setText(f"Failed: {error_message}")
+
+    def set_stopped(self):
+        self.stats_label.setText("Stopped")
+
+class CompareDialog(QDialog):
+    """Sends one prompt to several models and streams the answers side by side."""
+
+    compare_requested = pyqtSignal(str, list)  # prompt, models
+    stop_requested = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Compare Models")
+        self.resize(1100, 700)
+        self.panes = {}
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        top_layout = QHBoxLayout()
+        self.model_list = QListWidget()
+        self.model_list.setMaximumWidth(240)
+        top_layout.addWidget(self.model_list)
+        self.prompt_input = QPlainTextEdit()
+        self.prompt_input.setPlaceholderText("Prompt to send to every checked model...")
+        top_layout.addWidget(self.prompt_input)
+        layout.addLayout(top_layout, 1)
+
+        button_layout = QHBoxLayout()
+        self.status_label = QLabel()
+        self.compare_button = QPushButton("Compare")
+        self.compare_button.clicked.connect(self.request_compare)
+        self.stop_button = QPushButton("Stop")
+        self.stop_button.clicked.connect(self.stop_requested.emit)
+        self.stop_button.setEnabled(False)
+        button_layout.addWidget(self.status_label, 1)
+        button_layout.addWidget(self.compare_button)
+        button_layout.addWidget(self.stop_button)
+        layout.addLayout(button_layout)
+
+        self.pane_splitter = QSplitter(Qt.Orientation.Horizontal)
+        layout.addWidget(self.pane_splitter, 3)
+
+    def set_model_list(self, models):
+        checked = set(self.selected_models())
+        self.model_list.clear()
+        for model in models:
+            item = QListWidgetItem(model)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked if model in checked else Qt.CheckState.Unchecked)
+            self.model_list.addItem(item)
+
+    def selected_models(self):
+        return [self.model_list.item(row).text() for row in range(self.model_list.count())
+                if self.model_list.item(row).checkState() == Qt.CheckState.Checked]
+
+    def request_compare(self):
+        prompt = self.prompt_input.toPlainText().strip()
+        models = self.selected_models()
+        if not prompt or not models:
+            self.status_label.setText("Enter a prompt and check at least one model.")
+            return
+        self.compare_requested.emit(prompt, models)
+
+    def start_comparison(self, models, max_concurrent):
+        for pane in self.panes.values():
+            pane.deleteLater()
+        self.panes = {}
+        for model in models:
+            pane = ComparePane(model)
+            self.pane_splitter.addWidget(pane)
+            self.panes[model] = pane
+        self.compare_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        self.status_label.setText(f"Comparing {len(models)} models, at most {max_concurrent} at a time per backend")
+
+    def pane(self, model):
+        return self.panes.get(model)
+
+    def set_running(self, running):
+        self.compare_button.setEnabled(not running)
+        self.stop_button.setEnabled(running)
+        if not running:
+            self.status_label.setText("")
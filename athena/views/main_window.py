@@ -1,23 +1,38 @@
 # athena/views/main_window.py
 
-from PyQt6.QtWidgets import QMainWindow, QStatusBar, QToolBar, QWidget, QVBoxLayout
-from PyQt6.QtGui import QIcon, QAction
-from PyQt6.QtCore import Qt
-from athena.views.chat_window import ChatWindow
+from PyQt6.QtWidgets import (QMainWindow, QStatusBar, QToolBar, QWidget, QVBoxLayout, QLabel, QLineEdit,
+                             QTabWidget)
+from PyQt6.QtGui import QIcon, QAction, QKeySequence
+from PyQt6.QtCore import Qt, QTimer, QEvent, pyqtSignal
+from athena.views.chat_window import ChatWindow, get_export_path
 from athena.views.settings_dialog import SettingsDialog
+from athena.views.search_panel import SearchPanel
 import os
 
 class MainWindow(QMainWindow):
+    first_frame_shown = pyqtSignal()
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Athena - Your AI Assistant")
         self.setGeometry(100, 100, 1200, 800)
-        self.chat_window = ChatWindow(self)
         self.controller = None
+        self.first_frame_done = False
 
         # Add status bar
         self.status_bar = QStatusBar()
         self.setStatusBar(self.status_bar)
+        self.model_status_label = QLabel()
+        self.queue_status_label = QLabel()
+        self.metrics_status_label = QLabel()
+        self.status_bar.addPermanentWidget(self.metrics_status_label)
+        self.status_bar.addPermanentWidget(self.queue_status_label)
+        self.status_bar.addPermanentWidget(self.model_status_label)
+
+        # Search results dock, shown on the first search
+        self.search_panel = SearchPanel(self)
+        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.search_panel)
+        self.search_panel.hide()
 
         # Create toolbar
         self.create_toolbar()
@@ -25,16 +40,77 @@ class MainWindow(QMainWindow):
         # Create central widget and layout
         self.central_widget = QWidget()
         self.central_layout = QVBoxLayout(self.central_widget)
-        self.central_layout.addWidget(self.chat_window)
+        self.chat_tabs = QTabWidget()
+        self.chat_tabs.setTabsClosable(True)
+        self.chat_tabs.setMovable(True)
+        self.chat_tabs.setDocumentMode(True)
+        self.chat_tabs.tabCloseRequested.connect(self.close_chat_tab)
+        self.central_layout.addWidget(self.chat_tabs)
         self.setCentralWidget(self.central_widget)
 
+    @property
+    def chat_window(self):
+        return self.chat_tabs.currentWidget()
+
+    def chat_windows(self):
+        return [self.chat_tabs.widget(index) for index in range(self.chat_tabs.count())]
+
+    def add_chat_tab(self, title="New Chat"):
+        chat_window = ChatWindow(self)
+        chat_window.set_controller(self.controller)
+        self.chat_tabs.setCurrentIndex(self.chat_tabs.addTab(chat_window, title))
+        return chat_window
+
+    def remove_chat_tab(self, chat_window):
+        index = self.chat_tabs.indexOf(chat_window)
+        if index >= 0:
+            self.chat_tabs.removeTab(index)
+            chat_window.deleteLater()
+
+    def set_chat_tab_title(self, chat_window, title):
+        index = self.chat_tabs.indexOf(chat_window)
+        if index >= 0:
+            self.chat_tabs.setTabText(index, title)
+
+    def close_chat_tab(self, index):
+        if self.controller:
+            self.controller.close_session(self.chat_tabs.widget(index))
+
     def set_controller(self, controller):
         self.controller = controller
-        self.chat_window.set_controller(controller)
+        for chat_window in self.chat_windows():
+            chat_window.set_controller(controller)
 
     def show_status_message(self, message, timeout=5000):
         self.status_bar.showMessage(message, timeout)
 
+    def set_model_state(self, model, state):
+        self.model_status_label.setText(f"{model}: {state}" if model else "")
+
+    def set_generation_metrics(self, metrics):
+        # Shows the last completed request: generation speed, then what the prompt cost
+        parts = []
+        if metrics.get("tokens_per_second"):
+            parts.append(f"{metrics['tokens_per_second']:.1f} tok/s")
+        if metrics.get("prompt_eval_count") is not None and metrics.get("prompt_eval_ms") is not None:
+            parts.append(f"prompt {metrics['prompt_eval_count']} tok in {metrics['prompt_eval_ms']:.0f} ms")
+        if metrics.get("load_duration_ms"):
+            parts.append(f"load {metrics['load_duration_ms']:.0f} ms")
+        if metrics.get("ttft_ms") is not None:
+            parts.append(f"TTFT {metrics['ttft_ms']:.0f} ms")
+        self.metrics_status_label.setText(" | ".join(parts))
+        self.metrics_status_label.setToolTip(
+            f"{metrics.get('model')} on {metrics.get('backend')}\n"
+            f"Time to first byte: {metrics.get('ttfb_ms')} ms\n"
+            f"Wall time: {metrics.get('wall_ms')} ms\n"
+            f"Server total: {metrics.get('total_duration_ms')} ms")
+
+    def set_queue_state(self, running, queued):
+        if running or queued:
+            self.queue_status_label.setText(f"Generating: {running} | Queued: {queued}")
+        else:
+            self.queue_status_label.setText("")
+
     def create_toolbar(self):
         toolbar = QToolBar()
         self.addToolBar(Qt.ToolBarArea.TopToolBarArea, toolbar)
@@ -43,6 +119,32 @@ class MainWindow(QMainWindow):
         settings_action = QAction(QIcon(self.get_icon_path('gear.png')), 'Settings', self)
         settings_action.triggered.connect(self.show_settings_dialog)
         toolbar.addAction(settings_action)
+
+        new_tab_action = QAction('New Tab', self)
+        new_tab_action.setShortcut(QKeySequence.StandardKey.AddTab)
+        new_tab_action.triggered.connect(self.open_chat_tab)
+        toolbar.addAction(new_tab_action)
+
+        compare_action = QAction('Compare Models', self)
+        compare_action.triggered.connect(self.show_compare_dialog)
+        toolbar.addAction(compare_action)
+
+        export_all_action = QAction('Export All Chats', self)
+        export_all_action.triggered.connect(self.export_all_chats)
+        toolbar.addAction(export_all_action)
+
+        # Search box; queries run shortly after typing stops
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search chats and documents...")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.setMaximumWidth(320)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(250)
+        self.search_timer.timeout.connect(self.run_search)
+        self.search_input.textChanged.connect(lambda _: self.search_timer.start())
+        self.search_input.returnPressed.connect(self.run_search)
+        toolbar.addWidget(self.search_input)
         
         # You can add more toolbar actions here as needed
         # For example:
@@ -50,6 +152,26 @@ class MainWindow(QMainWindow):
         # new_chat_action.triggered.connect(self.chat_window.request_new_chat)
         # toolbar.addAction(new_chat_action)
 
+    def open_chat_tab(self):
+        if self.controller:
+            self.controller.open_session()
+
+    def show_compare_dialog(self):
+        if self.controller:
+            self.controller.show_compare_dialog()
+
+    def export_all_chats(self):
+        if self.controller:
+            file_path = get_export_path(self, "Export All Chats")
+            if file_path:
+                self.controller.export_all_chats(file_path)
+
+    def run_search(self):
+        self.search_timer.stop()
+        query = self.search_input.text().strip()
+        if self.controller and query:
+            self.controller.search(query)
+
     def show_settings_dialog(self):
         if self.controller:
             settings_dialog = SettingsDialog(self)
@@ -61,10 +183,19 @@ class MainWindow(QMainWindow):
     def get_icon_path(self, icon_name):
         return os.path.join(os.path.dirname(__file__), '..', 'resources', 'icons', icon_name)
 
+    def event(self, event):
+        if event.type() == QEvent.Type.Paint and not self.first_frame_done:
+            self.first_frame_done = True
+            # Queued so deferred startup work runs after this frame is on screen
+            QTimer.singleShot(0, self.first_frame_shown.emit)
+        return super().event(event)
+
+    def closeEvent(self, event):
+        if self.controller:
+            self.controller.shutdown()
+        event.accept()
+
     # You can add more methods here as needed, for example:
-    # def closeEvent(self, event):
-    #     # Handle application closing, maybe save state or show confirmation dialog
-    #     event.accept()
 
     # def resizeEvent(self, event):
     #     # Handle window resizing if needed
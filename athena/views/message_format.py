@@ -0,0 +1,29 @@
+# athena/views/message_format.py
+
+import html
+import os
+from athena.services.image_store import thumbnail_path
+
+SENDER_COLORS = {
+    "You": "blue",
+    "System": "red",
+}
+
+def format_message_html(message):
+    timestamp = message.created_at.strftime("%Y-%m-%d %H:%M:%S")
+    color = SENDER_COLORS.get(message.sender, "green")
+    formatted_message = f'<p style="color: {color};"><b>{html.escape(message.sender)} ({timestamp}):</b> '
+
+    if message.content_type == 'text':
+        formatted_message += f'{html.escape(message.content).replace(chr(10), "<br>")}</p>'
+    elif message.content_type == 'image':
+        file_name = html.escape(os.path.basename(message.content))
+        thumbnail = thumbnail_path(message.content)
+        preview = thumbnail if os.path.exists(thumbnail) else message.content
+        formatted_message += f'[Image: <a href="file:///{message.content}">{file_name}</a>]</p>'
+        formatted_message += f'<img src="file:///{preview}" width="200">'
+    elif message.content_type == 'document':
+        formatted_message += f'[Document: {html.escape(message.content)}]</p>'
+    else:
+        formatted_message += '</p>'
+    return formatted_message
@@ -0,0 +1,48 @@
+# athena/views/search_panel.py
+
+import html
+from PyQt6.QtWidgets import QDockWidget, QListWidget, QListWidgetItem, QLabel, QVBoxLayout, QWidget
+from PyQt6.QtCore import pyqtSignal, Qt
+from athena.utils.search_index import HIGHLIGHT_START, HIGHLIGHT_END
+
+def format_snippet(snippet):
+    return (html.escape(snippet)
+            .replace(HIGHLIGHT_START, "<b>")
+            .replace(HIGHLIGHT_END, "</b>"))
+
+class SearchPanel(QDockWidget):
+    result_activated = pyqtSignal(dict)
+
+    def __init__(self, parent=None):
+        super().__init__("Search", parent)
+        self.setAllowedAreas(Qt.DockWidgetArea.LeftDockWidgetArea | Qt.DockWidgetArea.RightDockWidgetArea)
+        container = QWidget()
+        layout = QVBoxLayout(container)
+        self.summary_label = QLabel()
+        self.results_list = QListWidget()
+        self.results_list.setWordWrap(True)
+        self.results_list.itemActivated.connect(self.on_item_activated)
+        layout.addWidget(self.summary_label)
+        layout.addWidget(self.results_list)
+        self.setWidget(container)
+
+    def set_results(self, query, results, elapsed_ms=None):
+        self.results_list.clear()
+        summary = f"{len(results)} results for \"{query}\""
+        if elapsed_ms is not None:
+            summary += f" ({elapsed_ms:.1f} ms)"
+        self.summary_label.setText(summary)
+        for result in results:
+            kind = "Chat" if result["kind"] == "chat" else "Document"
+            item = QListWidgetItem()
+            item.setData(Qt.ItemDataRole.UserRole, result)
+            label = QLabel(f"<small>{kind}: {html.escape(result['title'])}</small><br>{format_snippet(result['snippet'])}")
+            label.setWordWrap(True)
+            label.setTextFormat(Qt.TextFormat.RichText)
+            item.setSizeHint(label.sizeHint())
+            self.results_list.addItem(item)
+            self.results_list.setItemWidget(item, label)
+        self.show()
+
+    def on_item_activated(self, item):
+        self.result_activated.emit(item.data(Qt.ItemDataRole.UserRole))
@@ -1,9 +1,9 @@
 # athena/views/settings_dialog.py
 
-from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout,
                              QLineEdit, QPushButton, QFormLayout, QFileDialog,
                              QComboBox, QSpinBox, QCheckBox, QDoubleSpinBox)
-from PyQt6.QtCore import Qt
+from athena.utils.logging_config import LOG_LEVELS
 
 class SettingsDialog(QDialog):
     def __init__(self, parent=None):
@@ -20,6 +20,11 @@ class SettingsDialog(QDialog):
         self.ollama_url_input = QLineEdit(self)
         form_layout.addRow("Ollama URL:", self.ollama_url_input)
 
+        # Extra backends, comma separated; requests are routed to whichever has the model
+        self.ollama_urls_input = QLineEdit(self)
+        self.ollama_urls_input.setPlaceholderText("http://gpu-1:11434, http://gpu-2:11434")
+        form_layout.addRow("Additional Ollama URLs:", self.ollama_urls_input)
+
         # Working Directory
         self.working_dir_input = QLineEdit(self)
         self.working_dir_button = QPushButton("Browse")
@@ -45,12 +50,76 @@ class SettingsDialog(QDialog):
         self.max_tokens_input.setSingleStep(100)
         form_layout.addRow("Max Tokens:", self.max_tokens_input)
 
+        # Context window sent as num_ctx; longer chats are summarized to stay inside it
+        self.context_window_input = QSpinBox(self)
+        self.context_window_input.setRange(0, 1048576)
+        self.context_window_input.setSingleStep(1024)
+        self.context_window_input.setSpecialValueText("Model Default")
+        form_layout.addRow("Context Window:", self.context_window_input)
+
+        self.summarize_history_checkbox = QCheckBox(self)
+        form_layout.addRow("Summarize Older Messages:", self.summarize_history_checkbox)
+
         # Temperature
         self.temperature_input = QDoubleSpinBox(self)
-        self.temperature_input.setRange(0.1, 1.0)
+        self.temperature_input.setRange(0.0, 1.0)
         self.temperature_input.setSingleStep(0.1)
         form_layout.addRow("Temperature:", self.temperature_input)
 
+        # Seed (-1 for a random seed on every request)
+        self.seed_input = QSpinBox(self)
+        self.seed_input.setRange(-1, 2147483647)
+        self.seed_input.setSpecialValueText("Random")
+        form_layout.addRow("Seed:", self.seed_input)
+
+        # Response cache; only used for deterministic requests (temperature 0 or a fixed seed)
+        self.response_cache_checkbox = QCheckBox(self)
+        form_layout.addRow("Cache Deterministic Responses:", self.response_cache_checkbox)
+
+        # Model keep-alive (e.g. "30m", "1h", or -1 to never unload)
+        self.keep_alive_input = QLineEdit(self)
+        form_layout.addRow("Keep Models Loaded:", self.keep_alive_input)
+
+        # HTTP client
+        self.connect_timeout_input = QDoubleSpinBox(self)
+        self.connect_timeout_input.setRange(0.5, 60.0)
+        self.connect_timeout_input.setSuffix(" s")
+        form_layout.addRow("Connect Timeout:", self.connect_timeout_input)
+
+        self.read_timeout_input = QDoubleSpinBox(self)
+        self.read_timeout_input.setRange(5.0, 3600.0)
+        self.read_timeout_input.setSingleStep(10.0)
+        self.read_timeout_input.setSuffix(" s")
+        form_layout.addRow("Read Timeout:", self.read_timeout_input)
+
+        self.max_retries_input = QSpinBox(self)
+        self.max_retries_input.setRange(0, 10)
+        form_layout.addRow("Max Retries:", self.max_retries_input)
+
+        # Requests sent to one Ollama server at the same time; the rest wait in a queue
+        self.max_concurrent_input = QSpinBox(self)
+        self.max_concurrent_input.setRange(1, 16)
+        form_layout.addRow("Parallel Generations:", self.max_concurrent_input)
+
+        # Pasted images are downscaled to this size before being sent
+        self.image_max_dimension_input = QSpinBox(self)
+        self.image_max_dimension_input.setRange(256, 8192)
+        self.image_max_dimension_input.setSingleStep(128)
+        self.image_max_dimension_input.setSuffix(" px")
+        form_layout.addRow("Max Image Resolution:", self.image_max_dimension_input)
+
+        # Exports are self-contained unless images are left as links to the image store
+        self.export_embed_images_checkbox = QCheckBox(self)
+        form_layout.addRow("Embed Images in Exports:", self.export_embed_images_checkbox)
+
+        # Logging; the level applies immediately
+        self.log_level_selector = QComboBox(self)
+        self.log_level_selector.addItems(LOG_LEVELS)
+        form_layout.addRow("Log Level:", self.log_level_selector)
+
+        self.log_json_checkbox = QCheckBox(self)
+        form_layout.addRow("Log as JSON Lines:", self.log_json_checkbox)
+
         # Auto Save
         self.auto_save_checkbox = QCheckBox(self)
         form_layout.addRow("Auto Save:", self.auto_save_checkbox)
@@ -77,21 +146,52 @@ class SettingsDialog(QDialog):
     def get_settings(self):
         return {
             "ollama_url": self.ollama_url_input.text(),
+            "ollama_urls": [url.strip() for url in self.ollama_urls_input.text().split(",") if url.strip()],
             "working_directory": self.working_dir_input.text(),
             "theme": self.theme_selector.currentText(),
             "font_size": self.font_size_input.value(),
             "max_tokens": self.max_tokens_input.value(),
+            "context_window": self.context_window_input.value(),
+            "summarize_history": self.summarize_history_checkbox.isChecked(),
             "temperature": self.temperature_input.value(),
-            "auto_save": self.auto_save_checkbox.isChecked()
+            "auto_save": self.auto_save_checkbox.isChecked(),
+            "http_connect_timeout": self.connect_timeout_input.value(),
+            "http_read_timeout": self.read_timeout_input.value(),
+            "http_max_retries": self.max_retries_input.value(),
+            "keep_alive": self.keep_alive_input.text().strip(),
+            "seed": self.seed_input.value() if self.seed_input.value() >= 0 else None,
+            "response_cache_enabled": self.response_cache_checkbox.isChecked(),
+            "image_max_dimension": self.image_max_dimension_input.value(),
+            "max_concurrent_generations": self.max_concurrent_input.value(),
+            "log_level": self.log_level_selector.currentText(),
+            "log_json": self.log_json_checkbox.isChecked(),
+            "export_embed_images": self.export_embed_images_checkbox.isChecked()
         }
 
     def set_settings(self, settings):
         self.ollama_url_input.setText(settings.get("ollama_url", ""))
+        self.ollama_urls_input.setText(", ".join(settings.get("ollama_urls", [])))
         self.working_dir_input.setText(settings.get("working_directory", ""))
         index = self.theme_selector.findText(settings.get("theme", "light_blue.xml"))
         if index >= 0:
             self.theme_selector.setCurrentIndex(index)
         self.font_size_input.setValue(settings.get("font_size", 12))
         self.max_tokens_input.setValue(settings.get("max_tokens", 2000))
+        self.context_window_input.setValue(settings.get("context_window", 4096))
+        self.summarize_history_checkbox.setChecked(settings.get("summarize_history", True))
         self.temperature_input.setValue(settings.get("temperature", 0.7))
-        self.auto_save_checkbox.setChecked(settings.get("auto_save", True))
\ No newline at end of file
+        self.auto_save_checkbox.setChecked(settings.get("auto_save", True))
+        self.connect_timeout_input.setValue(settings.get("http_connect_timeout", 5.0))
+        self.read_timeout_input.setValue(settings.get("http_read_timeout", 120.0))
+        self.max_retries_input.setValue(settings.get("http_max_retries", 3))
+        self.keep_alive_input.setText(str(settings.get("keep_alive", "30m")))
+        seed = settings.get("seed")
+        self.seed_input.setValue(seed if seed is not None else -1)
+        self.response_cache_checkbox.setChecked(settings.get("response_cache_enabled", False))
+        self.image_max_dimension_input.setValue(settings.get("image_max_dimension", 1024))
+        self.max_concurrent_input.setValue(settings.get("max_concurrent_generations", 2))
+        index = self.log_level_selector.findText(settings.get("log_level", "INFO"))
+        if index >= 0:
+            self.log_level_selector.setCurrentIndex(index)
+        self.log_json_checkbox.setChecked(settings.get("log_json", False))
+        self.export_embed_images_checkbox.setChecked(settings.get("export_embed_images", True))
\ No newline at end of file
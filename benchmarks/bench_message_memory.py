@@ -0,0 +1,58 @@
+# benchmarks/bench_message_memory.py
+#
+# Compares the memory held by N chat messages in the old representation
+# (a plain object carrying a datetime) with the slotted ChatMessage.
+#
+#   python benchmarks/bench_message_memory.py [--count 100000] [--json]
+
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from athena.models.chat import ChatMessage
+
+class LegacyChatMessage:
+    def __init__(self, content, sender, content_type='text'):
+        self.content = content
+        self.sender = sender
+        self.timestamp = datetime.now()
+        self.content_type = content_type
+
+def measure(factory, count):
+    # Build the sender/content strings per message, like messages decoded from JSON or a network stream
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    messages = [factory(f"message number {i}", "".join(["Ath", "ena"])) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del messages
+    return (after - before) / count
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = {
+        "count": args.count,
+        "legacy_bytes_per_message": measure(LegacyChatMessage, args.count),
+        "slotted_bytes_per_message": measure(ChatMessage, args.count),
+    }
+    results["saving_percent"] = 100.0 * (1 - results["slotted_bytes_per_message"] / results["legacy_bytes_per_message"])
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"messages:            {results['count']}")
+    print(f"legacy  bytes/msg:   {results['legacy_bytes_per_message']:.1f}")
+    print(f"slotted bytes/msg:   {results['slotted_bytes_per_message']:.1f}")
+    print(f"saving:              {results['saving_percent']:.1f}%")
+
+if __name__ == "__main__":
+    main()
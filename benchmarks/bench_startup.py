@@ -0,0 +1,81 @@
+# benchmarks/bench_startup.py
+#
+# Times one cold start of the desktop app in a fresh interpreter and prints
+# the result as JSON. run_benchmarks.py runs it in a subprocess (the startup
+# suite); it can also be run directly:
+#
+#   python benchmarks/bench_startup.py --url http://127.0.0.1:11435 --workspace /tmp/ws
+#
+# Times are milliseconds since the script started: "imported" once the main
+# controller module has loaded, "constructed" once MainController() returns,
+# "first_frame" once the main window has painted, and "models" once the model
+# list has arrived (or "models_failed" once the backend poll gave up).
+
+import time
+STARTED = time.perf_counter()
+
+import argparse
+import json
+import os
+import sys
+
+HEAVY_MODULES = ("PyPDF2", "docx", "numpy", "qt_material", "jinja2")
+
+def elapsed_ms():
+    return round((time.perf_counter() - STARTED) * 1000, 1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Time Athena's startup")
+    parser.add_argument("--url", required=True, help="Ollama URL (may be unreachable)")
+    parser.add_argument("--workspace", required=True, help="workspace and settings directory; reuse it for a warm start")
+    parser.add_argument("--timeout", type=float, default=15.0, help="seconds to wait for the model list")
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    marks = {}
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import QObject, QEvent, QTimer
+    app = QApplication([])
+    from athena.controllers.main_controller import MainController
+    marks["imported"] = elapsed_ms()
+
+    settings_file = os.path.join(args.workspace, "settings.json")
+    if not os.path.exists(settings_file):
+        os.makedirs(args.workspace, exist_ok=True)
+        with open(settings_file, 'w', encoding='utf-8') as f:
+            json.dump({"ollama_url": args.url, "working_directory": args.workspace}, f)
+    controller = MainController(settings_file)
+    marks["constructed"] = elapsed_ms()
+
+    def exit_when_done():
+        if "first_frame" in marks and ("models" in marks or "models_failed" in marks):
+            app.exit(0)
+
+    class FirstPaint(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint and "first_frame" not in marks:
+                marks["first_frame"] = elapsed_ms()
+                marks["heavy_modules_at_first_frame"] = [name for name in HEAVY_MODULES if name in sys.modules]
+                exit_when_done()
+            return False
+
+    def finished(key):
+        def handler(*args):
+            marks.setdefault(key, elapsed_ms())
+            exit_when_done()
+        return handler
+
+    # The controller connects these when the first poll starts, so patching the instance is enough
+    controller.handle_backends_refreshed = finished("models")
+    controller.handle_backends_failed = finished("models_failed")
+    paint_filter = FirstPaint()
+    controller.main_window.installEventFilter(paint_filter)
+    controller.show_main_window()
+    QTimer.singleShot(int(args.timeout * 1000), lambda: app.exit(0))
+    app.exec()
+    controller.shutdown()
+    print(json.dumps(marks))
+
+if __name__ == "__main__":
+    main()
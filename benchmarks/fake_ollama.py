@@ -0,0 +1,184 @@
+# benchmarks/fake_ollama.py
+#
+# A local stand-in for the Ollama HTTP API that replays recorded NDJSON
+# streams at a configurable token rate and first-token latency.
+#
+#   python benchmarks/fake_ollama.py --port 11435 --tokens-per-second 50 --first-token-ms 200
+#
+# Recordings are raw /api/chat or /api/generate output (one JSON frame per
+# line, as saved with `curl -N ... > stream.ndjson`); the text of either
+# format is replayed in whichever format the request endpoint expects.
+
+import argparse
+import glob
+import itertools
+import json
+import os
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings")
+
+def load_recording(path):
+    tokens = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            frame = json.loads(line)
+            text = frame.get("response")
+            if text is None:
+                text = frame.get("message", {}).get("content")
+            if text:
+                tokens.append(text)
+    return tokens
+
+def synthetic_tokens(count):
+    return [f" token{i}" for i in range(count)]
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, obj, status=200):
+        body = json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_chunk(self, frame):
+        data = (json.dumps(frame) + "\n").encode()
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def do_GET(self):
+        server = self.server
+        if self.path == "/api/tags":
+            self.send_json({"models": [{"name": name, "digest": f"sha256:{name}"} for name in server.models]})
+        elif self.path == "/api/ps":
+            self.send_json({"models": [{"name": name} for name in server.models]})
+        else:
+            self.send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        server.request_count += 1
+        if self.path == "/api/show":
+            self.send_json({"model_info": {"general.architecture": "llama",
+                                           "llama.context_length": server.context_length}})
+            return
+        if self.path == "/api/embed":
+            inputs = body.get("input", [])
+            inputs = [inputs] if isinstance(inputs, str) else inputs
+            self.send_json({"embeddings": [[float(len(text) % 7), 1.0, float(text.count("e"))] for text in inputs]})
+            return
+        if self.path not in ("/api/chat", "/api/generate"):
+            self.send_json({"error": "not found"}, 404)
+            return
+        if body.get("stream") is False:
+            time.sleep(server.first_token_latency)
+            self.send_json({"model": body.get("model"), "done": True})
+            return
+
+        tokens = server.next_recording()
+        chat = self.path == "/api/chat"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        started = time.perf_counter()
+        time.sleep(server.first_token_latency)
+        interval = 1.0 / server.tokens_per_second if server.tokens_per_second > 0 else 0.0
+        try:
+            for index, token in enumerate(tokens):
+                # Pace against the start time so sleep overhead doesn't accumulate
+                delay = server.first_token_latency + index * interval - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+                frame = {"model": body.get("model"), "done": False}
+                if chat:
+                    frame["message"] = {"role": "assistant", "content": token}
+                else:
+                    frame["response"] = token
+                self.send_chunk(frame)
+            eval_duration = int((time.perf_counter() - started - server.first_token_latency) * 1e9)
+            final = {"model": body.get("model"), "done": True, "done_reason": "stop",
+                     "total_duration": int((time.perf_counter() - started) * 1e9),
+                     "load_duration": 0,
+                     "prompt_eval_count": 10,
+                     "prompt_eval_duration": int(server.first_token_latency * 1e9),
+                     "eval_count": len(tokens),
+                     "eval_duration": max(eval_duration, 1)}
+            if chat:
+                final["message"] = {"role": "assistant", "content": ""}
+            else:
+                final["response"] = ""
+            data = (json.dumps(final) + "\n").encode()
+            self.wfile.write(b"%x\r\n%s\r\n0\r\n\r\n" % (len(data), data))
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, recordings=None, tokens_per_second=0.0, first_token_latency=0.0,
+                 models=("bench-model",), context_length=8192):
+        super().__init__(("127.0.0.1", port), FakeOllamaHandler)
+        self.recordings = recordings or [synthetic_tokens(200)]
+        self.recording_cycle = itertools.cycle(self.recordings)
+        self.recording_lock = threading.Lock()
+        self.tokens_per_second = tokens_per_second
+        self.first_token_latency = first_token_latency
+        self.models = list(models)
+        self.context_length = context_length
+        self.request_count = 0
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def next_recording(self):
+        with self.recording_lock:
+            return next(self.recording_cycle)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+def load_recordings(paths=None):
+    paths = paths or sorted(glob.glob(os.path.join(RECORDINGS_DIR, "*.ndjson")))
+    return [load_recording(path) for path in paths]
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded Ollama streams")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--recording", action="append", help="NDJSON recording; repeat to rotate between several")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="0 replays as fast as possible")
+    parser.add_argument("--first-token-ms", type=float, default=200.0)
+    parser.add_argument("--model", action="append", help="model name to advertise")
+    args = parser.parse_args()
+    server = FakeOllamaServer(args.port, load_recordings(args.recording), args.tokens_per_second,
+                              args.first_token_ms / 1000, models=args.model or ("bench-model",))
+    print(f"Fake Ollama listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
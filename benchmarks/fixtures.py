@@ -0,0 +1,51 @@
+# benchmarks/fixtures.py
+#
+# Generates PDF and DOCX files of a given size for the extraction benchmarks.
+# The PDF writer emits plain uncompressed text pages, so it needs no extra
+# dependency; DOCX files are written with python-docx.
+
+LOREM = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+         "incididunt ut labore et dolore magna aliqua")
+
+def make_pdf(path, pages, lines_per_page=45):
+    objects = []
+
+    def add(data):
+        objects.append(data)
+        return len(objects)
+
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = add(b"")  # filled in once the page ids are known
+    kids = []
+    for page in range(pages):
+        lines = b"".join(b"(page %d line %d %s) Tj T* " % (page, line, LOREM.encode())
+                         for line in range(lines_per_page))
+        stream = b"BT /F1 9 Tf 11 TL 36 800 Td " + lines + b"ET"
+        contents = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        kids.append(add(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 842] /Contents %d 0 R "
+                        b"/Resources << /Font << /F1 %d 0 R >> >> >>" % (pages_id, contents, font)))
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids), len(kids))
+    catalog = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, data in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + data + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+    with open(path, 'wb') as f:
+        f.write(out)
+    return path
+
+def make_docx(path, paragraphs):
+    from docx import Document
+    document = Document()
+    for index in range(paragraphs):
+        document.add_paragraph(f"Paragraph {index}. {LOREM}. {LOREM}.")
+    document.save(path)
+    return path
@@ -0,0 +1,322 @@
+# benchmarks/run_benchmarks.py
+#
+# Runs Athena's benchmark suites against a local fake Ollama server and
+# writes the results as JSON, so runs from different commits can be diffed.
+#
+#   python benchmarks/run_benchmarks.py -o bench.json
+#   python benchmarks/run_benchmarks.py --suite llm --suite render --quick
+#   python benchmarks/run_benchmarks.py -o new.json --compare old.json
+#
+# Suites: llm (TTFT and tokens/sec through LLMService), screen (TTFT until
+# the first chunk is rendered by ChatWindow), render (ChatWindow cost as the
+# history grows), documents (DocumentService extraction throughput), memory
+# (bytes per chat message) and startup (time to the first painted frame in a
+# fresh interpreter, see bench_startup.py). The Qt suites run on the
+# offscreen platform unless QT_QPA_PLATFORM is already set.
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from fake_ollama import FakeOllamaServer, load_recordings
+from fixtures import make_pdf, make_docx
+
+SUITES = ("llm", "screen", "render", "documents", "memory", "startup")
+MESSAGES = [{"role": "user", "content": "Explain binary search."}]
+
+def median(values):
+    return round(statistics.median(values), 3) if values else None
+
+def stream_timings(stream):
+    """Return (ttft_ms, total_ms, chunks, tokens_per_second) for an iterator of chunks."""
+    started = time.perf_counter()
+    first = None
+    chunks = 0
+    for _ in stream:
+        if first is None:
+            first = time.perf_counter()
+        chunks += 1
+    finished = time.perf_counter()
+    generation_time = finished - first if first is not None else 0.0
+    return ((first - started) * 1000 if first else None,
+            (finished - started) * 1000,
+            chunks,
+            (chunks - 1) / generation_time if generation_time > 0 else None)
+
+def bench_llm(args):
+    from athena.services.llm_service import LLMService
+    results = {}
+    scenarios = {
+        # Replay as fast as possible: measures client-side parsing overhead
+        "unthrottled": {"tokens_per_second": 0.0, "first_token_latency": 0.0},
+        # Realistic pacing: TTFT and tokens/sec should track the server settings
+        "paced": {"tokens_per_second": args.tokens_per_second, "first_token_latency": args.first_token_ms / 1000},
+    }
+    for name, scenario in scenarios.items():
+        server = FakeOllamaServer(recordings=load_recordings(), **scenario).start()
+        service = LLMService(server.url)
+        try:
+            runs = [stream_timings(service.chat_stream(MESSAGES, "bench-model")) for _ in range(args.runs)]
+        finally:
+            service.close()
+            server.stop()
+        results[name] = {
+            "ttft_ms": median([run[0] for run in runs]),
+            "total_ms": median([run[1] for run in runs]),
+            "chunks": runs[0][2],
+            "tokens_per_second": median([run[3] for run in runs if run[3]]),
+        }
+    return results
+
+def qt_application():
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+def bench_screen(args):
+    app = qt_application()
+    from PyQt6.QtCore import QEventLoop
+    from athena.views.chat_window import ChatWindow
+    from athena.controllers.workers import GenerationWorker
+    from athena.services.generation_scheduler import GenerationScheduler, GenerationJob
+    from athena.services.llm_service import LLMService
+
+    server = FakeOllamaServer(recordings=load_recordings(), tokens_per_second=args.tokens_per_second,
+                              first_token_latency=args.first_token_ms / 1000).start()
+    service = LLMService(server.url)
+    scheduler = GenerationScheduler(1)
+    chat_window = ChatWindow()
+    chat_window.resize(900, 700)
+    chat_window.show()
+    ttfts, totals = [], []
+    try:
+        for run in range(args.runs):
+            loop = QEventLoop()
+            marks = {}
+            worker = GenerationWorker(lambda token: service.chat_stream(MESSAGES, "bench-model", token))
+
+            def on_chunk(chunk, marks=marks):
+                chat_window.append_stream_chunk(chunk)
+                if "first" not in marks:
+                    chat_window.chat_display.viewport().repaint()
+                    marks["first"] = time.perf_counter()
+
+            def on_finished(response, marks=marks, loop=loop):
+                chat_window.end_stream_message(response)
+                marks["done"] = time.perf_counter()
+                loop.quit()
+
+            worker.chunk_received.connect(on_chunk)
+            worker.generation_finished.connect(on_finished)
+            worker.generation_failed.connect(lambda error, loop=loop: loop.quit())
+            chat_window.begin_stream_message("Athena")
+            started = time.perf_counter()
+            scheduler.submit(GenerationJob(run, server.url, worker.run))
+            loop.exec()
+            if "first" in marks:
+                ttfts.append((marks["first"] - started) * 1000)
+                totals.append((marks["done"] - started) * 1000)
+    finally:
+        scheduler.shutdown()
+        service.close()
+        server.stop()
+        chat_window.close()
+        app.processEvents()
+    return {"ttft_to_screen_ms": median(ttfts), "total_to_screen_ms": median(totals),
+            "server_first_token_ms": args.first_token_ms}
+
+def bench_render(args):
+    app = qt_application()
+    from athena.views.chat_window import ChatWindow
+    sizes = (100, 1000) if args.quick else (100, 1000, 5000)
+    results = {}
+    for size in sizes:
+        chat_window = ChatWindow()
+        chat_window.resize(900, 700)
+        chat_window.show()
+        text = "A reply with a few sentences of text in it. " * 6
+        for index in range(size - 50):
+            chat_window.display_message("You" if index % 2 else "Athena", text)
+        app.processEvents()
+
+        started = time.perf_counter()
+        for index in range(50):
+            chat_window.display_message("You" if index % 2 else "Athena", text)
+            app.processEvents()
+        append_ms = (time.perf_counter() - started) * 1000 / 50
+
+        chat_window.begin_stream_message("Athena")
+        started = time.perf_counter()
+        for index in range(200):
+            chat_window.append_stream_chunk(" token")
+            if index % 10 == 0:
+                app.processEvents()
+        chunk_ms = (time.perf_counter() - started) * 1000 / 200
+        chat_window.end_stream_message()
+
+        started = time.perf_counter()
+        chat_window.update_chat_display()
+        app.processEvents()
+        rebuild_ms = (time.perf_counter() - started) * 1000
+
+        results[str(size)] = {"append_message_ms": round(append_ms, 3),
+                              "stream_chunk_ms": round(chunk_ms, 4),
+                              "full_rebuild_ms": round(rebuild_ms, 1),
+                              "virtualized": chat_window.is_virtualized()}
+        chat_window.close()
+        chat_window.deleteLater()
+        app.processEvents()
+    return results
+
+def bench_documents(args):
+    from athena.services.document_service import DocumentService
+    pdf_pages = (10, 50) if args.quick else (10, 50, 200)
+    docx_paragraphs = (100, 1000) if args.quick else (100, 1000, 5000)
+    results = {"pdf": {}, "docx": {}}
+    work_dir = tempfile.mkdtemp(prefix="athena-bench-")
+    try:
+        cases = [("pdf", pages, make_pdf, "pages") for pages in pdf_pages]
+        cases += [("docx", paragraphs, make_docx, "paragraphs") for paragraphs in docx_paragraphs]
+        for kind, size, maker, unit in cases:
+            path = maker(os.path.join(work_dir, f"doc-{size}.{kind}"), size)
+            # A fresh workspace per case so the first load always extracts
+            service = DocumentService(os.path.join(work_dir, f"workspace-{kind}-{size}"))
+            started = time.perf_counter()
+            document = service.load_document(path)
+            extract_s = time.perf_counter() - started
+            started = time.perf_counter()
+            service.load_document(path)
+            cached_ms = (time.perf_counter() - started) * 1000
+            results[kind][str(size)] = {
+                "file_mb": round(os.path.getsize(path) / 1e6, 3),
+                "extract_ms": round(extract_s * 1000, 1),
+                f"{unit}_per_second": round(size / extract_s, 1),
+                "chars_per_second": round(len(document["text"]) / extract_s),
+                "cached_load_ms": round(cached_ms, 2),
+            }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+def bench_memory(args):
+    from bench_message_memory import measure, LegacyChatMessage
+    from athena.models.chat import ChatMessage
+    count = 20000 if args.quick else 100000
+    return {"count": count,
+            "legacy_bytes_per_message": round(measure(LegacyChatMessage, count), 1),
+            "slotted_bytes_per_message": round(measure(ChatMessage, count), 1)}
+
+def run_startup(url, workspace):
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    completed = subprocess.run([sys.executable, os.path.join(BENCH_DIR, "bench_startup.py"),
+                                "--url", url, "--workspace", workspace],
+                               capture_output=True, text=True, env=env, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def summarize_startups(runs):
+    summary = {key: median([run[key] for run in runs if key in run])
+               for key in ("imported", "constructed", "first_frame", "models", "models_failed")
+               if any(key in run for run in runs)}
+    summary["heavy_modules_at_first_frame"] = runs[-1].get("heavy_modules_at_first_frame")
+    return summary
+
+def bench_startup(args):
+    server = FakeOllamaServer(models=("bench-model", "other-model")).start()
+    work_dir = tempfile.mkdtemp(prefix="athena-bench-")
+    runs = max(3, args.runs)
+    results = {}
+    try:
+        # The first start has no cached theme or model list; later ones reuse the workspace
+        workspace = os.path.join(work_dir, "reachable")
+        results["cold"] = summarize_startups([run_startup(server.url, workspace)])
+        results["warm"] = summarize_startups([run_startup(server.url, workspace) for _ in range(runs)])
+        # Nothing listens on port 9 (discard): the first frame must not wait for Ollama
+        workspace = os.path.join(work_dir, "unreachable")
+        run_startup("http://127.0.0.1:9", workspace)
+        results["ollama_down"] = summarize_startups([run_startup("http://127.0.0.1:9", workspace)
+                                                     for _ in range(runs)])
+    finally:
+        server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+def compare(baseline, current):
+    old, new = flatten(baseline["results"]), flatten(current["results"])
+    print(f"{'metric':60} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name in sorted(set(old) & set(new)):
+        change = f"{(new[name] - old[name]) / old[name] * 100:+.1f}%" if old[name] else ""
+        print(f"{name:60} {old[name]:>12} {new[name]:>12} {change:>9}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Athena benchmarks against a fake Ollama server")
+    parser.add_argument("--suite", action="append", choices=SUITES, help="suite to run; default all")
+    parser.add_argument("-o", "--output", help="write results JSON here (default stdout)")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    parser.add_argument("--runs", type=int, default=5, help="streams per LLM scenario")
+    parser.add_argument("--tokens-per-second", type=float, default=100.0, help="paced replay rate")
+    parser.add_argument("--first-token-ms", type=float, default=150.0, help="paced first-token latency")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes for a fast smoke run")
+    args = parser.parse_args()
+
+    suites = args.suite or SUITES
+    runners = {"llm": bench_llm, "screen": bench_screen, "render": bench_render,
+               "documents": bench_documents, "memory": bench_memory, "startup": bench_startup}
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "quick": args.quick,
+        },
+        "results": {},
+    }
+    for suite in suites:
+        print(f"Running {suite}...", file=sys.stderr)
+        started = time.perf_counter()
+        report["results"][suite] = runners[suite](args)
+        print(f"  {suite} done in {time.perf_counter() - started:.1f} s", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(json.load(f), report)
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 # main.py
 import sys
 import os
-import importlib
+import importlib.util
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtGui import QIcon
 from athena.controllers.main_controller import MainController
@@ -13,9 +13,11 @@ def check_dependencies():
     required_modules = ['PyQt6', 'requests', 'PyPDF2', 'docx', 'qt_material']
     missing_modules = []
     for module in required_modules:
+        # Only locate the modules; importing them here would put their load time on every startup
         try:
-            importlib.import_module(module)
-        except ImportError as e:
+            if importlib.util.find_spec(module) is None:
+                missing_modules.append(f"{module}: not installed")
+        except (ImportError, ValueError) as e:
             missing_modules.append(f"{module}: {str(e)}")
     
     if missing_modules: